@@ -0,0 +1,4 @@
+'''
+Benchmarks for `netaudio.dante2`, run against devices simulated on the loopback interface (see
+`netaudio.simulator`). Run with `python -m benchmarks --help`.
+'''
@@ -0,0 +1,81 @@
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+from netaudio.dante2.service import DanteService
+
+from . import codec, commands, memory, refresh, settle
+
+BENCHMARKS = ('settle', 'commands', 'refresh', 'memory', 'codec')
+
+
+def _parse_version(version: str):
+    return tuple(int(part) for part in version.split('.'))
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark netaudio.dante2 against simulated devices, emitting JSON.',
+    )
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark',
+        help=f"Which to run, of {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--output', '-o', help='Write the results here, rather than to stdout')
+    parser.add_argument('--quick', action='store_true', help='Smaller networks, for a quick check')
+    parser.add_argument('--arc-version', type=_parse_version, default=(2, 7, 2),
+        help='ARC protocol version of the simulated devices (default: 2.7.2)')
+    parser.add_argument('--unbatched', action='store_true',
+        help="Read and write with asyncio's own datagram transport, for comparison")
+    parser.add_argument('--timeout', type=float, default=120.0,
+        help='Give up on a network that has not settled after this many seconds')
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    args.benchmarks = args.benchmarks or list(BENCHMARKS)
+    return args
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    version = args.arc_version
+    device_counts = [10, 50] if args.quick else [10, 100, 500]
+    device_count = device_counts[-1] // 5
+    if args.unbatched:
+        DanteService.BATCHED_IO = False
+
+    results = {}
+    for name in args.benchmarks:
+        print(f"Running {name}...", file=sys.stderr)
+        if name == 'settle':
+            results[name] = settle.run(device_counts, 16, 16, version, args.timeout)
+        elif name == 'commands':
+            results[name] = commands.run(device_count, 20 if args.quick else 100, version, args.timeout)
+        elif name == 'refresh':
+            results[name] = refresh.run(device_count, 64, 64, version, 3, args.timeout)
+        elif name == 'memory':
+            results[name] = memory.run(device_count, 64, 64, version, args.timeout)
+        elif name == 'codec':
+            results[name] = codec.run(0.2 if args.quick else 1.0)
+
+    report = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'arc_version': '.'.join(str(part) for part in version),
+        'batched_io': DanteService.BATCHED_IO,
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
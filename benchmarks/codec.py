@@ -0,0 +1,47 @@
+import timeit
+
+from netaudio.dante2 import codec, schema, util
+from netaudio.simulator import SimulatedNetwork
+
+_MESSAGE = bytes(range(256)) + b'channel name\x00' + bytes(32)
+# As requests for a page of RX channels
+_BODY = (b'\x00\x00' * 3, b'\x00\x01', b'\x00\x01', b'\x00\x01', b'\x00\x00' * 6)
+
+
+def _rx_page() -> bytes:
+    '''A full page of RX channels, as a simulated device (with ARC protocol 2.8.2) answers.'''
+    device = SimulatedNetwork().add_device('bench', rx_count=16, tx_count=16)
+    request = codec.build_command(b'\x28\x02', 1, b'\x34\x00', b'\x00\x00', _BODY)
+    return device._arc_rx_channels(bytes(request)) # pylint: disable=protected-access
+
+
+def _cases() -> dict:
+    rx_page = _rx_page()
+    rx_decoder = schema.get_page_decoder(schema.RX_CHANNELS, (2, 8, 2))
+    return {
+        'decode_integer': lambda: util.decode_integer(_MESSAGE, 14),
+        'decode_integer_32': lambda: util.decode_integer(_MESSAGE, 32, 4),
+        'encode_integer': lambda: util.encode_integer(4660),
+        'decode_string': lambda: util.decode_string(_MESSAGE, 256),
+        'encode_string': lambda: util.encode_string('channel name'),
+        'decode_protocol_version': lambda: util.decode_protocol_version(b'\x28\x02'),
+        'encode_protocol_version': lambda: util.encode_protocol_version((2, 8, 2)),
+        'decode_mac_address': lambda: util.decode_mac_address(_MESSAGE[:6]),
+        'encode_mac_address': lambda: util.encode_mac_address('00:1d:c1:0a:0b:0c'),
+        'build_command': lambda: codec.build_command(
+            util.encode_protocol_version((2, 8, 2)), 4660, b'\x30\x00', b'\x00\x00', _BODY),
+        'decode_rx_page': lambda: rx_decoder.decode(rx_page, 16),
+    }
+
+
+def run(seconds: float) -> dict:
+    '''Operations per second of each of the `util`, `codec` and `schema` encoders and decoders.'''
+    results = {}
+    for name, case in _cases().items():
+        timer = timeit.Timer(case)
+        number, elapsed = timer.autorange()
+        # Scale up to roughly the time asked for, keeping the best of a few runs
+        number = max(number, int(number * seconds / elapsed / 3))
+        best = min(timer.repeat(3, number))
+        results[name] = {'ops_per_second': number / best}
+    return results
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from netaudio.simulator import SimulatedNetwork
+
+from .common import simulated_application, summarise
+
+
+async def _measure(app, commands_per_device: int) -> tuple[list[float], float]:
+    latencies = []
+
+    async def _command_device(device):
+        for _ in range(commands_per_device):
+            sent = time.perf_counter()
+            await device.request_name()
+            latencies.append(time.perf_counter() - sent)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[_command_device(device) for device in app.devices])
+    return latencies, time.perf_counter() - started
+
+
+def run(device_count: int, commands_per_device: int, arc_version, timeout: float) -> dict:
+    '''
+    Round trip times of ARC commands, with one command in flight per device, and the rate at which
+    they're answered overall.
+    '''
+    network = SimulatedNetwork.build(device_count, arc_version=arc_version)
+    with network, simulated_application(network, timeout) as (app, _):
+        latencies, elapsed = app.service_loop.run_coroutine(_measure(app, commands_per_device)).result()
+    return {
+        'devices': device_count,
+        'commands_per_second': len(latencies) / elapsed,
+        'latency': summarise(latencies),
+    }
@@ -0,0 +1,51 @@
+import asyncio
+import contextlib
+import statistics
+import time
+
+from netaudio.dante2.application import DanteApplication
+from netaudio.simulator import SimulatedNetwork
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    '''The sample below which `fraction` of them fall (nearest rank).'''
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def summarise(samples: list[float]) -> dict:
+    '''Summary statistics of a set of timings (in seconds), reported in milliseconds.'''
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1000,
+        'p50_ms': percentile(samples, 0.5) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'max_ms': max(samples) * 1000,
+    }
+
+
+async def ready(app: DanteApplication, device_count: int) -> None:
+    '''
+    Wait until `device_count` devices have been registered and all have answered. Unlike
+    `DanteApplication.settled()` there's no quiet period, as the network is known in advance.
+    '''
+    while len(app.devices) < device_count or not app.is_settled():
+        await asyncio.sleep(0.001)
+
+
+@contextlib.contextmanager
+def simulated_application(network: SimulatedNetwork, timeout: float):
+    '''
+    Start an application discovering the devices of an (already started) simulated network, and
+    yield it, along with how long it took for all the devices to be ready.
+    '''
+    app = DanteApplication(discovery_factory=network.discovery_factory())
+    started = time.perf_counter()
+    app.startup()
+    try:
+        app.service_loop.run_coroutine(ready(app, len(network.devices))).result(timeout)
+        yield app, time.perf_counter() - started
+    finally:
+        app.shutdown()
@@ -0,0 +1,31 @@
+import tracemalloc
+
+from netaudio.simulator import SimulatedNetwork
+
+from .common import simulated_application
+
+# Only count what the application allocates, not the simulator sharing its process
+_FILTERS = [tracemalloc.Filter(True, '*/netaudio/dante2/*')]
+
+
+def run(device_count: int, rx_count: int, tx_count: int, arc_version, timeout: float) -> dict:
+    '''Memory held by the application's model of the network, once it has settled.'''
+    network = SimulatedNetwork.build(device_count, rx_count, tx_count, arc_version)
+    with network:
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+            with simulated_application(network, timeout) as (app, _):
+                snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+                channel_count = sum(len(device.rx_channels) + len(device.tx_channels) for device in app.devices)
+        finally:
+            tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in snapshot.compare_to(baseline, 'filename'))
+    return {
+        'devices': device_count,
+        'channels': channel_count,
+        'bytes': allocated,
+        'bytes_per_device': allocated / device_count,
+        'bytes_per_channel': allocated / channel_count if channel_count else None,
+    }
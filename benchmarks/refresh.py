@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+from netaudio.simulator import SimulatedNetwork
+
+from .common import simulated_application
+
+
+async def _refresh(app) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*[device.request_all_channels() for device in app.devices])
+    # The channel pages are requested once the counts arrive, and are tracked by their device
+    while not app.is_settled():
+        await asyncio.sleep(0.001)
+    return time.perf_counter() - started
+
+
+def run(device_count: int, rx_count: int, tx_count: int, arc_version, rounds: int, timeout: float) -> dict:
+    '''How quickly the channels of every device can be requested again, once all are known.'''
+    network = SimulatedNetwork.build(device_count, rx_count, tx_count, arc_version)
+    with network, simulated_application(network, timeout) as (app, _):
+        channel_count = sum(len(device.rx_channels) + len(device.tx_channels) for device in app.devices)
+        timings = [
+            app.service_loop.run_coroutine(_refresh(app)).result(timeout)
+            for _ in range(rounds)
+        ]
+    best = min(timings)
+    return {
+        'devices': device_count,
+        'channels': channel_count,
+        'best_seconds': best,
+        'channels_per_second': channel_count / best,
+        'devices_per_second': device_count / best,
+    }
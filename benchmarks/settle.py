@@ -0,0 +1,18 @@
+from netaudio.simulator import SimulatedNetwork
+
+from .common import simulated_application
+
+
+def run(device_counts: list[int], rx_count: int, tx_count: int, arc_version, timeout: float) -> list[dict]:
+    '''Time from `DanteApplication.startup()` until every device has been discovered and answered.'''
+    results = []
+    for device_count in device_counts:
+        network = SimulatedNetwork.build(device_count, rx_count, tx_count, arc_version)
+        with network, simulated_application(network, timeout) as (app, elapsed):
+            channel_count = sum(len(device.rx_channels) + len(device.tx_channels) for device in app.devices)
+        results.append({
+            'devices': device_count,
+            'channels': channel_count,
+            'seconds': elapsed,
+        })
+    return results
@@ -1,26 +1,23 @@
 # ~ from ipaddress import IPv4Address
-import time
-
 from termcolor import cprint
 
-from netaudio.dante2.application import DanteApplication
+from netaudio.utils.daemon import daemon_command, dante_application
 from netaudio.utils.json_encoder import dump_json_formatted
 
+@daemon_command("channel list")
 def channel_list(
     # ~ name: str = None,
     # ~ host: str = None,
     # ~ interfaces: list[str] = None,
     json: bool = False,
+    timeout: float = 10.0,
+    cache: bool = False,
 ) -> None:
     """
     List channels discoverable on the network.
     """
     # TODO: implement remaining arguments above
-    app = DanteApplication()
-    app.startup()
-    time.sleep(1)
-    try:
-
+    with dante_application(timeout, cache) as app:
         if json:
             channels: dict[str, list[Any]] = {}
             for device in app.devices:
@@ -48,8 +45,3 @@ def channel_list(
                     for channel in rx_channels:
                         print(f"\t{channel.number}: {channel.name}")
                 print()
-
-    except Exception as exception:
-        raise exception
-    finally:
-        app.shutdown()
@@ -1,7 +1,7 @@
 from enum import Enum
 from typing import List
 
-from netaudio.dante.device import DanteDevice
+from netaudio.dante.device import DEFAULT_BEGIN_CONCURRENCY, DanteDevice, begin_devices
 from netaudio.dante.browser import DanteBrowser
 from netaudio.utils.cli import FireTyped
 from netaudio.dante.channel import ChannelType
@@ -75,6 +75,7 @@ async def device_configure(
         host:str = None,
         interfaces:List[str] = None,
         mdns_timeout:float=1.5,
+        concurrency:int=DEFAULT_BEGIN_CONCURRENCY,
 
         # Configuration options:
         channel_number: int = None,
@@ -103,8 +104,7 @@ async def device_configure(
         interfaces=interfaces
     )
 
-    for _, device in devices.items():
-        await device.begin()
+    await begin_devices(devices.values(), concurrency)
 
     devices = dict(sorted(devices.items(), key=lambda x: x[1].name))
 
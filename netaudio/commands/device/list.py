@@ -1,26 +1,23 @@
-import time
-
 from termcolor import colored, cprint
 
-from netaudio.dante2.application import DanteApplication
+from netaudio.utils.daemon import daemon_command, dante_application
 from netaudio.utils.json_encoder import dump_json_formatted
 
 
+@daemon_command("device list")
 def device_list(
     # ~ name: str = None,
     # ~ host: str = None,
     # ~ interfaces: list[str] = None,
     json: bool = False,
+    timeout: float = 10.0,
+    cache: bool = False,
 ) -> None:
     """
     List devices discovered on the network.
     """
     # TODO: implement remaining parameters above
-    app = DanteApplication()
-    app.startup()
-    time.sleep(1)
-    try:
-
+    with dante_application(timeout, cache) as app:
         if json:
             print(dump_json_formatted(app.devices))
 
@@ -30,8 +27,3 @@ def device_list(
                 rx_count = colored(len(device.rx_channels), 'blue', attrs=['bold'])
                 tx_count = colored(len(device.tx_channels), 'cyan', attrs=['bold'])
                 print(f"{name} ({tx_count} x {rx_count})")
-
-    except Exception as exception:
-        raise exception
-    finally:
-        app.shutdown()
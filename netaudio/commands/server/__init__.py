@@ -1,3 +1,4 @@
+from .daemon import run_daemon
 from .http import run_server as http_run_server
 # from .mdns import run_server as mdns_run_server
 
@@ -6,5 +7,6 @@ class ServerCommands(object):
     Server methods
     """
     def __init__(self):
+        self.daemon = run_daemon
         self.http = http_run_server
         # self.mdns = mdns_run_server
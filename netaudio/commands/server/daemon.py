@@ -0,0 +1,95 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import socketserver
+import threading
+
+from netaudio.dante2.application import DanteApplication
+from netaudio.dante2.cache import DanteDeviceCache
+from netaudio.utils import daemon
+
+logger = logging.getLogger(__name__)
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Runs one command per connection. The request is a line of JSON naming the command and its
+    arguments; the reply is a line of JSON holding what the command printed, and any error.
+    """
+
+    # Commands print their results, so can't run concurrently whilst stdout is redirected
+    lock = threading.Lock()
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            command = daemon.COMMANDS[request["command"]]
+        except (ValueError, KeyError) as error:
+            self._reply("", f"Invalid request: {error}")
+            return
+
+        output = io.StringIO()
+        error = None
+        with self.lock, contextlib.redirect_stdout(output):
+            try:
+                command(**request["kwargs"])
+            except Exception as exception:
+                logger.exception("Command %s failed", request["command"])
+                error = f"{type(exception).__name__}: {exception}"
+        self._reply(output.getvalue(), error)
+
+    def _reply(self, output: str, error: str | None) -> None:
+        self.wfile.write(json.dumps({"output": output, "error": error}).encode() + b"\n")
+
+
+def _register_commands() -> None:
+    # Importing the commands registers them with the daemon
+    # pylint: disable=import-outside-toplevel,unused-import
+    import netaudio.commands.channel
+    import netaudio.commands.device
+    import netaudio.commands.subscription
+
+
+def _listen(socket_path: str) -> socketserver.UnixStreamServer:
+    """
+    Listen on `socket_path`, which only this user may connect to (from the moment it exists, so
+    nobody else can slip in a command)
+    """
+    umask = os.umask(0o077)
+    try:
+        return socketserver.UnixStreamServer(socket_path, DaemonRequestHandler)
+    finally:
+        os.umask(umask)
+
+
+def run_daemon(socket_path: str = None, timeout: float = 10.0, cache: bool = False):
+    """
+    Run a control daemon, so that other netaudio commands needn't each rediscover the network
+    """
+    _register_commands()
+    if not daemon.is_supported():
+        raise SystemExit("The daemon needs Unix-domain sockets, which this platform lacks")
+    socket_path = socket_path or daemon.default_socket_path()
+    if os.path.exists(socket_path):
+        # Any reply at all means another daemon is listening
+        if daemon.request("ping", {}, socket_path) is not None:
+            raise SystemExit(f"A daemon is already listening on {socket_path}")
+        os.unlink(socket_path)
+
+    app = DanteApplication(cache=DanteDeviceCache() if cache else None)
+    app.startup()
+    try:
+        app.wait_until_settled(timeout)
+        daemon.set_daemon_application(app)
+
+        with _listen(socket_path) as server:
+            print(f"Listening on {socket_path}")
+            try:
+                server.serve_forever()
+            finally:
+                os.unlink(socket_path)
+    finally:
+        daemon.set_daemon_application(None)
+        app.shutdown()
@@ -1,16 +1,59 @@
+import asyncio
+import contextlib
+import inspect
 import json
 import uvicorn
 
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from netaudio.dante2 import metrics
+from netaudio.dante2.application import DanteApplication
+from netaudio.dante2.channel import DanteChannelType
+from netaudio.dante2.routing import DanteRoute, apply_routes
+from netaudio.dante2.state_feed import DanteStateFeed
+from netaudio.dante2.util import Encoding, SampleRate
 from netaudio.utils.cli import FireTyped
-from netaudio.dante.browser import DanteBrowser
+from netaudio.dante.device import DEFAULT_BEGIN_CONCURRENCY
+from netaudio.dante.model import DanteNetworkModel
 import logging
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-dante_browser = DanteBrowser(mdns_timeout=1.5)
+# How often to send something down an otherwise idle event stream, so proxies don't drop it
+EVENTS_KEEPALIVE_INTERVAL = 15.0
+
+stream_events = True
+# Whilst streaming events, a long-running application, which every endpoint is served from, and the
+# feed of its changes
+dante_application: DanteApplication | None = None
+state_feed: DanteStateFeed | None = None
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global dante_application, state_feed
+    if stream_events:
+        dante_application = DanteApplication()
+        dante_application.startup()
+        state_feed = DanteStateFeed(dante_application, metering=True)
+    else:
+        # The application binds the Dante services' ports, so can't run alongside another (such as
+        # `netaudio server daemon`) on the same host; run without events, the legacy model (which
+        # makes do with ephemeral ports) serves the endpoints instead
+        network_model.start()
+    try:
+        yield
+    finally:
+        await network_model.stop()
+        if dante_application:
+            dante_application.call(state_feed.stop)
+            dante_application.shutdown()
+            dante_application = state_feed = None
+
+
+app = FastAPI(lifespan=lifespan)
+network_model = DanteNetworkModel()
 
 origins = [
     "http://192.168.1.107:3002",
@@ -24,20 +67,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-async def device_list():
-    devices = await dante_browser.get_devices()
+async def _call(func, *args):
+    """
+    Run `func` on the application's service loop, and return its result (awaiting it, should it be
+    awaitable); as `DanteApplication.call()` does, but without blocking this loop meanwhile.
+    """
+    async def _invoke():
+        result = func(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    return await asyncio.wrap_future(dante_application.service_loop.run_coroutine(_invoke()))
 
-    for _, device in devices.items():
-        await device.begin()
 
-    devices = dict(sorted(devices.items(), key=lambda x: x[1].name))
-    return devices
+def _device_json(device) -> dict:
+    return {
+        **device.json(),
+        "rx_channels": [channel.json() for channel in device.rx_channels],
+        "tx_channels": [channel.json() for channel in device.tx_channels],
+    }
+
+
+def _get_devices() -> dict:
+    return {
+        device.server_name: _device_json(device)
+        for device in sorted(dante_application.devices, key=lambda device: device.name or "")
+        if device.server_name
+    }
 
 
 @app.get("/devices")
 async def list_devices():
     try:
-        devices = await device_list()
+        if dante_application:
+            return await _call(_get_devices)
+        devices = await network_model.get_devices()
         return json.loads(json.dumps(devices, indent=2))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -60,10 +125,15 @@ async def subscribe_device(
         tx_device_name,
         tx_channel_name,
     )
-    dante_devices = await dante_browser.get_devices()
+    if dante_application:
+        [result] = await _call(apply_routes, dante_application, [
+            DanteRoute(rx_device_name, rx_channel_name, tx_device_name, tx_channel_name),
+        ])
+        if result.error:
+            raise HTTPException(status_code=404 if result.error.startswith("No ") else 500, detail=result.error)
+        return {}
 
-    for _, device in dante_devices.items():
-        await device.begin()
+    dante_devices = await network_model.get_devices()
 
     rx_channel = None
     rx_device = None
@@ -99,29 +169,108 @@ async def subscribe_device(
 
     if rx_channel and rx_device and tx_channel and tx_channel:
         await rx_device.add_subscription(rx_channel, tx_channel, tx_device)
+        await network_model.refresh_device(rx_device)
     else:
         raise HTTPException(status_code=404, detail="Device or Channel not found")
     return {}
 
 
+@app.post("/routes")
+async def apply_route_list(payload: list[dict] = Body(...)):
+    """
+    Subscribe many RX channels at once. Each route has `rx_device`, `rx_channel`, `tx_device` and
+    `tx_channel` (the latter two omitted to unsubscribe). Returns a result per route.
+    """
+    if dante_application is None:
+        raise HTTPException(status_code=503, detail="Routing requires the server to be run with events")
+    try:
+        routes = [DanteRoute.from_dict(route) for route in payload]
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=f"Route missing {e}")
+
+    results = await _call(apply_routes, dante_application, routes)
+    return [result.json() for result in results]
+
+
 @app.post("/devices/{device_name}/rx_name/{rx_number}")
 async def name_rx_device(device_name: str, rx_number: int, payload: dict = Body(...)):
     name = payload["name"]
-    devices = await device_list()
-    device = next((d for d in devices.values() if d.name == device_name), None)
+    if dante_application:
+        await _call(_rename_rx_channel, device_name, rx_number, name)
+        return {}
+
+    device = await network_model.get_device(device_name)
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
     try:
         await device.set_channel_name("rx", rx_number, name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    await network_model.refresh_device(device)
     return {}
 
 
+def _get_device(device_name: str):
+    device = dante_application.get_device_by_name(device_name)
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
+    return device
+
+
+async def _rename_rx_channel(device_name: str, rx_number: int, name: str) -> None:
+    channel = _get_device(device_name).get_channel_by_number(DanteChannelType.RX, rx_number)
+    if not channel:
+        raise HTTPException(status_code=404, detail="Channel not found")
+    try:
+        future = channel.set_name(name)
+        if future:
+            await future
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _configure(device_name: str, payload: dict) -> dict:
+    device = _get_device(device_name)
+    settings = dante_application.settings_service
+    try:
+        if "reset_device_name" in payload:
+            await device.reset_name()
+
+        if "device_name" in payload:
+            await device.set_name(payload["device_name"])
+
+        if "identify" in payload and payload["identify"]:
+            settings.trigger_identify(device)
+
+        if "sample_rate" in payload:
+            settings.set_sample_rate(device, SampleRate(payload["sample_rate"]))
+
+        if "encoding" in payload:
+            settings.set_encoding(device, Encoding(payload["encoding"]))
+
+        if all(k in payload for k in ["gain_level", "channel_number", "channel_type"]):
+            settings.set_gain_level(
+                device,
+                DanteChannelType(payload["channel_type"]),
+                payload["channel_number"],
+                payload["gain_level"],
+            )
+
+        if "aes67" in payload:
+            settings.set_aes67(device, payload["aes67"])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return _device_json(device)
+
+
 @app.post("/devices/{device_name}/configure")
 async def configure_device(device_name: str, payload: dict = Body(...)):
-    devices = await device_list()
-    device = next((d for d in devices.values() if d.name == device_name), None)
+    if dante_application:
+        return await _call(_configure, device_name, payload)
+
+    device = await network_model.get_device(device_name)
 
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -149,11 +298,65 @@ async def configure_device(device_name: str, payload: dict = Body(...)):
     if "aes67" in payload:
         await device.enable_aes67(payload["aes67"])
 
+    device = await network_model.refresh_device(device)
     return json.loads(json.dumps(device, indent=2))
 
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/events")
+async def get_events():
+    """
+    Server-sent events: the state of every device and channel, then changes to them (and levels)
+    as they happen. See `DanteStateFeed` for what's sent.
+    """
+    if state_feed is None:
+        raise HTTPException(status_code=503, detail="Event streaming is not enabled")
+    feed = state_feed
+    client = feed.connect()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    changes = await asyncio.wait_for(client.get(), EVENTS_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if changes is None:
+                    # Fell too far behind; the client must reconnect
+                    return
+                yield "".join(
+                    f"event: {change['event']}\ndata: {json.dumps(change)}\n\n" for change in changes
+                )
+        finally:
+            feed.disconnect(client)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
 @FireTyped
-def run_server():
+def run_server(
+    concurrency:int=DEFAULT_BEGIN_CONCURRENCY,
+    events:bool=True,
+    max_age:float=DanteNetworkModel.MAX_AGE,
+    refresh_interval:float=DanteNetworkModel.REFRESH_INTERVAL,
+):
     """
     Run a control HTTP Server
+
+    With `events` (as by default), endpoints are served from an application kept running, that
+    keeps itself up to date. Without, devices are refreshed in the background every
+    `refresh_interval` seconds (whilst requests keep coming), and requests wait for them to be
+    refreshed should they be older than `max_age` seconds.
     """
+    global stream_events
+    network_model.concurrency = concurrency
+    network_model.max_age = max_age
+    network_model.refresh_interval = refresh_interval
+    stream_events = events
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
@@ -1,10 +1,8 @@
 import asyncio
-import json
-import os
+from collections import Counter
 import random
 import socket
 import struct
-import sys
 import time
 import traceback
 
@@ -15,9 +13,6 @@ from queue import Queue
 from threading import Thread, Event
 from typing import List
 
-# from redis import Redis
-# from redis.exceptions import ConnectionError as RedisConnectionError
-
 from netaudio.dante.browser import DanteBrowser
 
 from netaudio.dante.const import (
@@ -38,7 +33,6 @@ from netaudio.dante.const import (
     MESSAGE_TYPE_INTERFACE_STATUS,
     MESSAGE_TYPE_LOCK_STATUS,
     MESSAGE_TYPE_MANF_VERSIONS_STATUS,
-    MESSAGE_TYPE_MONITORING_STRINGS,
     MESSAGE_TYPE_NAME_QUERY,
     MESSAGE_TYPE_PROPERTY_CHANGE,
     MESSAGE_TYPE_ROUTING_DEVICE_CHANGE,
@@ -48,7 +42,6 @@ from netaudio.dante.const import (
     MESSAGE_TYPE_RX_FLOW_CHANGE,
     MESSAGE_TYPE_SAMPLE_RATE_PULLUP_STATUS,
     MESSAGE_TYPE_SAMPLE_RATE_STATUS,
-    MESSAGE_TYPE_STRINGS,
     MESSAGE_TYPE_SWITCH_VLAN_STATUS,
     MESSAGE_TYPE_TX_CHANNEL_FRIENDLY_NAMES_QUERY,
     MESSAGE_TYPE_TX_CHANNEL_QUERY,
@@ -56,7 +49,6 @@ from netaudio.dante.const import (
     MESSAGE_TYPE_UNICAST_CLOCKING_STATUS,
     MESSAGE_TYPE_UPGRADE_STATUS,
     MESSAGE_TYPE_VERSIONS_STATUS,
-    MESSAGE_TYPE_VOLUME_LEVELS,
     MULTICAST_GROUP_CONTROL_MONITORING,
     MULTICAST_GROUP_HEARTBEAT,
     PORTS,
@@ -65,40 +57,17 @@ from netaudio.dante.const import (
     SUBSCRIPTION_STATUS_NONE,
 )
 
-from netaudio.utils.json_encoder import dump_json_formatted
 from netaudio.utils.cli import FireTyped
+from netaudio.utils.state_store import JSONFileStatePersistence, StateStore
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 sockets = {}
-redis_client = None
-
-redis_socket_path = os.environ.get("REDIS_SOCKET")
-redis_host = os.environ.get("REDIS_HOST") or "localhost"
-redis_port = os.environ.get("REDIS_PORT") or 6379
-redis_db = os.environ.get("REDIS_DB") or 0
-
-try:
-    if redis_socket_path:
-        redis_client = Redis(
-            db=redis_db,
-            decode_responses=False,
-            socket_timeout=0.1,
-            unix_socket_path=redis_socket_path,
-        )
-    elif os.environ.get("REDIS_PORT") or os.environ.get("REDIS_HOST"):
-        redis_client = Redis(
-            db=redis_db,
-            decode_responses=False,
-            host=redis_host,
-            socket_timeout=0.1,
-            port=redis_port,
-        )
-    if redis_client:
-        redis_client.ping()
-except RedisConnectionError:
-    redis_client = None
+state = StateStore()
+
+# How long a device, host or server is remembered after its last heartbeat
+HEARTBEAT_TTL = 5
 
 
 def get_name_lengths(device_name):
@@ -135,23 +104,18 @@ def volume_level_query(device_name, ipv4, mac, port, timeout=True):
     return bytes.fromhex(message_hex)
 
 
-def parse_volume_level_status(message, server_name):
-    redis_device_key = ":".join(["netaudio", "dante", "device", server_name])
-    cached_device = redis_decode(redis_client.hgetall(redis_device_key))
+def parse_volume_level_status(dante_message, server_name):
+    device_key = ":".join(["netaudio", "dante", "device", server_name])
     volume_levels = {"rx": {}, "tx": {}}
-    rx_channel_count_raw = tx_channel_count_raw = None
-
-    if "rx_channel_count" in cached_device:
-        rx_channel_count_raw = int(cached_device["rx_channel_count"])
-
-    if "tx_channel_count" in cached_device:
-        tx_channel_count_raw = int(cached_device["tx_channel_count"])
+    rx_channel_count_raw = state.get_field(device_key, "rx_channel_count")
+    tx_channel_count_raw = state.get_field(device_key, "tx_channel_count")
 
     if not rx_channel_count_raw and not tx_channel_count_raw:
         print(f"Need channel counts to parse this request for {server_name}")
         return volume_levels
 
-    dante_message = bytes.fromhex(message["message_hex"])
+    rx_channel_count_raw = int(rx_channel_count_raw)
+    tx_channel_count_raw = int(tx_channel_count_raw)
     rx_channels = dante_message[-1 - rx_channel_count_raw : -1]
     tx_channels = dante_message[
         -1 - rx_channel_count_raw - tx_channel_count_raw : -1 - rx_channel_count_raw
@@ -214,9 +178,13 @@ def parse_message_type_interface_status(message):
     return {"interface_status": None}
 
 
+def decode_string_at(message, offset):
+    return bytes(message[offset:]).partition(b"\x00")[0].decode("utf-8")
+
+
 def parse_message_type_versions_status(message):
-    model = message[88:].partition(b"\x00")[0].decode("utf-8")
-    model_id = message[43:].partition(b"\x00")[0].decode("utf-8").replace("\u0003", "")
+    model = decode_string_at(message, 88)
+    model_id = decode_string_at(message, 43).replace("\u0003", "")
 
     return {
         "model": model,
@@ -225,8 +193,8 @@ def parse_message_type_versions_status(message):
 
 
 def parse_message_type_manf_versions_status(message):
-    manufacturer = message[76:].partition(b"\x00")[0].decode("utf-8")
-    model = message[204:].partition(b"\x00")[0].decode("utf-8")
+    manufacturer = decode_string_at(message, 76)
+    model = decode_string_at(message, 204)
 
     return {
         "manufacturer": manufacturer,
@@ -254,467 +222,130 @@ def parse_message_type_unicast_clocking_status(message):
     return {"unicast_clocking_status": None}
 
 
-def cache_device_value_json(server_name, key, value):
-    redis_device_key = ":".join(["netaudio", "dante", "device", server_name])
-    redis_client.hset(
-        redis_device_key,
-        key=None,
-        value=None,
-        mapping={
-            key: dump_json_formatted(value),
-        },
+def cache_device_value(server_name, key, value):
+    device_key = ":".join(["netaudio", "dante", "device", server_name])
+    state.update(device_key, {key: value})
+
+
+# Handlers of multicast messages, keyed by (multicast group, port, message type). Each is called
+# with the message (a memoryview, only valid for the duration of the call), the server name of the
+# device it's from, and the port it was sent from; and returns what it parsed, if anything.
+MESSAGE_HANDLERS = {}
+
+# Handlers of every message to a (multicast group, port) not handled by type, such as metering
+PORT_HANDLERS = {}
+
+# Messages that were not handled, by (multicast group, port, message type)
+unhandled_messages = Counter()
+
+# Messages from hosts whose server name isn't (yet) known, by host
+messages_from_unknown_hosts = Counter()
+
+
+def message_handler(group, port, *message_types):
+    def register(handler):
+        for message_type in message_types:
+            MESSAGE_HANDLERS[(group, port, message_type)] = handler
+        return handler
+
+    return register
+
+
+def status_handler(parser, key=None):
+    """A handler that parses a status message and caches the status with its device."""
+
+    def handle(message, server_name, src_port):
+        parsed = parser(message)
+        if key:
+            cache_device_value(server_name, key, parsed[key])
+        return parsed
+
+    return handle
+
+
+for message_type, parser, key in (
+    (MESSAGE_TYPE_AUDIO_INTERFACE_STATUS, parse_message_type_audio_interface_status, None),
+    (MESSAGE_TYPE_ACCESS_STATUS, parse_message_type_access_status, None),
+    (MESSAGE_TYPE_ROUTING_READY, parse_message_type_routing_ready, None),
+    (MESSAGE_TYPE_TX_FLOW_CHANGE, parse_message_type_tx_flow_change, None),
+    (MESSAGE_TYPE_UNICAST_CLOCKING_STATUS, parse_message_type_unicast_clocking_status, None),
+    (MESSAGE_TYPE_IFSTATS_STATUS, parse_message_type_ifstats_status, None),
+    (MESSAGE_TYPE_VERSIONS_STATUS, parse_message_type_versions_status, None),
+    (MESSAGE_TYPE_MANF_VERSIONS_STATUS, parse_message_type_manf_versions_status, None),
+    (MESSAGE_TYPE_SAMPLE_RATE_PULLUP_STATUS, parse_message_type_sample_rate_pullup_status, "sample_rate_pullup_status"),
+    (MESSAGE_TYPE_ENCODING_STATUS, parse_message_type_encoding_status, "encoding_status"),
+    (MESSAGE_TYPE_CLEAR_CONFIG_STATUS, parse_message_type_clear_config_status, "clear_config_status"),
+    (MESSAGE_TYPE_SAMPLE_RATE_STATUS, parse_message_type_sample_rate_status, "sample_rate_status"),
+    (MESSAGE_TYPE_SWITCH_VLAN_STATUS, parse_message_type_switch_vlan_status, "switch_vlan_status"),
+    (MESSAGE_TYPE_UPGRADE_STATUS, parse_message_type_upgrade_status, "upgrade_status"),
+    (MESSAGE_TYPE_INTERFACE_STATUS, parse_message_type_interface_status, "interface_status"),
+    (MESSAGE_TYPE_CLOCKING_STATUS, parse_message_type_clocking_status, "clocking_status"),
+    (MESSAGE_TYPE_LOCK_STATUS, parse_message_type_lock_status, "lock_status"),
+    (MESSAGE_TYPE_CODEC_STATUS, parse_message_type_codec_status, "codec_status"),
+    (MESSAGE_TYPE_AES67_STATUS, parse_message_type_aes67_status, "aes67_status"),
+):
+    message_handler(MULTICAST_GROUP_CONTROL_MONITORING, DEVICE_INFO_PORT, message_type)(
+        status_handler(parser, key)
     )
 
 
-def cache_device_value(server_name, key, value):
-    redis_device_key = ":".join(["netaudio", "dante", "device", server_name])
-    redis_client.hset(
-        redis_device_key,
-        key=None,
-        value=None,
-        mapping={
-            key: value,
-        },
-    )
+@message_handler(MULTICAST_GROUP_CONTROL_MONITORING, DEVICE_INFO_PORT, MESSAGE_TYPE_PROPERTY_CHANGE)
+@message_handler(MULTICAST_GROUP_CONTROL_MONITORING, DEFAULT_MULTICAST_METERING_PORT, MESSAGE_TYPE_PROPERTY_CHANGE)
+def handle_property_change(message, server_name, src_port):
+    return {}
 
 
-def redis_decode(cached_dict):
-    return {
-        key.decode("utf-8"): value.decode("utf-8") for key, value in cached_dict.items()
-    }
+@message_handler(
+    MULTICAST_GROUP_CONTROL_MONITORING,
+    DEVICE_INFO_PORT,
+    MESSAGE_TYPE_ROUTING_DEVICE_CHANGE,
+    MESSAGE_TYPE_RX_CHANNEL_CHANGE,
+    MESSAGE_TYPE_RX_FLOW_CHANGE,
+)
+def handle_rx_change(message, server_name, src_port):
+    if src_port not in (DEVICE_SETTINGS_PORT, DEVICE_INFO_SRC_PORT2):
+        return None
 
+    print("Rx change for", server_name, int.from_bytes(message[26:28], "big"))
+    parsed_rx_channels = get_rx_channels(server_name)
+    cache_device_value(server_name, "rx_channels", parsed_rx_channels["rx_channels"])
+    cache_device_value(server_name, "subscriptions", parsed_rx_channels["subscriptions"])
+    return {}
 
-def parse_dante_message(message):
-    dante_message = bytes.fromhex(message["message_hex"])
-    parsed_dante_message = {}
 
-    src_host = message["src_host"]
-    src_port = message["src_port"]
-    timestamp = message["time"]
-    server_name = None
+def handle_volume_levels(message, server_name, src_port):
+    volume_levels = parse_volume_level_status(message, server_name)
+    cache_device_value(server_name, "rx_volume_levels", volume_levels["rx"])
+    cache_device_value(server_name, "tx_volume_levels", volume_levels["tx"])
+    return volume_levels
+
 
-    if "multicast_group" in message:
-        multicast_group = message["multicast_group"]
+PORT_HANDLERS[(MULTICAST_GROUP_CONTROL_MONITORING, DEFAULT_MULTICAST_METERING_PORT)] = handle_volume_levels
 
-    if "multicast_port" in message:
-        multicast_port = message["multicast_port"]
 
+def parse_dante_message(dante_message, src_host, src_port, multicast_group, multicast_port):
+    """
+    Handle a message received on a multicast group, returning what was parsed from it (or None, if
+    it went unhandled).
+    """
     message_type = int.from_bytes(dante_message[26:28], "big")
-
-    cached_host = redis_decode(
-        redis_client.hgetall(":".join(["netaudio", "dante", "host", src_host]))
-    )
+    server_name = state.get_field(f"netaudio:dante:host:{src_host}", "server_name")
 
     # Message was not parsed: 192.168.1.37:1064 -> 224.0.0.231:8702 type `224` (Metering Status) from `AD4D-fd4e13.local.`
 
-    parsed_message = {
-        "message": dante_message,
-        "message_type": str(message_type),
-        "parsed_message": parsed_dante_message,
-        "src_host": src_host,
-        "src_port": src_port,
-        "time": timestamp,
-    }
+    if not server_name:
+        messages_from_unknown_hosts[src_host] += 1
+        return None
 
-    parsed_message_redis_hash = {
-        "message": dante_message,
-        "message_type": str(message_type),
-        "src_host": src_host,
-        "src_port": src_port,
-        "time": timestamp,
-    }
+    handler = MESSAGE_HANDLERS.get((multicast_group, multicast_port, message_type))
+    if handler is None:
+        handler = PORT_HANDLERS.get((multicast_group, multicast_port))
 
-    if "server_name" in cached_host:
-        server_name = cached_host["server_name"]
-    else:
-        parsed_message["error"] = "Could not find server name for cached host"
-        print(parsed_message["error"])
-        return parsed_message
-
-    if (
-        message_type == MESSAGE_TYPE_AUDIO_INTERFACE_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        parsed_dante_message = parse_message_type_audio_interface_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-    elif (
-        message_type == MESSAGE_TYPE_ACCESS_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        access_status = parse_message_type_access_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-    elif (
-        message_type == MESSAGE_TYPE_ROUTING_READY
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        parsed_dante_message = parse_message_type_routing_ready(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-    elif (
-        message_type == MESSAGE_TYPE_TX_FLOW_CHANGE
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        parsed_dante_message = parse_message_type_tx_flow_change(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-
-    elif (
-        message_type == MESSAGE_TYPE_UNICAST_CLOCKING_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        parsed_dante_message = parse_message_type_unicast_clocking_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-    elif (
-        message_type == MESSAGE_TYPE_IFSTATS_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        parsed_dante_message = parse_message_type_ifstats_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-    elif (
-        message_type == MESSAGE_TYPE_VERSIONS_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        parsed_dante_message = parse_message_type_versions_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-    elif (
-        message_type == MESSAGE_TYPE_MANF_VERSIONS_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        parsed_dante_message = parse_message_type_manf_versions_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-    elif message_type == MESSAGE_TYPE_PROPERTY_CHANGE:
-        pass
-    elif (
-        multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEFAULT_MULTICAST_METERING_PORT
-    ):
-        volume_levels = parse_volume_level_status(message, server_name)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_MONITORING_STRINGS[MESSAGE_TYPE_VOLUME_LEVELS]
+    parsed = handler(dante_message, server_name, src_port) if handler else None
+    if parsed is None:
+        unhandled_messages[(multicast_group, multicast_port, message_type)] += 1
 
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} ({MESSAGE_TYPE_MONITORING_STRINGS[MESSAGE_TYPE_VOLUME_LEVELS]}) from `{server_name}`"
-        # )
-        cache_device_value_json(server_name, "rx_volume_levels", volume_levels["rx"])
-        cache_device_value_json(server_name, "tx_volume_levels", volume_levels["tx"])
-    elif (
-        message_type == MESSAGE_TYPE_SAMPLE_RATE_PULLUP_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        sample_rate_pullup_status = parse_message_type_sample_rate_pullup_status(
-            dante_message
-        )
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        # print(sample_rate_pullup_status)
-        cache_device_value_json(
-            server_name,
-            "sample_rate_pullup_status",
-            sample_rate_pullup_status["sample_rate_pullup_status"],
-        )
-    elif (
-        message_type == MESSAGE_TYPE_ENCODING_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        encoding_status = parse_message_type_encoding_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        # print(encoding_status)
-        cache_device_value_json(
-            server_name, "encoding_status", encoding_status["encoding_status"]
-        )
-    elif (
-        message_type == MESSAGE_TYPE_CLEAR_CONFIG_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        clear_config_status = parse_message_type_clear_config_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        # print(clear_config_status)
-        cache_device_value_json(
-            server_name,
-            "clear_config_status",
-            clear_config_status["clear_config_status"],
-        )
-    elif (
-        message_type == MESSAGE_TYPE_SAMPLE_RATE_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        sample_rate_status = parse_message_type_sample_rate_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        # print(sample_rate_status)
-        cache_device_value_json(
-            server_name, "sample_rate_status", sample_rate_status["sample_rate_status"]
-        )
-    elif (
-        message_type == MESSAGE_TYPE_SWITCH_VLAN_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        switch_vlan_status = parse_message_type_switch_vlan_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        # print(switch_vlan_status)
-        cache_device_value_json(
-            server_name, "switch_vlan_status", switch_vlan_status["switch_vlan_status"]
-        )
-    elif (
-        message_type == MESSAGE_TYPE_UPGRADE_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        upgrade_status = parse_message_type_upgrade_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        # print(upgrade_status)
-        cache_device_value_json(
-            server_name, "upgrade_status", upgrade_status["upgrade_status"]
-        )
-    elif (
-        message_type == MESSAGE_TYPE_INTERFACE_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        interface_status = parse_message_type_interface_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        # print(interface_status)
-        cache_device_value_json(
-            server_name, "interface_status", interface_status["interface_status"]
-        )
-    elif (
-        message_type == MESSAGE_TYPE_CLOCKING_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        clocking_status = parse_message_type_clocking_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        cache_device_value_json(
-            server_name, "clocking_status", clocking_status["clocking_status"]
-        )
-    elif (
-        multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and src_port in [DEVICE_SETTINGS_PORT, DEVICE_INFO_SRC_PORT2]
-        and message_type
-        in [
-            MESSAGE_TYPE_ROUTING_DEVICE_CHANGE,
-            MESSAGE_TYPE_RX_CHANNEL_CHANGE,
-            MESSAGE_TYPE_RX_FLOW_CHANGE,
-        ]
-    ):
-        print("Rx change for", server_name, message_type)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        parsed_rx_channels = get_rx_channels(server_name)
-        cache_device_value_json(
-            server_name, "rx_channels", parsed_rx_channels["rx_channels"]
-        )
-        cache_device_value_json(
-            server_name, "subscriptions", parsed_rx_channels["subscriptions"]
-        )
-    elif (
-        message_type == MESSAGE_TYPE_LOCK_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        lock_status = parse_message_type_lock_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        cache_device_value_json(server_name, "lock_status", lock_status["lock_status"])
-    elif (
-        message_type == MESSAGE_TYPE_CODEC_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        codec_status = parse_message_type_codec_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        cache_device_value_json(
-            server_name, "codec_status", codec_status["codec_status"]
-        )
-    elif (
-        message_type == MESSAGE_TYPE_AES67_STATUS
-        and multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and multicast_port == DEVICE_INFO_PORT
-    ):
-        aes67_status = parse_message_type_aes67_status(dante_message)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        # print(
-        #     f"{src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({MESSAGE_TYPE_STRINGS[message_type]}) from `{server_name}`"
-        # )
-        cache_device_value_json(
-            server_name, "aes67_status", aes67_status["aes67_status"]
-        )
-    elif (
-        multicast_group == MULTICAST_GROUP_CONTROL_MONITORING
-        and src_port in [DEVICE_SETTINGS_PORT, DEVICE_INFO_SRC_PORT2]
-        and message_type
-        in [
-            MESSAGE_TYPE_ROUTING_DEVICE_CHANGE,
-            MESSAGE_TYPE_RX_CHANNEL_CHANGE,
-            MESSAGE_TYPE_RX_FLOW_CHANGE,
-        ]
-    ):
-        print("Rx change for", server_name, message_type)
-        parsed_message_redis_hash["message_type_string"] = parsed_message[
-            "message_type_string"
-        ] = MESSAGE_TYPE_STRINGS[message_type]
-        parsed_rx_channels = get_rx_channels(server_name)
-        cache_device_value_json(
-            server_name, "rx_channels", parsed_rx_channels["rx_channels"]
-        )
-        cache_device_value_json(
-            server_name, "subscriptions", parsed_rx_channels["subscriptions"]
-        )
-    else:
-        if message_type in MESSAGE_TYPE_STRINGS:
-            parsed_message_redis_hash["message_type_string"] = parsed_message[
-                "message_type_string"
-            ] = MESSAGE_TYPE_STRINGS[message_type]
-        else:
-            # print(f"Unknown message type: {message_type} from `{server_name}`")
-            parsed_message_redis_hash["message_type_string"] = parsed_message[
-                "message_type_string"
-            ] = "Unknown"
-
-        # print(
-        #     f"Message was not parsed: {src_host}:{src_port} -> {multicast_group}:{multicast_port} type `{message_type}` ({parsed_message['message_type_string']}) from `{server_name}`"
-        # )
-
-    # if parsed_dante_message:
-    #     redis_device_key = ":".join(["netaudio", "dante", "device", server_name])
-    #     for key in parsed_dante_message.items():
-    #         print(
-    #             {
-    #                 key: dump_json_formatted(parsed_dante_message),
-    #             }
-    #         )
-    #         redis_client.hset(
-    #             redis_device_key,
-    #             key=None,
-    #             value=None,
-    #             mapping={
-    #                 key: dump_json_formatted(parsed_dante_message[key]),
-    #             },
-    #         )
-
-    parsed_message["parsed_message"] = parsed_dante_message
-    parsed_message_redis_hash["parsed_message"] = dump_json_formatted(
-        parsed_dante_message
-    )
-
-    if multicast_group:
-        parsed_message["multicast_group"] = parsed_message_redis_hash[
-            "multicast_group"
-        ] = multicast_group
-
-    if multicast_port:
-        parsed_message["multicast_port"] = parsed_message_redis_hash[
-            "multicast_port"
-        ] = multicast_port
-
-    # redis_message_key = ":".join(
-    #     ["netaudio", "dante", "device", "message", "received", src_host, str(timestamp)]
-    # )
-    # redis_client.hset(
-    #     redis_message_key,
-    #     key=None,
-    #     value=None,
-    #     mapping=parsed_message_redis_hash,
-    # )
-
-    # if parsed_message["parsed_message"]:
-    #     print(parsed_message["parsed_message"])
-
-    # cached_message = redis_client.hgetall(redis_message_key)
-    # cached_device = redis_client.hgetall(redis_device_key)
-    # print("cached device:", cached_device)
-    # print("cached:", cached_message)
-    #
-    # if multicast_group and multicast_port
-    #     print(
-    #         f"{src_host}:{src_port} -> {multicast_group}:{multicast_port}\n  {MESSAGE_TYPE_STRINGS[message_type]}\n  {dante_message.hex()}"
-    #     )
-
-    return parsed_message
+    return parsed
 
 
 def message_channel_counts_query():
@@ -978,16 +609,16 @@ def get_tx_channels(server_name):
     tx_channels = {}
     # tx_channels_friendly_names = {}
 
-    redis_service_key = ":".join(
+    service_key = ":".join(
         ["netaudio", "dante", "service", server_name, SERVICE_ARC]
     )
-    cached_service = redis_decode(redis_client.hgetall(redis_service_key))
+    cached_service = state.get(service_key)
     port = int(cached_service["port"])
     sock = sockets[server_name][port]
 
-    redis_device_key = ":".join(["netaudio", "dante", "device", server_name])
+    device_key = ":".join(["netaudio", "dante", "device", server_name])
 
-    cached_device = redis_decode(redis_client.hgetall(redis_device_key))
+    cached_device = state.get(device_key)
 
     if "tx_channel_count" in cached_device:
         tx_count = int(cached_device["tx_channel_count"])
@@ -1030,16 +661,16 @@ def get_rx_channels(server_name):
     rx_channels = {}
     subscriptions = {}
 
-    redis_service_key = ":".join(
+    service_key = ":".join(
         ["netaudio", "dante", "service", server_name, SERVICE_ARC]
     )
-    cached_service = redis_decode(redis_client.hgetall(redis_service_key))
+    cached_service = state.get(service_key)
     port = int(cached_service["port"])
     sock = sockets[server_name][port]
 
-    redis_device_key = ":".join(["netaudio", "dante", "device", server_name])
+    device_key = ":".join(["netaudio", "dante", "device", server_name])
 
-    cached_device = redis_decode(redis_client.hgetall(redis_device_key))
+    cached_device = state.get(device_key)
 
     if "rx_channel_count" in cached_device:
         rx_count = int(cached_device["rx_channel_count"])
@@ -1067,10 +698,10 @@ def get_rx_channels(server_name):
 
 
 def device_initialize_arc(server_name):
-    redis_service_key = ":".join(
+    service_key = ":".join(
         ["netaudio", "dante", "service", server_name, SERVICE_ARC]
     )
-    cached_service = redis_decode(redis_client.hgetall(redis_service_key))
+    cached_service = state.get(service_key)
     port = int(cached_service["port"])
 
     try:
@@ -1080,12 +711,10 @@ def device_initialize_arc(server_name):
         parsed_name_query = parse_dante_arc_message(device_name_message)
         device_name = parsed_name_query["name"]
 
-        redis_device_key = ":".join(["netaudio", "dante", "device", server_name])
-        redis_client.hset(
-            redis_device_key,
-            key=None,
-            value=None,
-            mapping={
+        device_key = ":".join(["netaudio", "dante", "device", server_name])
+        state.update(
+            device_key,
+            {
                 "name": device_name,
             },
         )
@@ -1096,44 +725,40 @@ def device_initialize_arc(server_name):
         rx_count = parsed_channel_count_query["rx_channel_count"]
         tx_count = parsed_channel_count_query["tx_channel_count"]
 
-        redis_client.hset(
-            redis_device_key,
-            key=None,
-            value=None,
-            mapping={
+        state.update(
+            device_key,
+            {
                 "rx_channel_count": rx_count,
                 "tx_channel_count": tx_count,
             },
         )
 
         parsed_rx_channels = get_rx_channels(server_name)
-        cache_device_value_json(
+        cache_device_value(
             server_name, "rx_channels", parsed_rx_channels["rx_channels"]
         )
-        cache_device_value_json(
+        cache_device_value(
             server_name, "subscriptions", parsed_rx_channels["subscriptions"]
         )
 
         parsed_tx_channels = get_tx_channels(server_name)
-        cache_device_value_json(
+        cache_device_value(
             server_name, "tx_channels", parsed_tx_channels["tx_channels"]
         )
 
-        cached_device = redis_decode(redis_client.hgetall(redis_device_key))
+        cached_device = state.get(device_key)
 
-        rx_channels = json.loads(cached_device["rx_channels"])
-        tx_channels = json.loads(cached_device["tx_channels"])
+        rx_channels = cached_device["rx_channels"]
+        tx_channels = cached_device["tx_channels"]
 
         print(f"{device_name} rx:{len(rx_channels)} tx:{len(tx_channels)}")
 
     except Exception:
         traceback.print_exc()
 
-    redis_client.hset(
-        redis_device_key,
-        key=None,
-        value=None,
-        mapping={
+    state.update(
+        device_key,
+        {
             "device_name": device_name,
             "ipv4": cached_service["ipv4"],
             "rx_channel_count": rx_count,
@@ -1142,7 +767,7 @@ def device_initialize_arc(server_name):
         },
     )
 
-    redis_client.sadd(":".join(["netaudio", "dante", "devices"]), device_name)
+    state.add_members(":".join(["netaudio", "dante", "devices"]), device_name)
 
 
 def parse_dante_service_change(message):
@@ -1156,9 +781,9 @@ def parse_dante_service_change(message):
     state_change = message["state_change"]
 
     if state_change["name"] == "Added":
-        redis_client.sadd(":".join(["netaudio", "dante", "hosts"]), service["ipv4"])
-        redis_client.sadd(":".join(["netaudio", "dante", "servers"]), server_name)
-        redis_client.sadd(":".join(["netaudio", "dante", "services"]), service["name"])
+        state.add_members(":".join(["netaudio", "dante", "hosts"]), service["ipv4"])
+        state.add_members(":".join(["netaudio", "dante", "servers"]), server_name)
+        state.add_members(":".join(["netaudio", "dante", "services"]), service["name"])
 
         for port in PORTS:
             if port in sockets[server_name]:
@@ -1170,31 +795,25 @@ def parse_dante_service_change(message):
             sock.connect((ipv4, port))
             sockets[server_name][port] = sock
 
-        redis_host_key = ":".join(["netaudio", "dante", "host", service["ipv4"]])
-        redis_client.hset(
-            redis_host_key,
-            key=None,
-            value=None,
-            mapping={"ipv4": service["ipv4"], "server_name": server_name},
+        host_key = ":".join(["netaudio", "dante", "host", service["ipv4"]])
+        state.update(
+            host_key,
+            {"ipv4": service["ipv4"], "server_name": server_name},
         )
 
         key = ":".join(["netaudio", "dante", "server", server_name])
-        redis_client.hset(
+        state.update(
             key,
-            key=None,
-            value=None,
-            mapping={
+            {
                 "name": server_name,
                 "ipv4": ipv4,
             },
         )
 
         key = ":".join(["netaudio", "dante", "service", server_name, service["type"]])
-        redis_client.hset(
+        state.update(
             key,
-            key=None,
-            value=None,
-            mapping={
+            {
                 "ipv4": ipv4,
                 "name": service["name"],
                 "port": service["port"],
@@ -1214,7 +833,7 @@ def parse_dante_service_change(message):
                     service["type"],
                 ]
             )
-            redis_client.hset(key, key=None, value=None, mapping=service["properties"])
+            state.update(key, service["properties"])
 
         if (
             service["port"] not in sockets[server_name]
@@ -1239,16 +858,28 @@ def parse_dante_service_change(message):
     elif state_change["name"] == "Removed":
         # redis_client.srem("hosts", service["ipv4"])
         # redis_client.srem("servers", service["server_name"])
-        redis_client.srem("services", service["name"])
+        state.remove_members(":".join(["netaudio", "dante", "services"]), service["name"])
         print(
             f"Service removed: {service['name']}\n  {service['ipv4']}:{service['port']}"
         )
 
-    # redis_service_key = ":".join(["netaudio", "dante", "service", service["name"]])
-    # cached_service = redis_client.hgetall(redis_service_key)
+    # service_key = ":".join(["netaudio", "dante", "service", service["name"]])
+    # cached_service = redis_client.hgetall(service_key)
     # print("cached:", cached_service)
 
 
+def record_heartbeat(src_host, timestamp):
+    host_key = ":".join(["netaudio", "dante", "host", src_host])
+    server_name = state.get_field(host_key, "server_name")
+
+    if server_name:
+        cache_device_value(server_name, "last_seen_at", timestamp)
+        state.expire(":".join(["netaudio", "dante", "device", server_name]), HEARTBEAT_TTL)
+        state.expire(":".join(["netaudio", "dante", "server", server_name]), HEARTBEAT_TTL)
+
+    state.expire(host_key, HEARTBEAT_TTL)
+
+
 def multicast(group, port):
     server_address = ("", port)
     mc_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -1264,48 +895,22 @@ def multicast(group, port):
     mreq = struct.pack("4sL", group_bin, socket.INADDR_ANY)
     mc_sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
 
+    # Received into the same buffer each time, which handlers only see for the duration of a call
+    buffer = bytearray(2048)
+    view = memoryview(buffer)
+
     while True:
         try:
-            data, addr = mc_sock.recvfrom(2048)
+            length, addr = mc_sock.recvfrom_into(buffer)
             timestamp = time.time_ns()
 
             src_host, src_port = addr
 
-            message = {
-                "message_hex": data.hex(),
-                "multicast_group": group,
-                "multicast_port": port,
-                "src_host": src_host,
-                "src_port": src_port,
-                "time": timestamp,
-            }
-
             if group == MULTICAST_GROUP_HEARTBEAT and port == DEVICE_HEARTBEAT_PORT:
                 # print("heartbeat from", addr[0])
-
-                cached_host = redis_decode(
-                    redis_client.hgetall(
-                        ":".join(["netaudio", "dante", "host", addr[0]])
-                    )
-                )
-
-                if "server_name" in cached_host:
-                    server_name = cached_host["server_name"]
-                    cache_device_value(server_name, "last_seen_at", timestamp)
-                    redis_device_key = ":".join(
-                        ["netaudio", "dante", "device", server_name]
-                    )
-                    redis_client.expire(redis_device_key, 5)
-
-                    redis_server_key = ":".join(
-                        ["netaudio", "dante", "server", server_name]
-                    )
-                    redis_client.expire(redis_server_key, 5)
-
-                redis_host_key = ":".join(["netaudio", "dante", "host", addr[0]])
-                redis_client.expire(redis_host_key, 5)
+                record_heartbeat(src_host, timestamp)
             else:
-                parse_dante_message(message)
+                parse_dante_message(view[:length], src_host, src_port, group, port)
 
         except Exception:
             traceback.print_exc()
@@ -1330,16 +935,7 @@ class MDNSServer():
     async def run(self):
         queue = Queue()
 
-        if not redis_client:
-            print(
-                "Couldn't connect to a redis server. Specify with env variables REDIS_SOCKET REDIS_HOST REDIS_PORT REDIS_DB"
-            )
-            sys.exit(0)
-
-        pattern = ":".join(["netaudio", "dante", "*"])
-
-        for key in redis_client.scan_iter(match=pattern):
-            redis_client.delete(key)
+        state.load()
 
         self.threads.append(
             Thread(
@@ -1385,6 +981,7 @@ class MDNSServer():
         except (KeyboardInterrupt, SystemExit):
             print("Received stop signal, shutting down...")
             self.stop_event.set()  # Signal all threads to stop
+            state.save()
 
             for thread in self.threads:
                 thread.join()
@@ -1404,22 +1001,20 @@ class MDNSServer():
         mreq = struct.pack("4sL", group_bin, socket.INADDR_ANY)
         mc_sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
 
+        buffer = bytearray(2048)
+        view = memoryview(buffer)
+
         while not self.stop_event.is_set():
             try:
-                data, addr = mc_sock.recvfrom(2048)
+                length, addr = mc_sock.recvfrom_into(buffer)
                 timestamp = time.time_ns()
 
                 src_host, src_port = addr
-                message = {
-                    "message_hex": data.hex(),
-                    "multicast_group": group,
-                    "multicast_port": port,
-                    "src_host": src_host,
-                    "src_port": src_port,
-                    "time": timestamp,
-                }
 
-                parse_dante_message(message)
+                if group == MULTICAST_GROUP_HEARTBEAT and port == DEVICE_HEARTBEAT_PORT:
+                    record_heartbeat(src_host, timestamp)
+                else:
+                    parse_dante_message(view[:length], src_host, src_port, group, port)
 
             except (socket.error, OSError):
                 if self.stop_event.is_set():
@@ -1427,6 +1022,9 @@ class MDNSServer():
                 traceback.print_exc()
 
 @FireTyped
-def run_server(self):
+def run_server(self, state_file: str = None):
+    global state
+    if state_file:
+        state = StateStore(JSONFileStatePersistence(state_file))
     server = MDNSServer()
     asyncio.run(server.run())
@@ -1,6 +1,8 @@
 from .add import subscription_add
+from .apply import subscription_apply
 from .remove import subscription_remove
 from .list import subscription_list
+from .snapshot import subscription_restore, subscription_snapshot
 
 class SubscriptionCommands(object):
     """
@@ -8,5 +10,8 @@ class SubscriptionCommands(object):
     """
     def __init__(self):
         self.add = subscription_add
+        self.apply = subscription_apply
         self.remove = subscription_remove
         self.list = subscription_list
+        self.snapshot = subscription_snapshot
+        self.restore = subscription_restore
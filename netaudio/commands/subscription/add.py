@@ -1,12 +1,11 @@
 # ~ from ipaddress import IPv4Address
-import time
-
 from termcolor import colored, cprint
 
-from netaudio.dante2.application import DanteApplication
 from netaudio.dante2.channel import DanteChannelType
+from netaudio.utils.daemon import daemon_command, dante_application
 
 
+@daemon_command("subscription add")
 def subscription_add(
         # ~ interfaces: list[str] = None,
 
@@ -19,20 +18,18 @@ def subscription_add(
         tx_channel_number: int = None,
         # ~ tx_device_host: str = None,
         tx_device_name: str = None,
+
+        timeout: float = 10.0,
+        cache: bool = False,
 ) -> None:
     """
     Subscribe a Receiving channel to a Transmitting channel.
     """
     # TODO: implement remaining arguments above
-    app = DanteApplication()
-    app.startup()
-    time.sleep(1)
-
-    try:
+    with dante_application(timeout, cache) as app:
         rx_device = app.get_device_by_name(rx_device_name)
         if not rx_device:
             cprint("No matching RX Device found.", "red")
-            app.shutdown()
             return
 
         tx_device = app.get_device_by_name(tx_device_name)
@@ -54,13 +51,11 @@ def subscription_add(
             tx_channel = None
 
         if rx_channel and tx_channel:
-            rx_channel.subscribe(tx_channel)
+            try:
+                app.call(rx_channel.subscribe, tx_channel)
+            except TimeoutError as error:
+                cprint(f"Subscription not acknowledged: {error}", "red")
+                return
             print(f"{colored(rx_channel, 'blue', attrs=['bold'])} <- {colored(tx_channel, 'cyan', attrs=['bold'])}")
-            time.sleep(1)
         else:
             cprint("No matching RX or TX channels found.", "red")
-
-    except Exception as exception:
-        raise exception
-    finally:
-        app.shutdown()
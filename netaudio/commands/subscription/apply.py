@@ -0,0 +1,70 @@
+import csv
+import json as jsonlib
+
+from termcolor import colored, cprint
+
+from netaudio.dante2.routing import DanteRoute, DanteRouteResult, apply_routes
+from netaudio.utils.daemon import daemon_command, dante_application
+from netaudio.utils.json_encoder import dump_json_formatted
+
+
+def read_routes(path: str) -> list[dict]:
+    """
+    Read routes from a JSON file (a list of objects) or a CSV file (with a header row), either having
+    the fields `rx_device`, `rx_channel`, `tx_device` and `tx_channel`. Leave the TX fields empty to
+    unsubscribe an RX channel; leave only `tx_device` empty for a TX channel on the RX device.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if path.lower().endswith(".json"):
+            return jsonlib.load(file)
+        return list(csv.DictReader(file))
+
+
+def subscription_apply(
+        routes_file: str,
+        json: bool = False,
+        timeout: float = 10.0,
+        cache: bool = False,
+) -> None:
+    """
+    Subscribe many Receiving channels at once, as listed in a CSV or JSON file.
+    """
+    # Read here, rather than by the daemon, which may not share our working directory
+    _apply_routes(read_routes(routes_file), json=json, timeout=timeout, cache=cache)
+
+
+@daemon_command("subscription apply")
+def _apply_routes(
+        routes: list[dict],
+        json: bool = False,
+        timeout: float = 10.0,
+        cache: bool = False,
+) -> None:
+    try:
+        routes = [DanteRoute.from_dict(route) for route in routes]
+    except KeyError as error:
+        cprint(f"Route missing {error}", "red")
+        return
+
+    with dante_application(timeout, cache) as app:
+        results = app.call(apply_routes, app, routes)
+
+    if json:
+        print(dump_json_formatted([result.json() for result in results]))
+        return
+
+    for result in results:
+        print_route_result(result)
+
+
+def print_route_result(result: DanteRouteResult) -> None:
+    route = result.route
+    rx_text = colored(f"{route.rx_channel}@{route.rx_device}", 'blue', attrs=['bold'])
+    if route.tx_channel is None:
+        tx_text = "(unsubscribed)"
+    else:
+        tx_text = colored(f"{route.tx_channel}@{route.tx_device or route.rx_device}", 'cyan', attrs=['bold'])
+    if result.error:
+        cprint(f"{rx_text} <- {tx_text}: {result.error}", "red")
+    else:
+        print(f"{rx_text} <- {tx_text}{'' if result.changed else colored(' (unchanged)', 'light_grey')}")
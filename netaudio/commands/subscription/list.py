@@ -1,26 +1,22 @@
 # ~ from ipaddress import IPv4Address
-import time
-
 from termcolor import colored, cprint
 
-from netaudio.dante2.application import DanteApplication
+from netaudio.utils.daemon import daemon_command, dante_application
 from netaudio.utils.json_encoder import dump_json_formatted
 
 
+@daemon_command("subscription list")
 def subscription_list(
     # ~ interfaces: list[str] = None,
     json: bool = False,
+    timeout: float = 10.0,
+    cache: bool = False,
 ) -> None:
     """
     List all subscriptions.
     """
     # TODO: implement remaining argument above
-    app = DanteApplication()
-    app.startup()
-    time.sleep(1)
-
-    try:
-
+    with dante_application(timeout, cache) as app:
         if json:
             subscriptions: list[dict] = []
             for device in app.devices:
@@ -41,8 +37,3 @@ def subscription_list(
                             tx_text = ""
                         status_text = colored(", ".join(channel.subscription.status_text), 'light_grey')
                         print(f"{rx_text}{tx_text} [{status_text}]")
-
-    except Exception as exception:
-        raise exception
-    finally:
-        app.shutdown()
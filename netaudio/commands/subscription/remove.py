@@ -1,11 +1,10 @@
 # ~ from ipaddress import IPv4Address
-import time
-
 from termcolor import colored, cprint
 
-from netaudio.dante2.application import DanteApplication
 from netaudio.dante2.channel import DanteChannelType
+from netaudio.utils.daemon import daemon_command, dante_application
 
+@daemon_command("subscription remove")
 def subscription_remove(
         # ~ interfaces: list[str] = None,
 
@@ -13,20 +12,18 @@ def subscription_remove(
         rx_channel_number: int = None,
         # ~ rx_device_host: str = None,
         rx_device_name: str = None,
+
+        timeout: float = 10.0,
+        cache: bool = False,
 ) -> None:
     """
     Remove the subscription from a Receiving Channel.
     """
     # TODO: implement remaining arguments above
-    app = DanteApplication()
-    app.startup()
-    time.sleep(1)
-
-    try:
+    with dante_application(timeout, cache) as app:
         rx_device = app.get_device_by_name(rx_device_name)
         if not rx_device:
             cprint("No matching RX Device found.", "red")
-            app.shutdown()
             return
 
         if rx_channel_name:
@@ -37,13 +34,10 @@ def subscription_remove(
             rx_channel = None
 
         if rx_channel:
-            rx_channel.unsubscribe()
             print(f"Removing subscription from {colored(rx_channel, 'blue', attrs=['bold'])}")
-            time.sleep(1)
+            try:
+                app.call(rx_channel.unsubscribe)
+            except TimeoutError as error:
+                cprint(f"Removal not acknowledged: {error}", "red")
         else:
             cprint("No matching RX Channel found.", "red")
-
-    except Exception as exception:
-        raise exception
-    finally:
-        app.shutdown()
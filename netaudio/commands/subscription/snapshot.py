@@ -0,0 +1,72 @@
+import json as jsonlib
+
+from termcolor import colored, cprint
+
+from netaudio.dante2.routing import restore_snapshot, take_snapshot
+from netaudio.utils.daemon import daemon_command, dante_application
+from netaudio.utils.json_encoder import dump_json_formatted
+
+from .apply import print_route_result
+
+
+@daemon_command("subscription snapshot")
+def subscription_snapshot(
+        timeout: float = 10.0,
+        cache: bool = False,
+) -> None:
+    """
+    Print (as JSON) the channel names and subscriptions of every device, to be restored later.
+    """
+    with dante_application(timeout, cache) as app:
+        print(dump_json_formatted(app.call(take_snapshot, app)))
+
+
+def subscription_restore(
+        snapshot_file: str,
+        rename: bool = True,
+        json: bool = False,
+        timeout: float = 10.0,
+        cache: bool = False,
+) -> None:
+    """
+    Restore channel names and subscriptions from a snapshot, changing only what differs.
+    """
+    # Read here, rather than by the daemon, which may not share our working directory
+    with open(snapshot_file, "r", encoding="utf-8") as file:
+        snapshot = jsonlib.load(file)
+    _restore(snapshot, rename=rename, json=json, timeout=timeout, cache=cache)
+
+
+@daemon_command("subscription restore")
+def _restore(
+        snapshot: dict,
+        rename: bool = True,
+        json: bool = False,
+        timeout: float = 10.0,
+        cache: bool = False,
+) -> None:
+    with dante_application(timeout, cache) as app:
+        try:
+            renames, routes = app.call(restore_snapshot, app, snapshot, rename)
+        except ValueError as error:
+            cprint(str(error), "red")
+            return
+
+    if json:
+        print(dump_json_formatted({
+            "renames": [result.json() for result in renames],
+            "routes": [result.json() for result in routes],
+        }))
+        return
+
+    for result in renames:
+        text = f"Renamed {result.channel_type.value.upper()} {result.number}@{result.device} to {colored(result.name, 'blue', attrs=['bold'])}"
+        if result.error:
+            cprint(f"{text}: {result.error}", "red")
+        else:
+            print(text)
+    for result in routes:
+        if result.changed or result.error:
+            print_route_result(result)
+    if not renames and not any(result.changed or result.error for result in routes):
+        print("Nothing to restore; the network is as in the snapshot.")
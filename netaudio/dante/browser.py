@@ -28,11 +28,15 @@ class DanteBrowser:
     _mdns_timeout: float
     aio_browser: AsyncServiceBrowser = None
     aio_zc: AsyncZeroconf = None
-    devices:dict[str, DanteDevice] = {}
-    services: List[asyncio.Future] = []
+    devices:dict[str, DanteDevice]
+    services: List[asyncio.Future]
 
     def __init__(self, mdns_timeout:float) -> None:
         self._mdns_timeout = mdns_timeout
+        # Per instance (not shared by every browser), and emptied for each browse, so that
+        # browsing repeatedly doesn't accumulate every service ever seen
+        self.devices = {}
+        self.services = []
 
     @property
     def mdns_timeout(self):
@@ -138,6 +142,9 @@ class DanteBrowser:
                           filter_host: str | None = None,
                           interfaces: List[str] | None = None
                           ) -> dict[str, DanteDevice]:
+        self.devices = {}
+        self.services = []
+
         try:
             await self.async_run(interfaces if interfaces else InterfaceChoice.All)
         except KeyboardInterrupt:
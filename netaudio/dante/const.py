@@ -24,7 +24,7 @@ DEVICE_CONTROL_PORT: int = 8800
 DEVICE_HEARTBEAT_PORT: int = 8708
 DEVICE_INFO_PORT: int = 8702
 # DEVICE_INFO_SRC_PORT1 = 1029
-# DEVICE_INFO_SRC_PORT2 = 1030
+DEVICE_INFO_SRC_PORT2: int = 1030
 DEVICE_SETTINGS_PORT: int = 8700
 MESSAGE_TYPE_VOLUME_LEVELS = 0
 
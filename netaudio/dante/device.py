@@ -1,8 +1,9 @@
+import asyncio
 import logging
 import socket
 
 from ipaddress import IPv4Address
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 from pydantic import BaseModel
 
 from netaudio.dante.channel import DanteChannel, ChannelType
@@ -12,6 +13,9 @@ from .protocols import ServiceARC, ServiceCMC, ServiceSettings, Encoding
 logger = logging.getLogger("netaudio")
 sockets:dict[int, socket.socket] = {}
 
+# How many devices to initialise at once
+DEFAULT_BEGIN_CONCURRENCY:int = 32
+
 class NetworkInfo(BaseModel):
     server_name: str
     name: str
@@ -161,3 +165,22 @@ class DanteDevice(BaseModel):
     #         as_json["mac_address"] = self.mac_address
 
     #     return {key: as_json[key] for key in sorted(as_json.keys())}
+
+
+async def begin_devices(devices:Iterable[DanteDevice], concurrency:int=DEFAULT_BEGIN_CONCURRENCY):
+    """
+    Initialise several devices at once, no more than `concurrency` at a time
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _begin(device:DanteDevice):
+        async with semaphore:
+            await device.begin()
+
+    devices = list(devices)
+    results = await asyncio.gather(*[_begin(device) for device in devices], return_exceptions=True)
+
+    for device, result in zip(devices, results):
+        if isinstance(result, Exception):
+            device.error = result
+            logger.warning(f"Failed to initialise device at {device.ipv4}: {result}")
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+
+from typing import Callable, Dict
+
+from netaudio.dante2.metrics import REGISTRY, MetricsRegistry
+
+from .browser import DanteBrowser
+from .device import DEFAULT_BEGIN_CONCURRENCY, DanteDevice, begin_devices
+
+logger = logging.getLogger("netaudio")
+
+
+class DanteNetworkModel:
+    """
+    The devices on the network, kept up to date in the background, so that they can be read
+    without each read having to browse for and initialise every device.
+
+    Reads are answered from what's held, so long as it's no older than `max_age` seconds; otherwise
+    they wait for it to be refreshed. Whilst running, the whole network is refreshed every
+    `refresh_interval` seconds, so long as it's been read within the last `idle_after` seconds
+    (so that nobody reading means no polling). After changing a device, refresh only that device,
+    with `refresh_device()`.
+
+    Refreshes, and the devices found, are recorded in `metrics` (by default, the registry of the
+    whole process, as `netaudio.dante2` records its own in), so `/metrics` describes whichever the
+    server runs.
+    """
+
+    MAX_AGE:float = 30.0
+    REFRESH_INTERVAL:float = 10.0
+    IDLE_AFTER:float = 60.0
+
+    def __init__(
+        self,
+        browser_factory:Callable[[], DanteBrowser] = lambda: DanteBrowser(mdns_timeout=1.5),
+        max_age:float = MAX_AGE,
+        refresh_interval:float = REFRESH_INTERVAL,
+        concurrency:int = DEFAULT_BEGIN_CONCURRENCY,
+        clock:Callable[[], float] = time.monotonic,
+        idle_after:float = IDLE_AFTER,
+        metrics:MetricsRegistry | None = None,
+    ) -> None:
+        self._browser_factory = browser_factory
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.concurrency = concurrency
+        self.idle_after = idle_after
+        self._clock = clock
+
+        # By server name, sorted by device name
+        self._devices:Dict[str, DanteDevice] | None = None
+        self._refreshed_at:float = 0.0
+        self._read_at:float | None = None
+        # The refresh underway, shared by whoever wants it to finish
+        self._refresh_task:asyncio.Task | None = None
+        self._background_task:asyncio.Task | None = None
+
+        metrics = REGISTRY if metrics is None else metrics
+        self._refreshes = metrics.counter(
+            'netaudio_network_model_refreshes_total', "Refreshes of the whole network", ('result',))
+        self._refresh_duration = metrics.histogram(
+            'netaudio_network_model_refresh_duration_seconds', "Time taken to refresh the whole network")
+        metrics.gauge(
+            'netaudio_network_model_devices', "Devices found by the last refresh").track(
+            lambda: len(self._devices or ()))
+        metrics.gauge(
+            'netaudio_network_model_device_errors', "Devices that failed to initialise").track(
+            lambda: sum(1 for device in (self._devices or {}).values() if device.error))
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the network was last refreshed; or None if it's yet to be."""
+        if self._devices is None:
+            return None
+        return self._clock() - self._refreshed_at
+
+    @property
+    def is_idle(self) -> bool:
+        """Whether nobody has read the network for `idle_after` seconds (or ever)."""
+        return self._read_at is None or self._clock() - self._read_at > self.idle_after
+
+    async def get_devices(self) -> Dict[str, DanteDevice]:
+        self._read_at = self._clock()
+        if self._devices is None or self.age > self.max_age:
+            await self.refresh()
+        return self._devices
+
+    async def get_device(self, name:str) -> DanteDevice | None:
+        devices = await self.get_devices()
+        return next((device for device in devices.values() if device.name == name), None)
+
+    async def refresh(self) -> None:
+        """Browse for, and initialise, every device; joining any refresh already underway."""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+            self._refresh_task.add_done_callback(self._cb_refreshed)
+        # Shielded, so that one reader giving up doesn't cancel it for the rest
+        await asyncio.shield(self._refresh_task)
+
+    def _cb_refreshed(self, _task:asyncio.Task) -> None:
+        self._refresh_task = None
+
+    async def _refresh(self) -> None:
+        started = self._clock()
+        try:
+            devices = await self._browser_factory().get_devices()
+            await begin_devices(devices.values(), self.concurrency)
+        except Exception:
+            self._refreshes.inc(result='failed')
+            raise
+        self._devices = dict(sorted(devices.items(), key=lambda x: x[1].name))
+        self._refreshed_at = self._clock()
+        self._refreshes.inc(result='ok')
+        self._refresh_duration.observe(self._refreshed_at - started)
+
+    async def refresh_device(self, device:DanteDevice) -> DanteDevice:
+        """
+        Initialise a device afresh (such as after changing it), replacing it in the model. Returns
+        the new device.
+        """
+        fresh = DanteDevice(hostname=device.hostname, ipv4=device.ipv4)
+        await begin_devices([fresh], self.concurrency)
+        if self._devices is not None and device.hostname in self._devices:
+            self._devices[device.hostname] = fresh
+            self._devices = dict(sorted(self._devices.items(), key=lambda x: x[1].name))
+        return fresh
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self.is_idle:
+                    await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh the network")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start refreshing in the background. Call from the event loop reads will be made from."""
+        if self._background_task is None:
+            self._background_task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._background_task is not None:
+            self._background_task.cancel()
+            try:
+                await self._background_task
+            except asyncio.CancelledError:
+                pass
+            self._background_task = None
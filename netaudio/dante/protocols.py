@@ -1,3 +1,5 @@
+import asyncio
+import math
 import random
 import codecs
 import traceback
@@ -39,30 +41,76 @@ class SampleRate(ValueInitializableIntEnum):
 
 class DanteService:
     sock:socket
+    timeout:float = 1
+    # How many commands _send_pipelined keeps awaiting a response at once
+    window:int = 4
 
     def begin(self, ipv4:IPv4Address):
         self.sock = socket(AF_INET, SOCK_DGRAM)
         self.sock.bind(("", 0))
-        self.sock.settimeout(1)
-        # self.sock.settimeout(0.01)
+        # Non-blocking, so that many devices may be spoken to at once from the event loop
+        self.sock.setblocking(False)
         self.sock.connect((str(ipv4), self.port))
 
     async def _send(self, cmd:str, recv:int|None=None) -> bytes:
+        loop = asyncio.get_running_loop()
         binary_str = codecs.decode(cmd, "hex")
 
         try:
-            self.sock.send(binary_str)
+            await loop.sock_sendall(self.sock, binary_str)
         except Exception as e:
             print(e)
             traceback.print_exc()
 
         if recv:
             try:
-                return self.sock.recvfrom(recv)[0]
+                return await asyncio.wait_for(loop.sock_recv(self.sock, recv), self.timeout)
             except TimeoutError:
                 pass
                 # raise TimeoutError("Dante command timed out waiting for response")
 
+    async def _send_pipelined(self, cmds:list[str], recv:int) -> list[bytes|None]:
+        """
+        Send several commands, keeping up to `window` of them in flight at once, rather than
+        waiting for each response before sending the next command.
+
+        Responses are matched to commands by their sequence id, and are returned in the order
+        the commands were given. Commands that went unanswered have a response of None. (Sequence
+        ids are random, so may repeat; a command is held back whilst another with its id is in
+        flight.)
+        """
+        loop = asyncio.get_running_loop()
+        responses:list[bytes|None] = [None] * len(cmds)
+        in_flight:dict[str, int] = {}
+        sent = 0
+
+        while sent < len(cmds) or in_flight:
+            while sent < len(cmds) and len(in_flight) < self.window:
+                # Commands are "27ff00{length}{sequence_id}...", in hex
+                sequence_id = cmds[sent][8:12]
+                if sequence_id in in_flight:
+                    break
+                in_flight[sequence_id] = sent
+                try:
+                    await loop.sock_sendall(self.sock, codecs.decode(cmds[sent], "hex"))
+                except Exception as e:
+                    print(e)
+                    traceback.print_exc()
+                sent += 1
+
+            try:
+                response = await asyncio.wait_for(loop.sock_recv(self.sock, recv), self.timeout)
+            except TimeoutError:
+                logger.warning(f"{len(in_flight)} Dante command(s) timed out waiting for a response")
+                in_flight.clear()
+                continue
+
+            index = in_flight.pop(response[4:6].hex(), None)
+            if index is not None:
+                responses[index] = response
+
+        return responses
+
 class ServiceARC(DanteService):
     """
     Dante Audio Routing Channel
@@ -235,16 +283,22 @@ class ServiceARC(DanteService):
         tx_count = ch_count[1]
         ##################### RX Channels #####################
         try:
-            for page in range(0, max(int(rx_count / 16), 1)):
-                receivers = await self._send(self._command(
+            rx_pages = range(0, max(math.ceil(rx_count / 16), 1))
+            rx_responses = await self._send_pipelined([
+                self._command(
                     "3000",
                     command_length="10",
                     command_args=self._channel_pagination(page)
-                ), 2048)
+                ) for page in rx_pages
+            ], 2048)
+
+            for page, receivers in zip(rx_pages, rx_responses):
+                if not receivers:
+                    continue
 
                 hex_rx_response = receivers.hex()
 
-                for index in range(0, min(rx_count, 16)):
+                for index in range(0, min(rx_count - page * 16, 16)):
                     n = 4
                     str1 = hex_rx_response[(24 + (index * 40)) : (56 + (index * 40))]
                     channel = [str1[i : i + n] for i in range(0, len(str1), n)]
@@ -304,16 +358,25 @@ class ServiceARC(DanteService):
         try:
             tx_friendly_channel_names = {}
 
-            for page in range(0, max(1, int(tx_count / 16)), 2):
-                friendly_names = True
-                response = await self._send(self._command(
+            # Each TX page holds 32 channels, but is addressed in units of 16
+            tx_pages = range(0, max(1, math.ceil(tx_count / 16)), 2)
+            tx_responses = await self._send_pipelined([
+                self._command(
                     "2010" if friendly_names else "2000",
                     command_length="10",
                     command_args=self._channel_pagination(page=page),
-                ), 2048)
+                ) for friendly_names in (True, False) for page in tx_pages
+            ], 2048)
+            tx_friendly_responses = tx_responses[:len(tx_pages)]
+            tx_responses = tx_responses[len(tx_pages):]
+
+            for page, response in zip(tx_pages, tx_friendly_responses):
+                if not response:
+                    continue
+
                 tx_friendly_names = response.hex()
 
-                for index in range(0, min(tx_count, 32)):
+                for index in range(0, min(tx_count - page * 16, 32)):
                     str1 = tx_friendly_names[(24 + (index * 12)) : (36 + (index * 12))]
                     n = 4
                     channel = [str1[i : i + 4] for i in range(0, len(str1), n)]
@@ -329,13 +392,10 @@ class ServiceARC(DanteService):
                             tx_channel_friendly_name
                         )
 
-            for page in range(0, max(1, int(tx_count / 16)), 2):
-                friendly_names = False
-                response = await self._send(self._command(
-                    "2010" if friendly_names else "2000",
-                    command_length="10",
-                    command_args=self._channel_pagination(page=page),
-                ), 2048)
+            for page, response in zip(tx_pages, tx_responses):
+                if not response:
+                    continue
+
                 transmitters = response.hex()
 
                 has_disabled_channels = False
@@ -348,7 +408,7 @@ class ServiceARC(DanteService):
 
                 first_channel = []
 
-                for index in range(0, min(tx_count, 32)):
+                for index in range(0, min(tx_count - page * 16, 32)):
                     str1 = transmitters[(24 + (index * 16)) : (40 + (index * 16))]
                     n = 4
                     channel = [str1[i : i + 4] for i in range(0, len(str1), n)]
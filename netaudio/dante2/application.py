@@ -1,43 +1,143 @@
+import asyncio
+import enum
+import functools
+import inspect
+import time
+
 from .arc_service import DanteARCService
+from .cache import DanteDeviceCache
 from .channel import DanteTxChannel
 from .cmc_service import DanteCMCService
 from .dbc_service import DanteDBCService
 from .device import DanteDevice
 from .discovery import DanteDiscovery
+from .heartbeat_service import DanteHeartbeatService
+from .liveness import DanteLivenessTracker
+from .metering import DanteMetering
+from .metrics import REGISTRY, MetricsRegistry
+from .scheduler import DanteCommandScheduler
+from .service import DanteServiceLoop
 from .settings_service import DanteSettingsService
 from .util import LOGGER
 from .volume_service import DanteVolumeService
 
 
+class DanteEvent(enum.Enum):
+    '''Events that listeners may be added for. Listeners are called (on the service loop) with the device.'''
+    DEVICE_OFFLINE = enum.auto()
+    DEVICE_ONLINE = enum.auto()
+
+
 class DanteApplication:
 
-    def __init__(self):
+    # How long nothing new must be heard (no devices appearing, no responses arriving) before the
+    # network is considered to have settled.
+    SETTLE_QUIET_PERIOD: float = 0.5
+
+    def __init__(
+        self,
+        cache: DanteDeviceCache | None = None,
+        discovery_factory=DanteDiscovery,
+        metrics: MetricsRegistry | None = None,
+        heartbeat_miss_count: int | None = None,
+        command_window: int | None = None,
+        command_rate: float | None = None,
+        metering_interval: float | None = None,
+    ):
+        '''
+        `discovery_factory` is called with the application to create what discovers its devices,
+        should something other than mDNS be wanted (such as `netaudio.simulator`).
+
+        The services record their metrics in `metrics`, by default the registry shared by the
+        whole process (`netaudio.dante2.metrics.REGISTRY`).
+
+        Devices are considered offline after missing `heartbeat_miss_count` heartbeats in a row (by
+        default, `DanteLivenessTracker.MISS_COUNT`).
+
+        Commands are paced (see `DanteCommandScheduler`): at most `command_window` awaiting a
+        response from each device at once, and at most `command_rate` sent per second.
 
+        Levels are published to metering subscribers every `metering_interval` seconds (by default,
+        `DanteMetering.PUBLISH_INTERVAL`).
+        '''
+
+        self._cache: DanteDeviceCache | None = cache
+        self._metrics: MetricsRegistry = REGISTRY if metrics is None else metrics
+        self._loop: DanteServiceLoop = DanteServiceLoop()
+
+        self._scheduler: DanteCommandScheduler = DanteCommandScheduler(
+            self, window=command_window, rate=command_rate
+        )
         self._arc: DanteARCService = DanteARCService(self)
         self._cmc: DanteCMCService = DanteCMCService(self)
         self._dbc: DanteDBCService = DanteDBCService(self)
         self._settings: DanteSettingsService = DanteSettingsService(self)
         self._vol: DanteVolumeService = DanteVolumeService(self)
-        self._discovery: DanteDiscovery = DanteDiscovery(self)
+        self._heartbeat: DanteHeartbeatService = DanteHeartbeatService(self)
+        self._discovery: DanteDiscovery = discovery_factory(self)
+        self._liveness: DanteLivenessTracker = DanteLivenessTracker(self, miss_count=heartbeat_miss_count)
+        self._metering: DanteMetering = DanteMetering(self, publish_interval=metering_interval)
+        self._listeners: dict[DanteEvent, list] = {event: [] for event in DanteEvent}
 
         self._devices: list[DanteDevice] = []
-        self._orphaned_tx_channels: dict[str, list[DanteTxChannel]] = {}
+        # Indexes of the above, by lower-cased name and by mDNS server name
+        self._devices_by_name: dict[str, DanteDevice] = {}
+        self._devices_by_server_name: dict[str, DanteDevice] = {}
+        # TX channels subscribed to on devices not yet discovered, by lower-cased device name then
+        # lower-cased channel name. Adopted by their device once it's found.
+        self._orphaned_tx_channels: dict[str, dict[str, DanteTxChannel]] = {}
+        # How many times discovery has registered each device, so a response (or its absence) to
+        # something asked of the device can be known to predate it having (perhaps) moved
+        self._registrations: dict[DanteDevice, int] = {}
+
+        self._activity: asyncio.Event = asyncio.Event()
+        self._last_activity: float = 0.0
 
     def startup(self):
+        self._last_activity = time.monotonic()
+        self._loop.start()
         self._arc.start()
         self._cmc.start()
         # ~ self._dbc.start()
-        # ~ self._settings.start()
+        self._settings.start()
         self._vol.start()
+        self._heartbeat.start()
+        self._loop.call(self._liveness.start)
+        if self._cache:
+            self.call(self._restore_cached_devices)
         self._discovery.start()
 
     def shutdown(self):
         self._discovery.stop()
+        if self._cache:
+            self.call(self._cache.save, self._devices)
         self._arc.stop()
         self._cmc.stop()
         # ~ self._dbc.stop()
-        # ~ self._settings.stop()
+        self._settings.stop()
         self._vol.stop()
+        self._loop.call(self._liveness.stop)
+        self._loop.call(self._metering.stop)
+        self._loop.call(self._scheduler.stop)
+        self._heartbeat.stop()
+        self._loop.stop()
+
+    def call(self, func, *args, timeout: float | None = None):
+        '''
+        Run `func` on the service loop, and wait for (and return) its result.
+
+        Objects belonging to this application (devices, channels, etc.) should only be poked from
+        the service loop; this is how code running elsewhere (such as the CLI) does so.
+        '''
+        async def _invoke():
+            result = func(*args)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        if self._loop.is_current():
+            raise RuntimeError("DanteApplication.call() would block the service loop")
+        return self._loop.run_coroutine(_invoke()).result(timeout)
 
     @property
     def arc_service(self) -> DanteARCService:
@@ -55,6 +155,26 @@ class DanteApplication:
     def devices(self) -> list[DanteDevice]:
         return self._devices
 
+    @property
+    def liveness(self) -> DanteLivenessTracker:
+        return self._liveness
+
+    @property
+    def metering(self) -> DanteMetering:
+        return self._metering
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        return self._metrics
+
+    @property
+    def scheduler(self) -> DanteCommandScheduler:
+        return self._scheduler
+
+    @property
+    def service_loop(self) -> DanteServiceLoop:
+        return self._loop
+
     @property
     def settings_service(self) -> DanteSettingsService:
         return self._settings
@@ -63,36 +183,186 @@ class DanteApplication:
     def volume_service(self) -> DanteVolumeService:
         return self._vol
 
+    def is_settled(self) -> bool:
+        '''
+        Whether every device discovered so far has been registered and has answered all our
+        requests for information about it.
+        '''
+        if self._discovery.is_in_progress():
+            return False
+        # Requests to offline devices will only time out
+        return all(device.is_ready for device in self._devices if device.is_online)
+
+    def notify_activity(self) -> None:
+        '''Note that something has been heard from the network. Call from the service loop.'''
+        self._last_activity = time.monotonic()
+        self._activity.set()
+
     def register_device(self, device_spec):
+        cached_device = self.get_device_by_server_name(device_spec.get('server_name'))
+        if cached_device:
+            if cached_device.arc.protocol_version == device_spec['arc'].protocol_version:
+                # Already known from the cache; the device may have since moved, however
+                moved = cached_device.ipv4 != device_spec.get('ipv4')
+                cached_device._service_descriptors = device_spec # pylint: disable=protected-access
+                self._registrations[cached_device] = self._registrations.get(cached_device, 0) + 1
+                self._liveness.track(cached_device)
+                if moved:
+                    # Anything asked of it at its old address will go unanswered
+                    cached_device.revalidate()
+                self.notify_activity()
+                return
+            self._remove_device(cached_device)
+
         LOGGER.info("Discovered new Dante device at %s", device_spec['ipv4'])
         new_device = DanteDevice(self, device_spec)
-        self._devices.append(new_device)
+        self._add_device(new_device)
+        self.notify_activity()
+
+    def add_listener(self, event: DanteEvent, callback) -> None:
+        self._listeners[event].append(callback)
+
+    def remove_listener(self, event: DanteEvent, callback) -> None:
+        self._listeners[event].remove(callback)
+
+    def _emit(self, event: DanteEvent, *args) -> None:
+        for callback in list(self._listeners[event]):
+            try:
+                callback(*args)
+            except Exception: # pylint: disable=broad-exception-caught
+                LOGGER.exception("Listener for %s failed", event.name)
+
+    def _cb_device_offline(self, device: DanteDevice) -> None:
+        self._discovery.set_connected(device.server_name, False)
+        self.notify_activity()
+        self._emit(DanteEvent.DEVICE_OFFLINE, device)
+
+    def _cb_device_online(self, device: DanteDevice) -> None:
+        self._discovery.set_connected(device.server_name, True)
+        # Anything may have changed whilst it was away
+        device.revalidate()
+        self._emit(DanteEvent.DEVICE_ONLINE, device)
+
+    def _restore_cached_devices(self) -> None:
+        restored = self._cache.load(self)
+        for device, _ in restored:
+            self._add_device(device)
+        self._cache.restore_channels(restored)
+
+        for device, _ in restored:
+            device.revalidate().add_done_callback(
+                functools.partial(self.__cb_revalidated, device, self._registrations.get(device, 0))
+            )
+        LOGGER.debug("Restored %s devices from %s", len(restored), self._cache.path)
+
+    def __cb_revalidated(self, device: DanteDevice, registration: int, future: asyncio.Future) -> None:
+        if future.cancelled() or not future.exception():
+            return
+        if self._registrations.get(device, 0) != registration:
+            # Discovered since it was asked (perhaps at a new address), so is evidently present
+            return
+        # Gone from the network since it was cached
+        LOGGER.info("Cached device %s did not respond; forgetting it", device.name)
+        if device in self._devices:
+            self._remove_device(device)
+        self.notify_activity()
+
+    async def settled(self, quiet_period: float | None = None) -> None:
+        '''
+        Wait until the network has settled: that is, `is_settled()`, and nothing further has been
+        heard for `quiet_period` seconds (as more devices may yet appear via mDNS).
+        '''
+        if quiet_period is None:
+            quiet_period = self.SETTLE_QUIET_PERIOD
+
+        while True:
+            self._activity.clear()
+            if self.is_settled():
+                remaining = self._last_activity + quiet_period - time.monotonic()
+                if remaining <= 0:
+                    return
+            else:
+                remaining = None
+
+            try:
+                await asyncio.wait_for(self._activity.wait(), remaining)
+            except TimeoutError:
+                pass
+
+    def wait_until_settled(self, timeout: float | None = None, quiet_period: float | None = None) -> bool:
+        '''
+        Block until the network has settled (see `settled()`), or `timeout` seconds have passed.
+
+        Returns whether the network settled.
+        '''
+        future = self._loop.run_coroutine(self.settled(quiet_period))
+        try:
+            future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            return False
+        return True
 
     def get_device_by_name(self, device_name: str) -> DanteDevice | None:
         if not device_name:
             return None
         # Names are unique on the network, but case-insensitive
-        device_name = device_name.lower()
-        try:
-            return next(
-                filter(
-                    lambda device: device.name.lower() == device_name,
-                    self._devices
-                )
-            )
-        except StopIteration:
+        return self._devices_by_name.get(device_name.lower())
+
+    def get_device_by_server_name(self, server_name: str) -> DanteDevice | None:
+        if not server_name:
             return None
+        return self._devices_by_server_name.get(server_name)
+
+    def get_device_by_ipv4(self, ipv4: str) -> DanteDevice | None:
+        # The liveness tracker already indexes devices by address
+        return self._liveness.get_device(ipv4)
+
+    def _add_device(self, device: DanteDevice) -> None:
+        self._devices.append(device)
+        if device.name:
+            self._devices_by_name[device.name.lower()] = device
+            self._adopt_orphaned_tx_channels(device)
+        if device.server_name:
+            self._devices_by_server_name[device.server_name] = device
+        self._liveness.track(device)
+
+    def _remove_device(self, device: DanteDevice) -> None:
+        self._devices.remove(device)
+        self._registrations.pop(device, None)
+        if device.name and self._devices_by_name.get(device.name.lower()) is device:
+            del self._devices_by_name[device.name.lower()]
+        if device.server_name and self._devices_by_server_name.get(device.server_name) is device:
+            del self._devices_by_server_name[device.server_name]
+        self._liveness.untrack(device)
+
+    def _reindex_device(self, device: DanteDevice, old_name: str) -> None:
+        '''Called by a device when its name changes.'''
+        if device not in self._devices:
+            return
+        if old_name and self._devices_by_name.get(old_name.lower()) is device:
+            del self._devices_by_name[old_name.lower()]
+        if device.name:
+            self._devices_by_name[device.name.lower()] = device
+            self._adopt_orphaned_tx_channels(device)
+
+    def _adopt_orphaned_tx_channels(self, device: DanteDevice) -> None:
+        orphans = self._orphaned_tx_channels.pop(device.name.lower(), None)
+        if not orphans:
+            return
+        LOGGER.debug("Device %s adopting %s orphaned TX channels", device.name, len(orphans))
+        for channel in orphans.values():
+            device._adopt_tx_channel(channel) # pylint: disable=protected-access
 
     def append_orphaned_tx_channel(self, tx_device_name: str, tx_channel: DanteTxChannel) -> None:
-        if tx_device_name not in self._orphaned_tx_channels:
-            self._orphaned_tx_channels[tx_device_name] = []
-        self._orphaned_tx_channels[tx_device_name].append(tx_channel)
+        self._orphaned_tx_channels.setdefault(tx_device_name.lower(), {})[tx_channel.name.lower()] = tx_channel
 
     def retrieve_orphaned_tx_channel(self, tx_device_name: str, tx_channel_name: str) -> DanteTxChannel | None:
-        if tx_device_name not in self._orphaned_tx_channels:
+        '''
+        Return the orphaned TX channel of the given name. It stays registered, as other RX channels
+        may subscribe to it too, until its device appears.
+        '''
+        orphans = self._orphaned_tx_channels.get(tx_device_name.lower())
+        if not orphans or not tx_channel_name:
             return None
-        for idx in range(len(self._orphaned_tx_channels[tx_device_name])):
-            channel = self._orphaned_tx_channels[tx_device_name][idx]
-            if channel.name == tx_channel_name:
-                return self._orphaned_tx_channels[tx_device_name].pop(idx)
-        return None
+        return orphans.get(tx_channel_name.lower())
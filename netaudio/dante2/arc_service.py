@@ -1,13 +1,14 @@
+import asyncio
 from collections.abc import Callable
 from typing import NamedTuple, TypeAlias#, TYPE_CHECKING
 
 # ~ if TYPE_CHECKING:
 from zeroconf import ServiceInfo as MDNSServiceInfo
 
+from .codec import build_command
+from .scheduler import DantePriority
 from .service import DanteService, MessageType
 from .util import (
-    NULL_HEXTET,
-    encode_integer,
     decode_protocol_version_from_mdns,
     encode_protocol_version,
 )
@@ -37,6 +38,9 @@ class DanteARCService(DanteService):
 
     MAX_CHANNELS_PER_PAGE: int = 16
 
+    # How many pages of channels to request from a device at once
+    PAGE_REQUESTS_IN_FLIGHT: int = 4
+
 
     @classmethod
     def build_service_descriptor(cls, mdns_service_info: MDNSServiceInfo) -> DanteARCServiceDescriptor:
@@ -58,25 +62,40 @@ class DanteARCService(DanteService):
         command_code: bytes,
         command_body: tuple,
         callback: CommandCallback | None = None,
-    ) -> None:
+        timeout: float | None = None,
+        retries: int | None = None,
+        priority: DantePriority = DantePriority.INTERACTIVE,
+    ) -> asyncio.Future:
+        '''
+        Send a command to a device, returning a future that resolves to its response.
+
+        If given, `callback` is called with the response before the future resolves. Unanswered
+        commands are resent as per `DanteService._request()`. Commands refreshing what we know of
+        the device, rather than asked for by someone waiting on them, should be sent with a
+        `priority` of `BULK`.
+        '''
         port = device.arc.port
         ipv4 = device.ipv4
-        message_idx = self._message_index.generate()
+        message_idx = self._message_store.next_id()
 
-        command = b''.join((
+        command = build_command(
             encode_protocol_version(device.arc.protocol_version),
-            NULL_HEXTET, # message length, calculated below
-            encode_integer(message_idx),
+            message_idx,
             command_code,
             MessageType.SEND,
-            *command_body,
-        ))
-        command = command[:2] + encode_integer(len(command)) + command[4:]
-
-        self._message_store[message_idx] = {
-            'device': device,
-            'command_code': command_code,
-            'command': command,
-            'callback': callback,
-        }
-        self._send_queue.put(((str(ipv4), port), command))
+            command_body,
+        )
+
+        return self._request(
+            message_idx,
+            (str(ipv4), port),
+            command,
+            {
+                'device': device,
+                'command_code': command_code,
+                'callback': callback,
+            },
+            timeout,
+            retries,
+            priority,
+        )
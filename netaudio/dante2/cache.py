@@ -0,0 +1,164 @@
+# pylint: disable=protected-access
+from __future__ import annotations
+import ipaddress
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .arc_service import DanteARCServiceDescriptor
+from .channel import DanteChannelType
+from .cmc_service import DanteCMCServiceDescriptor
+from .dbc_service import DanteDBCServiceDescriptor
+from .device import DanteDevice
+from .subscription import DanteSubscriptionStatus
+from .util import LOGGER
+
+if TYPE_CHECKING:
+    from .application import DanteApplication
+
+
+class DanteDeviceCache:
+    '''
+    An on-disk record of the devices last seen on the network (their service descriptors, channels
+    and subscriptions), so that they may be served immediately on startup, instead of waiting for
+    every device to be rediscovered and queried from scratch.
+
+    Entries are keyed by each device's mDNS server name and ARC protocol version, so a device whose
+    firmware has since been updated isn't mistaken for its former self.
+    '''
+
+    FORMAT_VERSION: int = 1
+
+    def __init__(self, path: str | Path | None = None):
+        if path is None:
+            cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+            path = Path(cache_home) / 'netaudio' / 'dante2-devices.json'
+        self._path: Path = Path(path)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @staticmethod
+    def key(server_name: str, arc_protocol_version: tuple) -> str:
+        return f"{server_name}@{'.'.join(str(x) for x in arc_protocol_version)}"
+
+    def load(self, application: DanteApplication) -> list[tuple[DanteDevice, dict]]:
+        '''
+        Recreate the cached devices (without querying them), each paired with its cache entry.
+        Their channels are restored separately, by `restore_channels()`, once the devices have
+        been registered with the application.
+
+        Returns an empty list should the cache be missing or unreadable.
+        '''
+        try:
+            with open(self._path, encoding='utf-8') as cache_file:
+                cached = json.load(cache_file)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as error:
+            LOGGER.warning("Ignoring unreadable device cache %s: %s", self._path, error)
+            return []
+
+        if cached.get('version') != self.FORMAT_VERSION:
+            return []
+
+        restored = []
+        for entry in cached['devices'].values():
+            device = DanteDevice(application, self._decode_descriptors(entry), request_info=False)
+            device._name = entry['name']
+            device._sample_rate = entry['sample_rate']
+            device._channel_counts = {
+                DanteChannelType.RX: entry['channel_counts']['rx'],
+                DanteChannelType.TX: entry['channel_counts']['tx'],
+            }
+            restored.append((device, entry))
+
+        return restored
+
+    @staticmethod
+    def restore_channels(restored: list[tuple[DanteDevice, dict]]) -> None:
+        # TX channels first, so that RX channels subscribed to them have something to link to
+        for device, entry in restored:
+            for channel in entry['tx_channels']:
+                device._update_tx_channel(channel['number'], channel['name'])
+
+        for device, entry in restored:
+            for channel in entry['rx_channels']:
+                device._update_rx_channel(
+                    channel['number'],
+                    channel['name'],
+                    DanteSubscriptionStatus.derive(channel['status']),
+                    channel['tx_device'],
+                    channel['tx_channel'],
+                    DanteSubscriptionStatus.derive(channel['subscription_status']),
+                )
+
+    def save(self, devices: list[DanteDevice]) -> None:
+        '''Replace the cache with the given devices. Those not yet named are skipped.'''
+        entries = {}
+        for device in devices:
+            if not device.name or not device.server_name:
+                continue
+            entries[self.key(device.server_name, device.arc.protocol_version)] = self._encode_device(device)
+
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self._path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as cache_file:
+                json.dump({'version': self.FORMAT_VERSION, 'devices': entries}, cache_file)
+            os.replace(temp_path, self._path)
+        except OSError as error:
+            LOGGER.warning("Unable to write device cache %s: %s", self._path, error)
+
+    @staticmethod
+    def _decode_descriptors(entry: dict) -> dict:
+        return {
+            'server_name': entry['server_name'],
+            'ipv4': ipaddress.IPv4Address(entry['ipv4']),
+            'arc': DanteARCServiceDescriptor(entry['arc']['port'], tuple(entry['arc']['protocol_version'])),
+            'cmc': DanteCMCServiceDescriptor(entry['cmc']['port'], tuple(entry['cmc']['protocol_version'])),
+            'dbc': DanteDBCServiceDescriptor(entry['dbc']['port']),
+        }
+
+    @staticmethod
+    def _encode_device(device: DanteDevice) -> dict:
+        rx_channels = []
+        for channel in device.rx_channels:
+            subscription = channel.subscription
+            tx_channel = subscription.tx_channel if subscription else None
+            if tx_channel is None:
+                tx_device_name = None
+            elif isinstance(tx_channel.device, str):
+                tx_device_name = tx_channel.device
+            else:
+                tx_device_name = tx_channel.device.name
+            rx_channels.append({
+                'number': channel.number,
+                'name': channel.name,
+                'status': channel.status.value if channel.status else None,
+                'tx_device': tx_device_name,
+                'tx_channel': tx_channel.name if tx_channel else None,
+                'subscription_status': subscription.status.value if subscription and subscription.status else None,
+            })
+
+        return {
+            'server_name': device.server_name,
+            'ipv4': str(device.ipv4),
+            'arc': device.arc._asdict(),
+            'cmc': device.cmc._asdict(),
+            'dbc': device.dbc._asdict(),
+            'name': device.name,
+            'sample_rate': device._sample_rate,
+            'channel_counts': {
+                'rx': device._channel_counts[DanteChannelType.RX],
+                'tx': device._channel_counts[DanteChannelType.TX],
+            },
+            'tx_channels': [
+                {'number': channel.number, 'name': channel.name}
+                for channel in device.tx_channels
+                if channel.number > 0
+            ],
+            'rx_channels': rx_channels,
+        }
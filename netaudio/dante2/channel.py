@@ -1,4 +1,5 @@
 from __future__ import annotations
+import asyncio
 from enum import Enum
 from typing import TYPE_CHECKING
 
@@ -59,17 +60,21 @@ class _DanteChannel:
             # ~ "volume": self._volume,
         }
 
-    def reset_name(self):
-        self.set_name('')
+    def reset_name(self) -> asyncio.Future | None:
+        return self.set_name('')
 
-    def set_name(self, new_name: str) -> None:
+    def set_name(self, new_name: str, refresh: bool = True) -> asyncio.Future | None:
+        '''
+        Rename the channel. Unless `refresh` is cleared (such as when renaming many channels at once,
+        to be refreshed together afterwards), our view of the channel is then updated.
+        '''
         raise NotImplementedError
 
-    def _set_name(self, code: bytes, preamble: tuple[bytes], new_name: str) -> None:
+    def _set_name(self, code: bytes, preamble: tuple[bytes], new_name: str, refresh: bool = True) -> asyncio.Future | None:
         # pylint: disable=unused-private-member
         # (Is used in child classes)
         if not self._device or isinstance(self._device, str):
-            return
+            return None
 
         preamble = b''.join(preamble)
         body = (
@@ -78,7 +83,8 @@ class _DanteChannel:
             # packet traces had null hextets here, for padding(?): 23/30/2 for RX; 47/45/0 for TX (2.8.9, 2.8.1, 2.7.x)
             encode_string(new_name),
         )
-        self._app.arc_service.command(self._device, code, body, callback=self.__cb_set_name)
+        callback = self.__cb_set_name if refresh else None
+        return self._app.arc_service.command(self._device, code, body, callback=callback)
 
     def __cb_set_name(self, response: bytes) -> None:
         protocol_version = self._device.arc.protocol_version
@@ -105,7 +111,7 @@ class _DanteChannel:
                 self._device.request_rx_channels()
             return
 
-        self._name = decode_string(response, name_ptr)
+        self._device._rename_channel(self, decode_string(response, name_ptr)) # TODO: internal access
 
     def _validate_name(self, name: str) -> str:
         # * max. 31 chars
@@ -167,9 +173,9 @@ class DanteRxChannel(_DanteChannel):
     def __str__(self):
         return f"{self._name}@{self._device.name}"
 
-    def set_name(self, new_name: str) -> None:
+    def set_name(self, new_name: str, refresh: bool = True) -> asyncio.Future | None:
         if new_name == self._name:
-            return
+            return None
         protocol_version = self._device.arc.protocol_version
         new_name = self._validate_name(new_name)
         if protocol_version >= (2, 8, 2):
@@ -187,12 +193,16 @@ class DanteRxChannel(_DanteChannel):
                 b'\x00\x01',    # must be > 1; packet traces had b'\x10\x01' (2, 8, 1) and b'\x02\x01'
                 encode_integer(self._number),
             )
-        self._set_name(code, preamble, new_name)
+        return self._set_name(code, preamble, new_name, refresh)
 
-    def subscribe(self, tx_channel: DanteTxChannel) -> None:
+    def subscribe(self, tx_channel: DanteTxChannel, refresh: bool = True) -> asyncio.Future | None:
+        '''
+        Subscribe to a TX channel. Unless `refresh` is cleared (such as when subscribing many channels
+        at once, to be refreshed together afterwards), the device's RX channels are then requested again.
+        '''
         if tx_channel == self._subscription.tx_channel:
             # Already subscribed to this channel
-            return
+            return None
 
         protocol_version = self._device.arc.protocol_version
         if protocol_version >= (2, 8, 2):
@@ -225,11 +235,15 @@ class DanteRxChannel(_DanteChannel):
             tx_channel_name_encoded,
             encode_string(tx_channel.device.name),
         )
-        self._app.arc_service.command(self._device, code, body)
+        callback = self.__cb_subscription_change if refresh else None
+        return self._app.arc_service.command(self._device, code, body, callback=callback)
+
+    def __cb_subscription_change(self, response: bytes) -> None:
+        # pylint: disable=unused-argument
         # Response doesn't appear to contain anything of import, so request all RX channels again.
         self._device.request_rx_channels()
 
-    def unsubscribe(self) -> None:
+    def unsubscribe(self, refresh: bool = True) -> asyncio.Future:
         protocol_version = self._device.arc.protocol_version
         if protocol_version >= (2, 8, 2):
             code = b'\x34\x10'
@@ -257,9 +271,8 @@ class DanteRxChannel(_DanteChannel):
                 # ~ encode_integer(self._number),
             # ~ )
 
-        self._app.arc_service.command(self._device, code, body)
-        # Response doesn't appear to contain anything of import, so request all RX channels again.
-        self._device.request_rx_channels()
+        callback = self.__cb_subscription_change if refresh else None
+        return self._app.arc_service.command(self._device, code, body, callback=callback)
 
 
 class DanteTxChannel(_DanteChannel):
@@ -297,9 +310,9 @@ class DanteTxChannel(_DanteChannel):
             "subscribing": [str(sub.rx_channel) for sub in self._subscriptions],
         }
 
-    def set_name(self, new_name: str) -> None:
+    def set_name(self, new_name: str, refresh: bool = True) -> asyncio.Future | None:
         if new_name == self._name:
-            return
+            return None
         protocol_version = self._device.arc.protocol_version
         new_name = self._validate_name(new_name)
         if protocol_version >= (2, 8, 2):
@@ -318,4 +331,4 @@ class DanteTxChannel(_DanteChannel):
                 NULL_HEXTET,
                 encode_integer(self._number),
             )
-        self._set_name(code, preamble, new_name)
+        return self._set_name(code, preamble, new_name, refresh)
@@ -1,9 +1,11 @@
 # ~ from __future__ import annotations
+import logging
 from typing import NamedTuple#, TYPE_CHECKING
 
 # ~ if TYPE_CHECKING:
 from zeroconf import ServiceInfo as MDNSServiceInfo
 
+from .codec import build_command
 from .service import DanteService, MessageType
 from .util import (
     NULL_HEXTET,
@@ -52,27 +54,25 @@ class DanteCMCService(DanteService):
     ) -> None:
         port = device.cmc.port
         ipv4 = device.ipv4
-        message_idx = self._message_index.generate()
+        message_idx = self._message_store.next_id()
 
-        command = b''.join((
+        command = build_command(
             encode_protocol_version(device.cmc.protocol_version),
-            NULL_HEXTET,    # message length, calculated below
-            encode_integer(message_idx),
+            message_idx,
             command_code,
             MessageType.SEND,
-            *command_body,
-        ))
-        command = command[:2] + encode_integer(len(command)) + command[4:]
+            command_body,
+        )
 
-        self._message_store[message_idx] = {
+        self._message_store.put(message_idx, {
             'device': device,
             'command_code': command_code,
             'command': command,
             # ~ 'callback': callback,
-        }
+        })
 
-        print(command)
-        self._send_queue.put(((str(ipv4), port), command))
+        logging.debug("CMC command to %s: %s", device.name, command.hex())
+        self.send(command, (str(ipv4), port))
 
     def _get_lengths(self, device_name: str):
         length = len(device_name)
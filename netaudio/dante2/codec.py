@@ -0,0 +1,80 @@
+'''
+Encoding and decoding of the fields of Dante messages, copying as little as possible.
+
+Fields are read in place (with precompiled `struct` layouts, and `bytes.index()` for strings) rather
+than by slicing them out first; and messages are joined into a single `bytearray`, with the header
+packed into it, rather than joined and then sliced apart and joined again to patch in their length.
+'''
+from __future__ import annotations
+import struct
+from typing import Iterable
+
+UINT8 = struct.Struct('>B')
+UINT16 = struct.Struct('>H')
+UINT32 = struct.Struct('>I')
+
+_INTEGERS: dict[int, struct.Struct] = {1: UINT8, 2: UINT16, 4: UINT32}
+
+# The header of ARC and CMC messages: protocol version, message length, message ID, command code,
+# and message type
+HEADER = struct.Struct('>2sHH2s2s')
+_BLANK_HEADER = bytes(HEADER.size)
+
+# Where messages' length is, in the header of every service
+LENGTH_OFFSET: int = 2
+
+
+def decode_integer(source: bytes, ptr: int, length: int = 2) -> int:
+    layout = _INTEGERS.get(length)
+    if layout is not None:
+        try:
+            return layout.unpack_from(source, ptr)[0]
+        except struct.error:
+            # Runs off the end of the message; decoded as far as it goes, as ever it was
+            pass
+    return int.from_bytes(memoryview(source)[ptr : ptr + length], byteorder='big')
+
+def encode_integer(integer: int, length: int = 2) -> bytes:
+    layout = _INTEGERS.get(length)
+    if layout is not None and 0 <= integer < 1 << (8 * length):
+        return layout.pack(integer)
+    return integer.to_bytes(length, byteorder='big')
+
+
+def decode_string(source: bytes, ptr: int) -> str | None:
+    '''The NUL-terminated string at `ptr`; or None if `ptr` is zero (as is a missing string's).'''
+    if not ptr:
+        return None
+    try:
+        end = source.index(b'\x00', ptr)
+    except AttributeError:
+        # A memoryview, which can't be searched
+        source = source.tobytes()
+        end = source.index(b'\x00', ptr)
+    # Only the string itself is copied
+    return source[ptr:end].decode('ascii')
+
+def encode_string(string: str) -> bytes:
+    return string.encode('ascii') + b'\x00'
+
+
+def build_message(parts: Iterable[bytes]) -> bytearray:
+    '''
+    Join the parts of a message into one new buffer, patching its length into the header (where the
+    parts should leave a placeholder).
+    '''
+    message = bytearray().join(parts)
+    UINT16.pack_into(message, LENGTH_OFFSET, len(message))
+    return message
+
+def build_command(
+    protocol_version: bytes,
+    message_id: int,
+    command_code: bytes,
+    message_type: bytes,
+    body: Iterable[bytes],
+) -> bytearray:
+    '''An ARC or CMC command: the body joined behind room for the header, which is packed in after.'''
+    message = bytearray().join((_BLANK_HEADER, *body))
+    HEADER.pack_into(message, 0, protocol_version, len(message), message_id, command_code, message_type)
+    return message
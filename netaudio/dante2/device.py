@@ -2,10 +2,14 @@
 # pylint: disable=protected-access
 
 from __future__ import annotations
+import asyncio
+import functools
 import math
 from typing import TypeAlias, TYPE_CHECKING
 
 from .channel import DanteChannelType, DanteRxChannel, DanteTxChannel
+from .scheduler import DantePriority
+from .schema import get_page_decoder, RX_CHANNELS, TX_CHANNELS, TX_CHANNEL_NAMES
 from .subscription import DanteSubscription, DanteSubscriptionStatus
 from .util import (
     decode_integer,
@@ -31,7 +35,7 @@ ChannelContainer: TypeAlias = dict[DanteChannelType.RX: list[DanteRxChannel], Da
 
 class DanteDevice:
 
-    def __init__(self, application: DanteApplication, service_descriptors: dict = {}):
+    def __init__(self, application: DanteApplication, service_descriptors: dict = {}, request_info: bool = True):
         self._app: DanteApplication = application
 
         self._service_descriptors = service_descriptors
@@ -42,8 +46,16 @@ class DanteDevice:
         self._channel_counts: ChannelCounts = {DanteChannelType.RX: 0, DanteChannelType.TX: 0}
         self._channels: ChannelContainer = {DanteChannelType.RX: [], DanteChannelType.TX: []}
 
-        self.request_name()
-        self.request_all_channels()
+        # Indexes of the above, by lower-cased name and by number
+        self._channels_by_name: dict = {DanteChannelType.RX: {}, DanteChannelType.TX: {}}
+        self._channels_by_number: dict = {DanteChannelType.RX: {}, DanteChannelType.TX: {}}
+
+        # Number of information requests (name, channels, etc.) yet to be answered (or time out)
+        self._outstanding: int = 0
+
+        if request_info:
+            self.request_name()
+            self.request_all_channels()
 
     @property
     def arc(self) -> DanteARCServiceDescriptor:
@@ -59,12 +71,27 @@ class DanteDevice:
 
     @property
     def ipv4(self):
-        return self._service_descriptors['ipv4']
+        return self._service_descriptors.get('ipv4')
+
+    @property
+    def is_online(self) -> bool:
+        '''False once the device has stopped sending heartbeats (see `DanteLivenessTracker`).'''
+        return not self._app.liveness.is_offline(self)
+
+    @property
+    def is_ready(self) -> bool:
+        '''Whether all requests for information about this device have been answered.'''
+        return self._outstanding == 0
 
     @property
     def name(self):
         return self._name
 
+    @property
+    def server_name(self) -> str | None:
+        '''The mDNS hostname of this device. Unlike its name, this doesn't change.'''
+        return self._service_descriptors.get('server_name')
+
     @property
     def rx_channels(self):
         return self._channels[DanteChannelType.RX]
@@ -79,27 +106,63 @@ class DanteDevice:
 
     def get_channel_by_name(self, channel_type: DanteChannelType, channel_name: str) -> DanteRxChannel | DanteTxChannel | None:
         # Names are unique on the device, but case-insensitive
-        channel_name = channel_name.lower()
-        try:
-            return next(
-                filter(
-                    lambda chan: chan.name.lower() == channel_name,
-                    self._channels[channel_type]
-                )
-            )
-        except StopIteration:
+        if not channel_name:
             return None
+        return self._channels_by_name[channel_type].get(channel_name.lower())
 
     def get_channel_by_number(self, channel_type: DanteChannelType, channel_number: int) -> DanteRxChannel | DanteTxChannel | None:
-        try:
-            return next(
-                filter(
-                    lambda chan: chan.number == channel_number,
-                    self._channels[channel_type]
-                )
-            )
-        except StopIteration:
-            return None
+        return self._channels_by_number[channel_type].get(channel_number)
+
+    def has_service(self, service_type_short: str) -> bool:
+        '''Whether the device has been discovered offering a service, such as 'cmc'.'''
+        return service_type_short in self._service_descriptors
+
+    def _add_channel(self, channel: DanteRxChannel | DanteTxChannel) -> None:
+        self._channels[channel.TYPE].append(channel)
+        self._index_channel(channel)
+
+    def _remove_channel(self, channel: DanteRxChannel | DanteTxChannel) -> None:
+        self._channels[channel.TYPE].remove(channel)
+        self._unindex_channel(channel)
+
+    def _rename_channel(self, channel: DanteRxChannel | DanteTxChannel, name: str) -> None:
+        self._unindex_channel(channel)
+        channel._name = name
+        self._index_channel(channel)
+
+    def _renumber_channel(self, channel: DanteRxChannel | DanteTxChannel, number: int) -> None:
+        self._unindex_channel(channel)
+        channel._number = number
+        self._index_channel(channel)
+
+    def _index_channel(self, channel: DanteRxChannel | DanteTxChannel) -> None:
+        if channel.name:
+            self._channels_by_name[channel.TYPE][channel.name.lower()] = channel
+        # Channels known only from another device's subscription have no number (yet)
+        if channel.number > 0:
+            self._channels_by_number[channel.TYPE][channel.number] = channel
+
+    def _unindex_channel(self, channel: DanteRxChannel | DanteTxChannel) -> None:
+        if channel.name and self._channels_by_name[channel.TYPE].get(channel.name.lower()) is channel:
+            del self._channels_by_name[channel.TYPE][channel.name.lower()]
+        if self._channels_by_number[channel.TYPE].get(channel.number) is channel:
+            del self._channels_by_number[channel.TYPE][channel.number]
+
+    def _set_name(self, name: str) -> None:
+        old_name = self._name
+        self._name = name
+        if name != old_name:
+            self._app._reindex_device(self, old_name)
+
+    def _track(self, future: asyncio.Future) -> asyncio.Future:
+        self._outstanding = self._outstanding + 1
+        future.add_done_callback(self.__cb_untrack)
+        return future
+
+    def __cb_untrack(self, future: asyncio.Future) -> None:
+        # pylint: disable=unused-argument
+        self._outstanding = self._outstanding - 1
+        self._app.notify_activity()
 
     def json(self):
         return {
@@ -116,8 +179,12 @@ class DanteDevice:
             # ~ "tx_channels": self.tx_channels,
         }
 
-    def request_all_channels(self) -> None:
-        self._app.arc_service.command(self, b'\x10\x00', (), callback=self.__cb_request_all_channels)
+    def request_all_channels(self) -> asyncio.Future:
+        return self._track(
+            self._app.arc_service.command(
+                self, b'\x10\x00', (), callback=self.__cb_request_all_channels, priority=DantePriority.BULK
+            )
+        )
 
     def __cb_request_all_channels(self, response: bytes) -> None:
         self._channel_counts = {
@@ -127,303 +194,311 @@ class DanteDevice:
         self.request_tx_channels()
         self.request_rx_channels()
 
-    def request_device_info(self) -> None:
-        self._app.arc_service.command(self, b'\x10\x03', (), callback=self.__cb_request_device_info)
+    def revalidate(self) -> asyncio.Future:
+        '''
+        Check that what we know of this device (perhaps from a cache) is still current, by asking
+        for its name and channel counts. Should the counts have changed, the channels are requested
+        again.
+        '''
+        return asyncio.gather(
+            self.request_name(),
+            self._track(
+                self._app.arc_service.command(
+                    self, b'\x10\x00', (), callback=self.__cb_revalidate_channel_counts, priority=DantePriority.BULK
+                )
+            ),
+        )
+
+    def __cb_revalidate_channel_counts(self, response: bytes) -> None:
+        channel_counts = {
+            DanteChannelType.RX: decode_integer(response, 14),
+            DanteChannelType.TX: decode_integer(response, 12),
+        }
+        if channel_counts == self._channel_counts:
+            return
+
+        for channel_type, count in channel_counts.items():
+            for channel in list(self._channels[channel_type]):
+                if channel.number > count:
+                    self._remove_channel(channel)
+        self.__cb_request_all_channels(response)
+
+    def request_device_info(self) -> asyncio.Future:
+        return self._app.arc_service.command(
+            self, b'\x10\x03', (), callback=self.__cb_request_device_info, priority=DantePriority.BULK
+        )
 
     def __cb_request_device_info(self, response: bytes) -> None:
-        self._name = decode_string(response, decode_integer(response, 22)) # or 26
+        self._set_name(decode_string(response, decode_integer(response, 22))) # or 26
         # ~ model = decode_string(response, decode_integer(response, 24))
         # ~ manufacturer = decode_string(response, decode_integer(response, 16))
         # ~ debug_string = decode_string(response, decode_integer(response, 18))
 
-    def request_name(self) -> None:
-        self._app.arc_service.command(self, b'\x10\x02', (), callback=self.__cb_request_name)
+    def request_name(self) -> asyncio.Future:
+        return self._track(
+            self._app.arc_service.command(
+                self, b'\x10\x02', (), callback=self.__cb_request_name, priority=DantePriority.BULK
+            )
+        )
 
     def __cb_request_name(self, response: bytes) -> None:
-        self._name = decode_string(response, 10)
-
-    def request_rx_channels(self) -> None:
-        protocol_version = self.arc.protocol_version
-        rx_count = self._channel_counts[DanteChannelType.RX]
-        for page in range(math.ceil(rx_count / self._app.arc_service.MAX_CHANNELS_PER_PAGE)):
-            if protocol_version >= (2, 8, 2):
-                code = b'\x34\x00'
-                # TODO: One of the \x00\x01 hextets is the page num. Determine which one.
-                body = (
-                    NULL_HEXTET * 3,
-                    b'\x00\x01',
-                    b'\x00\x01',
-                    b'\x00\x01',
-                    NULL_HEXTET * 6,
-                )
-            else:
-                code = b'\x30\x00'
-                body = (
-                    b'\x00\x01',
-                    encode_integer((page << 4) + 1),
-                    NULL_HEXTET,
-                )
+        self._set_name(decode_string(response, 10))
 
-            self._app.arc_service.command(self, code, body, callback=self.__cb_request_rx_channels)
+    def _request_pages(self, channel_type: DanteChannelType, request_page) -> asyncio.Future:
+        '''
+        Request every page of channels of the given type, keeping a few requests in flight at once.
 
-    def __cb_request_rx_channels(self, response: bytes) -> None:
-        protocol_version = self.arc.protocol_version
-        rx_count = self._channel_counts[DanteChannelType.RX]
-
-        # TODO: get page from response
-        page = 1
+        `request_page` is called with each (zero-indexed) page number, and should return the
+        future of the command requesting it. Returns a future that resolves once all pages have
+        been answered (or timed out).
+        '''
+        arc_service = self._app.arc_service
+        page_count = math.ceil(self._channel_counts[channel_type] / arc_service.MAX_CHANNELS_PER_PAGE)
+        window = asyncio.Semaphore(arc_service.PAGE_REQUESTS_IN_FLIGHT)
 
-        # Properties common to all channels on this device
-        # (Location of this is specified inside each specific channel definition)
-        common_definition = None
+        async def _request(page: int) -> None:
+            async with window:
+                await request_page(page)
 
-        for index in range(self._app.arc_service.channels_on_page(page, rx_count)):
-            if protocol_version >= (2, 8, 2):
-                def_start_ptr = 18
-                definition_length = 56
+        async def _request_all() -> None:
+            await asyncio.gather(*[_request(page) for page in range(page_count)], return_exceptions=True)
+            # Pages may have been answered out of order
+            self._channels[channel_type].sort(key=lambda channel: channel.number)
 
-                definition_start = decode_integer(response, def_start_ptr + 2 * index)
-                definition_end = definition_start + definition_length
-                channel_definition = response[definition_start:definition_end]
+        return self._track(self._app.service_loop.loop.create_task(_request_all()))
 
-                common_definition_ptr = 22
+    def request_rx_channels(self) -> asyncio.Future:
+        return self._request_pages(DanteChannelType.RX, self._request_rx_channels_page)
 
-                rx_channel_name = decode_string(response, decode_integer(channel_definition, 20))
-                rx_channel_number = decode_integer(channel_definition, 2)
-                rx_channel_status = DanteSubscriptionStatus.derive(
-                    decode_integer(channel_definition, 50)
-                )
+    def _request_rx_channels_page(self, page: int) -> asyncio.Future:
+        protocol_version = self.arc.protocol_version
+        if protocol_version >= (2, 8, 2):
+            code = b'\x34\x00'
+            body = (
+                NULL_HEXTET * 3,
+                b'\x00\x01',
+                b'\x00\x01',
+                # The first channel on the page, as other commands have the channel number here
+                encode_integer(page * self._app.arc_service.MAX_CHANNELS_PER_PAGE + 1),
+                NULL_HEXTET * 6,
+            )
+        else:
+            code = b'\x30\x00'
+            body = (
+                b'\x00\x01',
+                encode_integer((page << 4) + 1),
+                NULL_HEXTET,
+            )
 
-                tx_channel_name = decode_string(response, decode_integer(channel_definition, 44))
-                tx_device_name = decode_string(response, decode_integer(channel_definition, 46))
+        return self._app.arc_service.command(
+            self,
+            code,
+            body,
+            callback=functools.partial(self.__cb_request_rx_channels, page),
+            priority=DantePriority.BULK,
+        )
 
-                subscription_status = DanteSubscriptionStatus.derive(
-                    decode_integer(channel_definition, 48)
-                )
+    def __cb_request_rx_channels(self, page: int, response: bytes) -> None:
+        decoder = get_page_decoder(RX_CHANNELS, self.arc.protocol_version)
+        count = self._app.arc_service.channels_on_page(page + 1, self._channel_counts[DanteChannelType.RX])
+        channels = decoder.decode(response, count)
+
+        for channel in channels:
+            self._update_rx_channel(
+                channel.number,
+                channel.name,
+                DanteSubscriptionStatus.derive(channel.status),
+                channel.tx_device_name,
+                channel.tx_channel_name,
+                DanteSubscriptionStatus.derive(channel.subscription_status),
+            )
 
+        if channels and not self._sample_rate:
+            # Properties common to all channels on this device are pointed to from each definition
+            self._sample_rate = decode_integer(response, channels[0].common, 4)
+
+    def _update_rx_channel(
+        self,
+        rx_channel_number: int,
+        rx_channel_name: str,
+        rx_channel_status: DanteSubscriptionStatus | None,
+        tx_device_name: str | None,
+        tx_channel_name: str | None,
+        subscription_status: DanteSubscriptionStatus | None,
+    ) -> DanteRxChannel:
+        '''
+        Create or update an RX channel, linking it to the TX channel it's subscribed to.
+
+        A `tx_device_name` of '.' refers to this device.
+        '''
+        rx_channel = self.get_channel_by_number(DanteChannelType.RX, rx_channel_number)
+        if not rx_channel:
+            rx_channel = DanteRxChannel(
+                application = self._app,
+                device = self,
+                number = rx_channel_number,
+                name = rx_channel_name,
+                status = rx_channel_status,
+            )
+            self._add_channel(rx_channel)
+            subscription = None
+        else:
+            if rx_channel.name != rx_channel_name:
+                self._rename_channel(rx_channel, rx_channel_name)
+            # TODO: internal access
+            rx_channel._status = rx_channel_status
+            subscription = rx_channel.subscription
+
+        if not tx_device_name:
+            tx_channel = None
+        else:
+            if tx_device_name == '.':
+                tx_device = self
             else:
-                def_start = 12
-                definition_length = 16
-
-                definition_start = def_start + 20 * index
-                definition_end = definition_start + definition_length
-                channel_definition = response[definition_start:definition_end]
-
-                common_definition_ptr = 4
-
-                rx_channel_name = decode_string(response, decode_integer(channel_definition, 10))
-                rx_channel_number = decode_integer(channel_definition, 0)
-                rx_channel_status = DanteSubscriptionStatus.derive(
-                    decode_integer(channel_definition, 12)
-                )
+                tx_device = self._app.get_device_by_name(tx_device_name)
 
-                tx_channel_name = decode_string(response, decode_integer(channel_definition, 6))
-                tx_device_name = decode_string(response, decode_integer(channel_definition, 8))
-
-                subscription_status = DanteSubscriptionStatus.derive(
-                    decode_integer(channel_definition, 14)
-                )
-
-            if not common_definition:
-                definition_start = decode_integer(channel_definition, common_definition_ptr)
-                definition_end = definition_start + 16
-                common_definition = response[definition_start:definition_end]
+            if tx_device:
+                tx_channel = tx_device.get_channel_by_name(DanteChannelType.TX, tx_channel_name)
+            else:
+                tx_channel = self._app.retrieve_orphaned_tx_channel(tx_device_name, tx_channel_name)
 
-            rx_channel = self.get_channel_by_number(DanteChannelType.RX, rx_channel_number)
-            if not rx_channel:
-                rx_channel = DanteRxChannel(
+            if not tx_channel:
+                tx_channel =  DanteTxChannel(
                     application = self._app,
-                    device = self,
-                    number = rx_channel_number,
-                    name = rx_channel_name,
-                    status = rx_channel_status,
+                    device = tx_device or tx_device_name,
+                    number = -1, # Not contained within response
+                    name = tx_channel_name,
                 )
-                self._channels[DanteChannelType.RX].append(rx_channel)
-                subscription = None
-            else:
-                # TODO: internal access
-                rx_channel._name = rx_channel_name
-                rx_channel._status = rx_channel_status
-                subscription = rx_channel.subscription
-
-            if not tx_device_name:
-                tx_channel = None
-            else:
-                if tx_device_name == '.':
-                    tx_device = self
-                else:
-                    tx_device = self._app.get_device_by_name(tx_device_name)
-
                 if tx_device:
-                    tx_channel = tx_device.get_channel_by_name(DanteChannelType.TX, tx_channel_name)
+                    tx_device._add_channel(tx_channel)
                 else:
-                    tx_channel = self._app.retrieve_orphaned_tx_channel(tx_device_name, tx_channel_name)
-
-                if not tx_channel:
-                    tx_channel =  DanteTxChannel(
-                        application = self._app,
-                        device = tx_device or tx_device_name,
-                        number = -1, # Not contained within response
-                        name = tx_channel_name,
-                    )
-                    if tx_device:
-                        tx_device._channels[DanteChannelType.TX].append(tx_channel)
-                    else:
-                        self._app.append_orphaned_tx_channel(tx_device_name, tx_channel)
-
-            if not subscription:
-                subscription = DanteSubscription(
-                    rx_channel=rx_channel,
-                    tx_channel=tx_channel,
-                    status=subscription_status,
-                )
-                rx_channel._subscription = subscription # TODO: internal access
-                if tx_channel:
-                    tx_channel._subscriptions.append(subscription)  # TODO: internal access
+                    self._app.append_orphaned_tx_channel(tx_device_name, tx_channel)
+
+        if not subscription:
+            subscription = DanteSubscription(
+                rx_channel=rx_channel,
+                tx_channel=tx_channel,
+                status=subscription_status,
+            )
+            rx_channel._subscription = subscription # TODO: internal access
+            if tx_channel:
+                tx_channel._subscriptions.append(subscription)  # TODO: internal access
+        else:
+            if subscription.tx_channel and subscription.tx_channel != tx_channel:
+                subscription.tx_channel._subscriptions.remove(subscription) # TODO: internal access
+                subscription._tx_channel = tx_channel # TODO: internal access
+            elif tx_channel:
+                subscription._tx_channel = tx_channel # TODO: internal access
             else:
-                if subscription.tx_channel and subscription.tx_channel != tx_channel:
-                    subscription.tx_channel._subscriptions.remove(subscription) # TODO: internal access
-                    subscription._tx_channel = tx_channel # TODO: internal access
-                elif tx_channel:
-                    subscription._tx_channel = tx_channel # TODO: internal access
-                else:
-                    subscription._tx_channel = None # TODO: internal access
+                subscription._tx_channel = None # TODO: internal access
+
+            if tx_channel:
+                tx_channel._subscriptions.append(subscription)  # TODO: internal access
 
-                if tx_channel:
-                    tx_channel._subscriptions.append(subscription)  # TODO: internal access
+            subscription._status = subscription_status # TODO: internal access
 
-                subscription._status = subscription_status # TODO: internal access
+        return rx_channel
 
-        if not self._sample_rate:
-            self._sample_rate = decode_integer(common_definition, 0, 4)
+    def request_tx_channels(self, friendly_names: bool = False) -> asyncio.Future:
+        return self._request_pages(
+            DanteChannelType.TX,
+            functools.partial(self._request_tx_channels_page, friendly_names=friendly_names),
+        )
 
-    def request_tx_channels(self, friendly_names: bool = False) -> None:
+    def _request_tx_channels_page(self, page: int, friendly_names: bool = False) -> asyncio.Future:
         protocol_version = self.arc.protocol_version
-        tx_count = self._channel_counts[DanteChannelType.TX]
         callback = self.__cb_request_tx_channels
 
-        for page in range(math.ceil(tx_count / self._app.arc_service.MAX_CHANNELS_PER_PAGE)):
-            if protocol_version >= (2, 8, 2):
-                code = b'\x24\x00'
-                # TODO: One of the \x00\x01 hextets is the page num. Determine which one.
-                body = (
-                    NULL_HEXTET * 3,
-                    b'\x00\x01',
-                    b'\x00\x01',
-                    b'\x00\x01',
-                    NULL_HEXTET * 6,
-                )
+        if protocol_version >= (2, 8, 2):
+            code = b'\x24\x00'
+            body = (
+                NULL_HEXTET * 3,
+                b'\x00\x01',
+                b'\x00\x01',
+                # The first channel on the page, as other commands have the channel number here
+                encode_integer(page * self._app.arc_service.MAX_CHANNELS_PER_PAGE + 1),
+                NULL_HEXTET * 6,
+            )
+        else:
+            if friendly_names:
+                callback = self.__cb_request_tx_channels_friendly
+                code = b'\x20\x10'
             else:
-                if friendly_names:
-                    callback = self.__cb_request_tx_channels_friendly
-                    code = b'\x20\x10'
-                else:
-                    code = b'\x20\x00'
-                body = (
-                    b'\x00\x01',
-                    encode_integer((page << 4) + 1),
-                    NULL_HEXTET,
-                )
-
-            self._app.arc_service.command(self, code, body, callback=callback)
-
-    def __cb_request_tx_channels(self, response: bytes) -> None:
-        protocol_version = self.arc.protocol_version
-        tx_count = self._channel_counts[DanteChannelType.TX]
-
-        # TODO: Get page number from response
-        page = 1
-
-        # Properties common to all channels on this device
-        # (Location of this is specified inside each specific channel definition)
-        common_definition = None
-
-        for index in range(self._app.arc_service.channels_on_page(page, tx_count)):
-
-            if protocol_version >= (2, 8, 2):
-                definitions_start_ptr = 18
-                definition_length = 40
-
-                definition_start = decode_integer(response, definitions_start_ptr + 2 * index)
-                definition_end = definition_start + definition_length
-                channel_definition = response[definition_start:definition_end]
-
-                if not common_definition:
-                    definition_start = decode_integer(channel_definition, 22)
-                    definition_end = definition_start + 16
-                    common_definition = response[definition_start:definition_end]
-
-                channel_number = decode_integer(channel_definition, 2)
-                channel_name_default = decode_string(response, decode_integer(channel_definition, 30))
-                channel_name_friendly = decode_string(response, decode_integer(channel_definition, 20))
-
-            else: ## protocol_version < (2, 8, 2)
-
-                definitions_start = 12
-                definition_length = 8
-
-                definition_start = definitions_start + definition_length * index
-                definition_end = definition_start + definition_length
-                channel_definition = response[definition_start:definition_end]
-
-                if not common_definition:
-                    definition_start = decode_integer(channel_definition, 4)
-                    definition_end = definition_start + 16
-                    common_definition = response[definition_start:definition_end]
-
-                channel_number = decode_integer(channel_definition, 0)
-                channel_name_default = decode_string(response, decode_integer(channel_definition, 6))
-                channel_name_friendly = None # Acquired elsewhere
+                code = b'\x20\x00'
+            body = (
+                b'\x00\x01',
+                encode_integer((page << 4) + 1),
+                NULL_HEXTET,
+            )
 
-            ## endif protocol_version
+        return self._app.arc_service.command(
+            self, code, body, callback=functools.partial(callback, page), priority=DantePriority.BULK
+        )
 
-            channel = self.get_channel_by_number(DanteChannelType.TX, channel_number)
-            if not channel:
-                # If the channel was previously "orphaned", then the channel number won't be known
-                channel = self.get_channel_by_name(DanteChannelType.TX, channel_name_friendly or channel_name_default)
-                if channel:
-                    channel._number = channel_number # TODO: internal access
-                else:
-                    # If still not found, the channel is not known
-                    channel = DanteTxChannel(
-                        application = self._app,
-                        device = self,
-                        number = channel_number,
-                        name = channel_name_friendly or channel_name_default,
-                    )
-                self._channels[DanteChannelType.TX].append(channel)
+    def __cb_request_tx_channels(self, page: int, response: bytes) -> None:
+        decoder = get_page_decoder(TX_CHANNELS, self.arc.protocol_version)
+        count = self._app.arc_service.channels_on_page(page + 1, self._channel_counts[DanteChannelType.TX])
+        channels = decoder.decode(response, count)
+
+        for channel in channels:
+            # Older devices give channels' own names separately (see `TX_CHANNEL_NAMES`)
+            self._update_tx_channel(channel.number, channel.name or channel.default_name)
+
+        if channels and not self._sample_rate:
+            # Properties common to all channels on this device are pointed to from each definition
+            self._sample_rate = decode_integer(response, channels[0].common, 4)
+
+    def _update_tx_channel(self, channel_number: int, channel_name: str) -> DanteTxChannel:
+        channel = self.get_channel_by_number(DanteChannelType.TX, channel_number)
+        if not channel:
+            # If the channel was previously "orphaned", then the channel number won't be known
+            channel = self.get_channel_by_name(DanteChannelType.TX, channel_name)
+            if channel:
+                self._renumber_channel(channel, channel_number)
             else:
-                channel._name = channel_name_friendly or channel_name_default # TODO: internal access
-
-        if not self._sample_rate:
-            self._sample_rate = decode_integer(common_definition, 0, 4)
-
-    def __cb_request_tx_channels_friendly(self, device: DanteDevice, response: bytes) -> None:
-        protocol_version = self.arc.protocol_version
-        tx_count = device.channel_counts[DanteChannelType.TX]
-        if protocol_version >= (2, 8, 2):
+                # If still not found, the channel is not known
+                channel = DanteTxChannel(
+                    application = self._app,
+                    device = self,
+                    number = channel_number,
+                    name = channel_name,
+                )
+                self._add_channel(channel)
+        elif channel.name != channel_name:
+            self._rename_channel(channel, channel_name)
+
+        return channel
+
+    def _adopt_tx_channel(self, orphan: DanteTxChannel) -> None:
+        '''
+        Take on a TX channel that was subscribed to (by another device) before we were discovered.
+        '''
+        channel = self.get_channel_by_name(DanteChannelType.TX, orphan.name)
+        if not channel:
+            orphan._device = self # TODO: internal access
+            self._add_channel(orphan)
             return
 
-        # TODO: Get page number from response
-        page = 1
+        # Already known to us, so move its subscribers across
+        for subscription in orphan.subscriptions:
+            subscription._tx_channel = channel # TODO: internal access
+            channel._subscriptions.append(subscription) # TODO: internal access
 
-        definitions_start = 12
-        definition_length = 6
-        for index in range(self._app.arc_service.channels_on_page(page, tx_count)):
-            definition_start = definitions_start + definition_length * index
-            definition_end = definition_start + definition_length
-            channel_definition = response[definition_start:definition_end]
+    def __cb_request_tx_channels_friendly(self, page: int, response: bytes) -> None:
+        decoder = get_page_decoder(TX_CHANNEL_NAMES, self.arc.protocol_version)
+        if decoder is None:
+            return
 
-            channel = self.get_channel_by_number(
-                DanteChannelType.TX,
-                decode_integer(channel_definition, 2)
-            )
-            channel._name = decode_string(response, decode_integer(channel_definition, 4)) # TODO: internal access
+        count = self._app.arc_service.channels_on_page(page + 1, self._channel_counts[DanteChannelType.TX])
+        for definition in decoder.decode(response, count):
+            channel = self.get_channel_by_number(DanteChannelType.TX, definition.number)
+            if channel:
+                self._rename_channel(channel, definition.name)
 
-    def reset_name(self) -> None:
-        self.set_name('')
+    def reset_name(self) -> asyncio.Future:
+        return self.set_name('')
 
-    def set_latency(self, latency: int) -> None:
+    def set_latency(self, latency: int) -> asyncio.Future:
         latency_encoded = encode_integer(latency * 1000000, 4)
         code = b'\x11\x01'
         # TODO: Work out what the other hextets signify
@@ -442,12 +517,12 @@ class DanteDevice:
             latency_encoded,
             latency_encoded,
         )
-        self._app.arc_service.command(self, code, body, callback=self.__cb_set_latency)
+        return self._app.arc_service.command(self, code, body, callback=self.__cb_set_latency)
 
     def __cb_set_latency(self, response: bytes) -> None:
         print(response) # TODO: Process this
 
-    def set_name(self, new_name: str) -> None:
+    def set_name(self, new_name: str) -> asyncio.Future:
         # TODO: validate new name:
         # * max. 31 chars
         # * chars: `a-zA-Z0-9` and literals `-`
@@ -457,7 +532,7 @@ class DanteDevice:
         body = (
             encode_string(new_name),
         )
-        self._app.arc_service.command(self, code, body, self.__cb_set_name)
+        return self._app.arc_service.command(self, code, body, self.__cb_set_name)
 
     def __cb_set_name(self, response: bytes) -> None:
         # pylint: disable=unused-argument
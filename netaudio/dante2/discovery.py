@@ -34,6 +34,7 @@ class DanteDiscovery:
         self._zc_browser: ServiceBrowser | None = None
 
     def add_service(self, zc: Zeroconf, service_type: str, service_name: str) -> None:
+        self._app.service_loop.call(self._app.notify_activity)
         info = zc.get_service_info(service_type, service_name)
         name = info.server
         LOGGER.debug("Device %s (%s) appeared", name, service_name)
@@ -42,6 +43,7 @@ class DanteDiscovery:
             self._found[name] = {
                 **{service.SERVICE_TYPE_SHORT: None for service in self.DISCOVERABLE_SERVICE_CLASSES},
                 'ipv4': ipaddress.IPv4Address(info.parsed_addresses()[0]),
+                'server_name': name,
                 'status': DanteDiscoveryState.IN_PROGRESS,
             }
         elif self._found[name]['status'] == DanteDiscoveryState.DISCONNECTED:
@@ -62,7 +64,8 @@ class DanteDiscovery:
         if _all_present():
             if self._found[name]['status'] == DanteDiscoveryState.IN_PROGRESS:
                 self._found[name]['status'] = DanteDiscoveryState.COMPLETE
-                self._app.register_device(self._found[name])
+                # Zeroconf calls us from its own thread; devices live on the service loop
+                self._app.service_loop.call(self._app.register_device, self._found[name])
 
     def get_dante_service_from_type(self, service_type: str):
         for service in self.DISCOVERABLE_SERVICE_CLASSES:
@@ -70,11 +73,28 @@ class DanteDiscovery:
                 return service
         return None
 
+    def is_in_progress(self) -> bool:
+        '''Whether any devices have been partially, but not yet completely, discovered.'''
+        return any(
+            found['status'] == DanteDiscoveryState.IN_PROGRESS
+            for found in list(self._found.values())
+        )
+
     def remove_service(self, zc: Zeroconf, service_type: str, service_name: str) -> None:
         info = zc.get_service_info(service_type, service_name)
         name = info.server
         LOGGER.debug("Device %s (%s) disappeared", name, service_name)
 
+    def set_connected(self, server_name: str, connected: bool) -> None:
+        '''Note that a device has gone offline (or come back) without mDNS having said so.'''
+        found = self._found.get(server_name)
+        if found is None:
+            return
+        if not connected:
+            found['status'] = DanteDiscoveryState.DISCONNECTED
+        elif found['status'] == DanteDiscoveryState.DISCONNECTED:
+            found['status'] = DanteDiscoveryState.COMPLETE
+
     def start(self) -> None:
         if self._zc and self._zc.started:
             return
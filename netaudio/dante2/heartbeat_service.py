@@ -0,0 +1,42 @@
+import socket
+import struct
+
+from .service import DanteService
+from .util import LOGGER
+
+
+class DanteHeartbeatService(DanteService):
+    '''
+    Listens for the heartbeats devices multicast, feeding them to the application's liveness
+    tracker
+    '''
+    SERVICE_MCAST_GRP: str = '224.0.0.233'
+    SERVICE_PORT: int = 8708
+    SERVICE_TYPE_MDNS: None = None
+    SERVICE_TYPE_SHORT: str = 'heartbeat'
+
+    @property
+    def port(self):
+        # Heartbeats are sent to a well-known port, so unlike our other services this can't be moved
+        return self.SERVICE_PORT
+
+    def _receive(self, address, message):
+        self._app.liveness.heartbeat(address[0])
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        # Other programs (such as Dante Controller) may well be listening too
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("", self.port))
+        membership = struct.pack("4sL", socket.inet_aton(self.SERVICE_MCAST_GRP), socket.INADDR_ANY)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        return sock
+
+    def start(self):
+        try:
+            super().start()
+        except OSError as error:
+            # Not fatal: devices just won't be noticed going offline until mDNS says so
+            LOGGER.warning("Unable to listen for heartbeats: %s", error)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+import asyncio
+import math
+from typing import TYPE_CHECKING
+
+from .util import LOGGER
+
+if TYPE_CHECKING:
+    from .application import DanteApplication
+    from .device import DanteDevice
+
+
+class DanteLivenessTracker:
+    '''
+    Notices devices going offline (and coming back), by the heartbeats they multicast.
+
+    Once a device's heartbeat has been heard, it's declared offline should `miss_count` heartbeats in
+    a row go missing. Devices never heard from (such as when multicast doesn't reach us) are left
+    be.
+
+    Deadlines are kept in a timing wheel: a ring of slots, each a fraction of the heartbeat interval
+    wide, that is turned once per slot. A heartbeat moves its device to the slot a timeout ahead of
+    the current one, and whatever's in a slot when it's reached has timed out; so both cost O(1)
+    however many devices there are.
+    '''
+
+    # How often devices send heartbeats, in seconds, and how many may be missed before a device is
+    # considered offline
+    HEARTBEAT_INTERVAL: float = 1.0
+    MISS_COUNT: int = 3
+
+    # How many slots of the wheel each heartbeat interval spans
+    SLOTS_PER_INTERVAL: int = 4
+
+    def __init__(
+        self,
+        application: DanteApplication,
+        interval: float | None = None,
+        miss_count: int | None = None,
+    ):
+        self._app: DanteApplication = application
+
+        interval = self.HEARTBEAT_INTERVAL if interval is None else interval
+        miss_count = self.MISS_COUNT if miss_count is None else miss_count
+        self._tick: float = interval / self.SLOTS_PER_INTERVAL
+        # A device lands this many slots ahead, and so times out between `interval * miss_count`
+        # seconds and a tick more than that after its last heartbeat
+        self._ticks_to_timeout: int = math.ceil(miss_count * self.SLOTS_PER_INTERVAL) + 1
+
+        self._slots: list[set[str]] = [set() for _ in range(self._ticks_to_timeout + 1)]
+        self._current_slot: int = 0
+        self._current_slot_time: float | None = None
+        self._timer: asyncio.TimerHandle | None = None
+
+        # The slot each device heard from is in, by IPv4 address
+        self._slot_of: dict[str, int] = {}
+        self._devices_by_ipv4: dict[str, DanteDevice] = {}
+        self._ipv4_of: dict[DanteDevice, str] = {}
+        self._offline: set[str] = set()
+
+    def get_device(self, ipv4: str) -> DanteDevice | None:
+        '''The tracked device at the given address.'''
+        return self._devices_by_ipv4.get(ipv4)
+
+    def is_offline(self, device: DanteDevice) -> bool:
+        return self._ipv4_of.get(device) in self._offline
+
+    def track(self, device: DanteDevice) -> None:
+        '''Start (or continue, should its address have changed) tracking a device.'''
+        ipv4 = str(device.ipv4) if device.ipv4 else None
+        previous_ipv4 = self._ipv4_of.get(device)
+        if previous_ipv4 == ipv4:
+            return
+        if previous_ipv4:
+            self.untrack(device)
+        if ipv4 is None:
+            return
+        self._devices_by_ipv4[ipv4] = device
+        self._ipv4_of[device] = ipv4
+
+    def untrack(self, device: DanteDevice) -> None:
+        ipv4 = self._ipv4_of.pop(device, None)
+        if ipv4 is None:
+            return
+        self._devices_by_ipv4.pop(ipv4, None)
+        slot = self._slot_of.pop(ipv4, None)
+        if slot is not None:
+            self._slots[slot].discard(ipv4)
+        self._offline.discard(ipv4)
+
+    def heartbeat(self, ipv4: str, now: float | None = None) -> None:
+        '''Note a heartbeat from the given address.'''
+        device = self._devices_by_ipv4.get(ipv4)
+        if device is None:
+            return
+        self.advance(now)
+
+        slot = self._slot_of.get(ipv4)
+        if slot is not None:
+            self._slots[slot].discard(ipv4)
+        slot = (self._current_slot + self._ticks_to_timeout) % len(self._slots)
+        self._slots[slot].add(ipv4)
+        self._slot_of[ipv4] = slot
+
+        if ipv4 in self._offline:
+            self._offline.discard(ipv4)
+            LOGGER.info("Device %s is back online", device.name)
+            self._app._cb_device_online(device) # pylint: disable=protected-access
+
+    def advance(self, now: float | None = None) -> None:
+        '''Turn the wheel up to `now`, declaring offline the devices whose time has run out.'''
+        if now is None:
+            now = self._app.service_loop.loop.time()
+        if self._current_slot_time is None:
+            self._current_slot_time = now
+            return
+
+        # After a long stall, there's no need to go round more than once
+        ticks = min(int((now - self._current_slot_time) / self._tick), len(self._slots))
+        self._current_slot_time = self._current_slot_time + ticks * self._tick
+        if now - self._current_slot_time >= self._tick:
+            self._current_slot_time = now
+
+        for _ in range(ticks):
+            self._current_slot = (self._current_slot + 1) % len(self._slots)
+            expired = self._slots[self._current_slot]
+            if not expired:
+                continue
+            self._slots[self._current_slot] = set()
+            for ipv4 in expired:
+                del self._slot_of[ipv4]
+                self._offline.add(ipv4)
+                device = self._devices_by_ipv4[ipv4]
+                LOGGER.info("Device %s has gone offline", device.name)
+                self._app._cb_device_offline(device) # pylint: disable=protected-access
+
+    def _cb_tick(self) -> None:
+        self.advance()
+        self._timer = self._app.service_loop.loop.call_later(self._tick, self._cb_tick)
+
+    def start(self) -> None:
+        '''Start turning the wheel. Call from the service loop.'''
+        if self._timer is None:
+            self._cb_tick()
+
+    def stop(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,219 @@
+from __future__ import annotations
+import array
+import time
+from typing import NamedTuple, TYPE_CHECKING
+
+from .channel import DanteChannelType
+from .util import LOGGER
+
+if TYPE_CHECKING:
+    import asyncio
+    from .application import DanteApplication
+    from .device import DanteDevice
+
+
+class DanteMeterSnapshot(NamedTuple):
+    '''The levels of a device's channels at a moment, one byte per channel, as sent by the device.'''
+    device: DanteDevice
+    time: float
+    tx_levels: bytes
+    rx_levels: bytes
+    tx_peaks: bytes
+    rx_peaks: bytes
+
+
+class DanteDeviceMeters:
+    '''
+    The latest levels of one device's channels, and their peaks.
+
+    Levels and peaks are each kept in a bytearray, TX channels first then RX (as in the packets),
+    one byte per channel; so updating them allocates nothing.
+    '''
+
+    def __init__(self, device: DanteDevice, tx_count: int, rx_count: int):
+        self.device: DanteDevice = device
+        self.tx_count: int = tx_count
+        self.rx_count: int = rx_count
+        count = tx_count + rx_count
+        self.levels: bytearray = bytearray(count)
+        self.peaks: bytearray = bytearray(count)
+        # When each peak was set
+        self.peak_times: array.array = array.array('d', bytes(8 * count))
+        self.updated: bool = False
+
+    def update(self, message: bytes, now: float) -> None:
+        count = len(self.levels)
+        # Levels are at the end of the packet, followed by one more byte
+        end = len(message) - 1
+        self.levels[:] = memoryview(message)[end - count:end]
+
+        levels = self.levels
+        peaks = self.peaks
+        for index in range(count):
+            if levels[index] >= peaks[index]:
+                peaks[index] = levels[index]
+                self.peak_times[index] = now
+        self.updated = True
+
+    def decay(self, now: float, hold: float, amount: int) -> None:
+        '''Let peaks held longer than `hold` seconds fall by `amount`, though not below the level.'''
+        levels = self.levels
+        peaks = self.peaks
+        peak_times = self.peak_times
+        for index in range(len(peaks)):
+            if peaks[index] > levels[index] and now - peak_times[index] > hold:
+                peaks[index] = max(levels[index], peaks[index] - amount)
+
+    def snapshot(self, now: float) -> DanteMeterSnapshot:
+        tx_count = self.tx_count
+        return DanteMeterSnapshot(
+            self.device,
+            now,
+            bytes(self.levels[:tx_count]),
+            bytes(self.levels[tx_count:]),
+            bytes(self.peaks[:tx_count]),
+            bytes(self.peaks[tx_count:]),
+        )
+
+
+class DanteMetering:
+    '''
+    Decodes the volume levels devices send (once asked to, via `watch()`), and publishes snapshots
+    of them to subscribers every `publish_interval` seconds.
+
+    Whilst anyone is subscribed, every device is watched: asked to send its levels, and asked again
+    every `WATCH_RENEW_INTERVAL` seconds, as devices stop sending of their own accord a while after
+    being asked. Devices discovered meanwhile are watched from the next renewal on.
+
+    Peaks are held for `peak_hold` seconds, then fall by `peak_decay` per second.
+    '''
+
+    PUBLISH_INTERVAL: float = 0.1
+    PEAK_HOLD: float = 1.0
+    PEAK_DECAY: float = 60.0
+
+    # How long devices keep sending levels for hasn't been pinned down, so they're asked often
+    WATCH_RENEW_INTERVAL: float = 5.0
+
+    def __init__(
+        self,
+        application: DanteApplication,
+        publish_interval: float | None = None,
+        peak_hold: float | None = None,
+        peak_decay: float | None = None,
+    ):
+        self._app: DanteApplication = application
+        self.publish_interval: float = self.PUBLISH_INTERVAL if publish_interval is None else publish_interval
+        self.peak_hold: float = self.PEAK_HOLD if peak_hold is None else peak_hold
+        self.peak_decay: float = self.PEAK_DECAY if peak_decay is None else peak_decay
+
+        self._meters: dict[DanteDevice, DanteDeviceMeters] = {}
+        self._subscribers: list = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._renew_timer: asyncio.TimerHandle | None = None
+        self._watched: set[DanteDevice] = set()
+        self._last_published: float = time.monotonic()
+        self._dropped: int = 0
+
+    @property
+    def dropped(self) -> int:
+        '''How many packets have been dropped, for want of knowing how many channels their device has.'''
+        return self._dropped
+
+    def get_meters(self, device: DanteDevice) -> DanteDeviceMeters | None:
+        return self._meters.get(device)
+
+    def is_watched(self, device: DanteDevice) -> bool:
+        return device in self._watched
+
+    def watch(self, device: DanteDevice) -> None:
+        '''Ask a device to (start or keep) sending us its levels.'''
+        self._watched.add(device)
+        self._app.cmc_service._command_volume_start(device) # pylint: disable=protected-access
+
+    def unwatch(self, device: DanteDevice) -> None:
+        self._watched.discard(device)
+        self._app.cmc_service._command_volume_stop(device) # pylint: disable=protected-access
+        self._meters.pop(device, None)
+
+    def _watch_devices(self) -> None:
+        devices = {
+            device for device in self._app.devices
+            if device.name and device.is_online and device.has_service('cmc')
+        }
+        # Those gone away need no telling
+        self._watched &= devices
+        for device in devices:
+            try:
+                self.watch(device)
+            except Exception: # pylint: disable=broad-exception-caught
+                LOGGER.exception("Failed to ask %s for its levels", device.name)
+
+    def _cb_renew(self) -> None:
+        self._watch_devices()
+        self._renew_timer = self._app.service_loop.loop.call_later(self.WATCH_RENEW_INTERVAL, self._cb_renew)
+
+    def receive(self, device: DanteDevice, message: bytes) -> None:
+        '''Take in a volume level packet from a device. Call from the service loop.'''
+        meters = self._meters.get(device)
+        tx_count = device._channel_counts[DanteChannelType.TX] # pylint: disable=protected-access
+        rx_count = device._channel_counts[DanteChannelType.RX] # pylint: disable=protected-access
+        if meters is None or (meters.tx_count, meters.rx_count) != (tx_count, rx_count):
+            if not tx_count + rx_count or tx_count + rx_count >= len(message):
+                self._dropped = self._dropped + 1
+                return
+            meters = self._meters[device] = DanteDeviceMeters(device, tx_count, rx_count)
+        meters.update(message, time.monotonic())
+
+    def subscribe(self, callback) -> None:
+        '''
+        Have `callback` called (on the service loop) with a list of `DanteMeterSnapshot`s, of the
+        devices whose levels have arrived since the last call. Call from the service loop.
+        '''
+        self._subscribers.append(callback)
+        if self._timer is None:
+            self._last_published = time.monotonic()
+            self._timer = self._app.service_loop.loop.call_later(self.publish_interval, self._cb_publish)
+            self._cb_renew()
+
+    def unsubscribe(self, callback) -> None:
+        self._subscribers.remove(callback)
+        if not self._subscribers and self._timer:
+            self.stop()
+            for device in list(self._watched):
+                self.unwatch(device)
+
+    def publish(self) -> None:
+        '''Decay the peaks, and send subscribers snapshots of whatever has been updated.'''
+        now = time.monotonic()
+        amount = int(self.peak_decay * (now - self._last_published))
+        # Whilst too little time has passed to decay by at least one, let it accumulate
+        if amount:
+            self._last_published = now
+
+        snapshots = []
+        for meters in self._meters.values():
+            if amount:
+                meters.decay(now, self.peak_hold, amount)
+            if meters.updated:
+                meters.updated = False
+                snapshots.append(meters.snapshot(now))
+
+        if not snapshots:
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshots)
+            except Exception: # pylint: disable=broad-exception-caught
+                LOGGER.exception("Metering subscriber failed")
+
+    def _cb_publish(self) -> None:
+        self.publish()
+        self._timer = self._app.service_loop.loop.call_later(self.publish_interval, self._cb_publish)
+
+    def stop(self) -> None:
+        '''Stop publishing and renewing (leaving devices to stop sending levels in their own time).'''
+        for timer in (self._timer, self._renew_timer):
+            if timer:
+                timer.cancel()
+        self._timer = self._renew_timer = None
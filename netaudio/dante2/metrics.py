@@ -0,0 +1,208 @@
+'''
+Counters, gauges and histograms describing what the services are up to, exposed in the Prometheus
+text exposition format.
+
+Metrics are updated from the service loop, and may be rendered from any thread.
+'''
+import math
+import threading
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    labels = labels + extra
+    if not labels:
+        return ''
+    escaped = (
+        (name, value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    TYPE: str
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name: str = name
+        self.documentation: str = documentation
+        self.label_names: tuple[str, ...] = label_names
+        self._lock: threading.Lock = threading.Lock()
+
+    def _labels(self, labels: dict) -> Labels:
+        if labels.keys() != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, not {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.label_names)
+
+    def _samples(self) -> list[tuple[str, Labels, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.TYPE}",
+        ]
+        for name, labels, value in self._samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    '''A count that only goes up.'''
+    TYPE = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._labels(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    '''
+    A value that goes up and down. Rather than being set, a value may instead be tracked: that is,
+    read from a callback whenever the metrics are rendered.
+    '''
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[Labels, float] = {}
+        self._callbacks: dict[Labels, callable] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._labels(labels)] = value
+
+    def track(self, callback, **labels) -> None:
+        with self._lock:
+            self._callbacks[self._labels(labels)] = callback
+
+    def untrack(self, **labels) -> None:
+        with self._lock:
+            self._callbacks.pop(self._labels(labels), None)
+
+    def value(self, **labels) -> float:
+        key = self._labels(labels)
+        if key in self._callbacks:
+            return self._callbacks[key]()
+        return self._values.get(key, 0)
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+            callbacks = dict(self._callbacks)
+        values.update((labels, callback()) for labels, callback in callbacks.items())
+        return [(self.name, labels, value) for labels, value in values.items()]
+
+
+class Histogram(_Metric):
+    '''A distribution of observations (such as durations), counted into buckets.'''
+    TYPE = 'histogram'
+
+    # Suited to round trips on a LAN, in seconds
+    DEFAULT_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self._buckets: tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+        # Per set of labels: the (non-cumulative) count in each bucket, and the sum of observations
+        self._values: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * len(self._buckets), [0.0]))
+            for index, bound in enumerate(self._buckets):
+                if value <= bound:
+                    counts[index] = counts[index] + 1
+                    break
+            total[0] = total[0] + value
+
+    def count(self, **labels) -> int:
+        values = self._values.get(self._labels(labels))
+        return sum(values[0]) if values else 0
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            for labels, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self._buckets, counts):
+                    cumulative = cumulative + count
+                    samples.append((f"{self.name}_bucket", labels + (('le', _format_value(float(bound))),), cumulative))
+                samples.append((f"{self.name}_sum", labels, total[0]))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    '''
+    The metrics of a process. Asking for a metric that already exists returns it, so that several
+    services (say) can share one, distinguished by their labels.
+    '''
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"{name} is already registered as a {metric.TYPE}")
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, label_names)
+
+    def gauge(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, label_names)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = Histogram.DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, label_names, buckets)
+
+    def render(self) -> str:
+        '''The metrics, in the Prometheus text exposition format.'''
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(metric.render() + '\n' for metric in metrics)
+
+
+# Shared by every application in the process, unless given another
+REGISTRY = MetricsRegistry()
+
+# The content type of `MetricsRegistry.render()`
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
@@ -0,0 +1,270 @@
+'''
+Routing many subscriptions at once; and taking snapshots of routing, to be restored later.
+'''
+from __future__ import annotations
+import asyncio
+from typing import NamedTuple, TYPE_CHECKING
+
+from .channel import DanteChannelType
+
+if TYPE_CHECKING:
+    from .application import DanteApplication
+    from .channel import DanteRxChannel, DanteTxChannel
+    from .device import DanteDevice
+
+
+class DanteRoute(NamedTuple):
+    '''
+    An RX channel and the TX channel it should be subscribed to; or, without a TX device and
+    channel, an RX channel to be unsubscribed. Channels are given by number (an int), or by name (a
+    str; or, should no channel have that name, by number given as a str).
+    '''
+    rx_device: str
+    rx_channel: str | int
+    tx_device: str | None = None
+    tx_channel: str | int | None = None
+
+    @classmethod
+    def from_dict(cls, route: dict) -> DanteRoute:
+        return cls(
+            route['rx_device'],
+            route['rx_channel'],
+            route.get('tx_device') or None,
+            route.get('tx_channel') or None,
+        )
+
+
+class DanteRouteResult(NamedTuple):
+    route: DanteRoute
+    # Whether anything needed doing (false if already so subscribed)
+    changed: bool = False
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def json(self):
+        return {**self.route._asdict(), 'changed': self.changed, 'error': self.error}
+
+
+class DanteRenameResult(NamedTuple):
+    device: str
+    channel_type: DanteChannelType
+    number: int
+    name: str
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def json(self):
+        return {
+            'device': self.device,
+            'channel_type': self.channel_type.value,
+            'number': self.number,
+            'name': self.name,
+            'error': self.error,
+        }
+
+
+def _describe_error(error: BaseException) -> str:
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+def find_channel(
+    device: DanteDevice,
+    channel_type: DanteChannelType,
+    channel: str | int,
+) -> DanteRxChannel | DanteTxChannel | None:
+    '''A device's channel: by number if given an int; otherwise by name, or (failing that) by number.'''
+    if isinstance(channel, int):
+        return device.get_channel_by_number(channel_type, channel)
+    found = device.get_channel_by_name(channel_type, channel)
+    if found is None and channel.isdigit():
+        found = device.get_channel_by_number(channel_type, int(channel))
+    return found
+
+
+async def apply_routes(application: DanteApplication, routes: list[DanteRoute]) -> list[DanteRouteResult]:
+    '''
+    Subscribe (or unsubscribe) many RX channels at once. Run on the service loop.
+
+    The commands to each RX device are sent together, without awaiting each in turn; and once
+    they're answered, the device's RX channels are requested again the once (rather than after each
+    subscription). Returns a result per route, in the order given.
+    '''
+    results: list[DanteRouteResult | None] = [None] * len(routes)
+    # Per RX device: its RX channels' pending (un)subscriptions, with the index of their route
+    pending: dict[DanteDevice, list[tuple[int, asyncio.Future]]] = {}
+
+    for index, route in enumerate(routes):
+        rx_device = application.get_device_by_name(route.rx_device)
+        if rx_device is None:
+            results[index] = DanteRouteResult(route, error=f"No RX device named {route.rx_device}")
+            continue
+        rx_channel = find_channel(rx_device, DanteChannelType.RX, route.rx_channel)
+        if rx_channel is None:
+            results[index] = DanteRouteResult(route, error=f"No RX channel {route.rx_channel} on {route.rx_device}")
+            continue
+
+        if route.tx_channel is None:
+            if rx_channel.subscription.tx_channel is None:
+                results[index] = DanteRouteResult(route)
+                continue
+            future = rx_channel.unsubscribe(refresh=False)
+        else:
+            tx_device = application.get_device_by_name(route.tx_device) if route.tx_device else rx_device
+            if tx_device is None:
+                results[index] = DanteRouteResult(route, error=f"No TX device named {route.tx_device}")
+                continue
+            tx_channel = find_channel(tx_device, DanteChannelType.TX, route.tx_channel)
+            if tx_channel is None:
+                results[index] = DanteRouteResult(route, error=f"No TX channel {route.tx_channel} on {tx_device.name}")
+                continue
+            future = rx_channel.subscribe(tx_channel, refresh=False)
+            if future is None:
+                results[index] = DanteRouteResult(route)
+                continue
+
+        pending.setdefault(rx_device, []).append((index, future))
+
+    async def _apply(device: DanteDevice, commands: list[tuple[int, asyncio.Future]]) -> None:
+        outcomes = await asyncio.gather(*(future for _, future in commands), return_exceptions=True)
+        for (index, _), outcome in zip(commands, outcomes):
+            if isinstance(outcome, BaseException):
+                results[index] = DanteRouteResult(routes[index], error=_describe_error(outcome))
+            else:
+                results[index] = DanteRouteResult(routes[index], changed=True)
+        try:
+            await device.request_rx_channels()
+        except TimeoutError:
+            # The subscriptions were acknowledged; only our view of them is out of date
+            pass
+
+    await asyncio.gather(*(_apply(device, commands) for device, commands in pending.items()))
+    return results
+
+
+# The version of the snapshot format, should it ever need to change
+SNAPSHOT_VERSION: int = 1
+
+
+def take_snapshot(application: DanteApplication) -> dict:
+    '''
+    The names of every device's channels, and what its RX channels are subscribed to, such as can
+    be saved (as JSON) and restored later. Run on the service loop.
+    '''
+    devices = {}
+    for device in application.devices:
+        if not device.name:
+            continue
+        rx_channels = []
+        for channel in device.rx_channels:
+            tx_channel = channel.subscription.tx_channel
+            rx_channels.append({
+                'number': channel.number,
+                'name': channel.name,
+                'tx_channel': tx_channel.name if tx_channel else None,
+                'tx_device': _device_name(tx_channel) if tx_channel else None,
+            })
+        devices[device.name] = {
+            'rx_channels': rx_channels,
+            # TX channels only known of through subscriptions to them have no number
+            'tx_channels': [
+                {'number': channel.number, 'name': channel.name}
+                for channel in device.tx_channels if channel.number > 0
+            ],
+        }
+    return {'version': SNAPSHOT_VERSION, 'devices': devices}
+
+
+def _device_name(channel: DanteTxChannel) -> str:
+    # The channel's device may be known only by name, not yet having been discovered
+    return channel.device if isinstance(channel.device, str) else channel.device.name
+
+
+async def _restore_names(application: DanteApplication, snapshot: dict) -> list[DanteRenameResult]:
+    results: list[DanteRenameResult] = []
+    # Per device: the renames sent to it, with the index of their result
+    pending: dict[DanteDevice, list[tuple[int, asyncio.Future]]] = {}
+
+    for device_name, device_snapshot in snapshot['devices'].items():
+        device = application.get_device_by_name(device_name)
+        if device is None:
+            continue
+        for channel_type in DanteChannelType:
+            for channel_snapshot in device_snapshot.get(f'{channel_type.value}_channels', ()):
+                channel = device.get_channel_by_number(channel_type, channel_snapshot['number'])
+                if channel is None or channel.name == channel_snapshot['name']:
+                    continue
+                future = channel.set_name(channel_snapshot['name'], refresh=False)
+                pending.setdefault(device, []).append((len(results), future))
+                results.append(DanteRenameResult(device_name, channel_type, channel.number, channel_snapshot['name']))
+
+    async def _apply(device: DanteDevice, commands: list[tuple[int, asyncio.Future]]) -> None:
+        outcomes = await asyncio.gather(*(future for _, future in commands), return_exceptions=True)
+        for (index, _), outcome in zip(commands, outcomes):
+            if isinstance(outcome, BaseException):
+                results[index] = results[index]._replace(error=_describe_error(outcome))
+        # Subscriptions are by name, so the new names must be known before routing is compared
+        await asyncio.gather(device.request_tx_channels(), device.request_rx_channels(), return_exceptions=True)
+        if device.arc.protocol_version < (2, 8, 2):
+            # Older devices give TX channels' own names separately from their default names
+            await device.request_tx_channels(friendly_names=True)
+
+    await asyncio.gather(*(_apply(device, commands) for device, commands in pending.items()))
+    return results
+
+
+def _routing_differences(application: DanteApplication, snapshot: dict) -> list[DanteRoute]:
+    routes = []
+    for device_name, device_snapshot in snapshot['devices'].items():
+        device = application.get_device_by_name(device_name)
+        for channel_snapshot in device_snapshot.get('rx_channels', ()):
+            wanted = (channel_snapshot.get('tx_channel'), channel_snapshot.get('tx_device'))
+            channel = device.get_channel_by_number(DanteChannelType.RX, channel_snapshot['number']) if device else None
+            if channel is not None:
+                tx_channel = channel.subscription.tx_channel
+                if wanted == ((tx_channel.name, _device_name(tx_channel)) if tx_channel else (None, None)):
+                    continue
+            routes.append(DanteRoute(device_name, channel_snapshot['number'], wanted[1], wanted[0]))
+    return routes
+
+
+def _check_snapshot(snapshot: dict) -> None:
+    '''Raise `ValueError` naming the first field a snapshot lacks, before anything is changed.'''
+    if 'devices' not in snapshot:
+        raise ValueError("Snapshot missing 'devices'")
+    for device_name, device_snapshot in snapshot['devices'].items():
+        for channel_type in DanteChannelType:
+            for channel_snapshot in device_snapshot.get(f'{channel_type.value}_channels', ()):
+                for field in ('number', 'name'):
+                    if field not in channel_snapshot:
+                        raise ValueError(
+                            f"Snapshot missing '{field}' of one of {device_name}'s {channel_type.value.upper()} channels"
+                        )
+
+
+async def restore_snapshot(
+    application: DanteApplication,
+    snapshot: dict,
+    rename: bool = True,
+) -> tuple[list[DanteRenameResult], list[DanteRouteResult]]:
+    '''
+    Put the network back as it was when a snapshot was taken, changing only what differs: channels
+    are renamed only where their names differ, and only RX channels subscribed differently are
+    (un)subscribed, with `apply_routes()`. Run on the service loop.
+
+    Channel names are restored first (unless `rename` is cleared), as subscriptions are by name.
+    Names must be unique, so names swapped between channels come back suffixed (`~2`); restoring
+    again settles them.
+    '''
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {snapshot.get('version')}")
+    _check_snapshot(snapshot)
+
+    renames = await _restore_names(application, snapshot) if rename else []
+    routes = await apply_routes(application, _routing_differences(application, snapshot))
+    return renames, routes
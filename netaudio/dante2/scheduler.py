@@ -0,0 +1,187 @@
+from __future__ import annotations
+import asyncio
+from collections import deque
+from collections.abc import Callable, Hashable
+from enum import IntEnum
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .application import DanteApplication
+
+
+class DantePriority(IntEnum):
+    '''How soon a command should be sent, relative to others waiting.'''
+    # Asked for by someone waiting on it: subscribing, renaming, and suchlike
+    INTERACTIVE = 0
+    # Refreshing what we know of devices, such as when they're discovered
+    BULK = 1
+
+
+# Sends a command, returning whether it was sent (false should it have been cancelled meanwhile)
+Transmit = Callable[[], bool]
+
+
+class DanteCommandScheduler:
+    '''
+    Paces the commands sent to devices, so that discovering a large network doesn't send them all
+    at once, and cheap devices don't drop the burst (only for the commands to be resent later).
+
+    Each device has at most `window` commands awaiting a response at once; and commands are sent
+    at most `rate` per second across all devices and services (allowing bursts of `burst`), by a
+    token bucket. Interactive commands go ahead of bulk ones, and devices take turns, so one with
+    many pages of channels doesn't hold up the rest.
+
+    Commands not to any one device (such as resends of commands already in flight, and fire-and-
+    forget messages) take no place in a window, but are paced all the same.
+    '''
+
+    # Commands awaiting a response, per device
+    WINDOW: int = 8
+    # Commands per second, and how many may be sent at once after a lull
+    RATE: float = 2000.0
+    BURST: int = 200
+
+    def __init__(
+        self,
+        application: DanteApplication,
+        window: int | None = None,
+        rate: float | None = None,
+        burst: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._app: DanteApplication = application
+        self._clock: Callable[[], float] = clock
+
+        self.window: int = self.WINDOW if window is None else window
+        self.rate: float = self.RATE if rate is None else rate
+        self.burst: int = self.BURST if burst is None else burst
+
+        self._tokens: float = float(self.burst)
+        self._filled: float | None = None
+        self._timer: asyncio.TimerHandle | None = None
+
+        # Per device, then per priority: commands waiting to be sent
+        self._waiting: dict[Hashable | None, tuple[deque[Transmit], ...]] = {}
+        # Per device: commands sent and not yet released
+        self._in_flight: dict[Hashable, int] = {}
+        # Per priority: devices with commands of that priority waiting and room in their window,
+        # in the order they take turns (may hold devices that have since had neither)
+        self._ready: tuple[deque[Hashable | None], ...] = tuple(deque() for _ in DantePriority)
+        self._is_ready: tuple[set[Hashable | None], ...] = tuple(set() for _ in DantePriority)
+
+    @property
+    def waiting(self) -> int:
+        '''How many commands are waiting to be sent.'''
+        return sum(len(queue) for queues in self._waiting.values() for queue in queues)
+
+    def in_flight(self, key: Hashable) -> int:
+        '''How many commands to a device have been sent and not released.'''
+        return self._in_flight.get(key, 0)
+
+    def submit(
+        self,
+        key: Hashable | None,
+        transmit: Transmit,
+        priority: DantePriority = DantePriority.INTERACTIVE,
+    ) -> None:
+        '''
+        Send a command (by calling `transmit`) once pacing allows: immediately, if it does already.
+        Run on the service loop.
+
+        With a `key` (the device it's sent to), the command takes a place in the device's window
+        until `release()`d; `transmit` returning false releases it at once.
+        '''
+        queues = self._waiting.get(key)
+        if queues is None:
+            queues = self._waiting[key] = tuple(deque() for _ in DantePriority)
+        queues[priority].append(transmit)
+        self._mark_ready(key, priority)
+        self.pump()
+
+    def release(self, key: Hashable) -> None:
+        '''A command sent to a device has been answered (or given up on), freeing its place.'''
+        if self._release(key):
+            self.pump()
+
+    def _release(self, key: Hashable) -> bool:
+        # Returns whether the device has commands waiting
+        in_flight = self._in_flight.get(key, 0) - 1
+        if in_flight > 0:
+            self._in_flight[key] = in_flight
+        else:
+            self._in_flight.pop(key, None)
+        queues = self._waiting.get(key)
+        if queues:
+            for priority in DantePriority:
+                if queues[priority]:
+                    self._mark_ready(key, priority)
+            return True
+        return False
+
+    def _has_room(self, key: Hashable | None) -> bool:
+        return key is None or self._in_flight.get(key, 0) < self.window
+
+    def _mark_ready(self, key: Hashable | None, priority: DantePriority) -> None:
+        if key not in self._is_ready[priority] and self._has_room(key):
+            self._is_ready[priority].add(key)
+            self._ready[priority].append(key)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        if self._filled is not None:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._filled) * self.rate)
+        self._filled = now
+
+    def pump(self) -> None:
+        '''Send whatever pacing allows, in turn.'''
+        if self._timer is not None:
+            # Already waiting for tokens
+            return
+        self._refill()
+        while self._tokens >= 1:
+            transmit, key = self._next()
+            if transmit is None:
+                return
+            if transmit():
+                self._tokens -= 1
+            elif key is not None:
+                self._release(key)
+
+        loop = self._app.service_loop.loop
+        if any(self._ready) and loop is not None:
+            self._timer = loop.call_later(
+                (1 - self._tokens) / self.rate, self._cb_tokens_available
+            )
+
+    def _next(self) -> tuple[Transmit | None, Hashable | None]:
+        for priority in DantePriority:
+            ready = self._ready[priority]
+            is_ready = self._is_ready[priority]
+            while ready:
+                key = ready.popleft()
+                is_ready.discard(key)
+                queues = self._waiting.get(key)
+                if not queues or not queues[priority] or not self._has_room(key):
+                    continue
+                transmit = queues[priority].popleft()
+                if key is not None:
+                    self._in_flight[key] = self._in_flight.get(key, 0) + 1
+                if not any(queues):
+                    del self._waiting[key]
+                else:
+                    # To the back of the line, for the next of its commands
+                    for each_priority in DantePriority:
+                        if queues[each_priority]:
+                            self._mark_ready(key, each_priority)
+                return transmit, key
+        return None, None
+
+    def _cb_tokens_available(self) -> None:
+        self._timer = None
+        self.pump()
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
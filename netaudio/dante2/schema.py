@@ -0,0 +1,207 @@
+'''
+The layouts of ARC responses listing pages of channels, for each protocol version.
+
+Each layout is described once, and registered against the first protocol version to use it. On
+registration it's compiled into a decoder, unpacking all of a channel's fields at once with a `struct`
+layout, so decoding a page is a tight loop, whatever the number of layouts known. Devices look up the
+decoder for their protocol version (cached, so that's a dict lookup).
+'''
+from __future__ import annotations
+import bisect
+from collections import namedtuple
+import functools
+import struct
+from typing import NamedTuple
+
+from .codec import UINT16, decode_string
+from .util import LOGGER, ProtocolVersion
+
+
+class Field(NamedTuple):
+    '''A 16-bit field of a channel's definition, or a pointer to a string (which is then decoded).'''
+    name: str
+    offset: int
+    string: bool = False
+
+
+class PageLayout(NamedTuple):
+    '''
+    Where channels' definitions are in a response. They're either every `stride` bytes from
+    `start`, or (without a `stride`) pointed to from a table at `start`.
+    '''
+    fields: tuple[Field, ...]
+    start: int
+    stride: int | None = None
+
+
+class PageKind(NamedTuple):
+    name: str
+    # What's decoded of each channel, fields of which not every layout has being None
+    record: type
+
+
+RX_CHANNELS = PageKind('rx_channels', namedtuple('RxChannelDefinition', (
+    'number', 'name', 'status', 'tx_channel_name', 'tx_device_name', 'subscription_status', 'common',
+), defaults=(None,) * 7))
+
+TX_CHANNELS = PageKind('tx_channels', namedtuple('TxChannelDefinition', (
+    'number', 'name', 'default_name', 'common',
+), defaults=(None,) * 4))
+
+# The names given to TX channels (as opposed to their default names), which older devices list apart
+TX_CHANNEL_NAMES = PageKind('tx_channel_names', namedtuple('TxChannelName', (
+    'number', 'name',
+), defaults=(None,) * 2))
+
+
+class PageDecoder:
+    '''
+    A `PageLayout`, compiled: into a `struct` layout of a channel's definition, and where each of
+    the record's fields is in what that unpacks (and whether it's a string), so that decoding does
+    no more per channel than unpacking its definition and decoding its strings.
+    '''
+
+    def __init__(self, kind: PageKind, layout: PageLayout):
+        self.kind: PageKind = kind
+        self.layout: PageLayout = layout
+
+        fields = sorted(layout.fields, key=lambda field: field.offset)
+        format_ = '>'
+        position = 0
+        for field in fields:
+            if field.offset < position:
+                raise ValueError(f"Field {field.name} of {kind.name} overlaps another")
+            if field.offset > position:
+                format_ += f"{field.offset - position}x"
+            format_ += 'H'
+            position = field.offset + 2
+        self._struct: struct.Struct = struct.Struct(format_)
+
+        by_name = {field.name: field for field in fields}
+        unknown = set(by_name) - set(kind.record._fields)
+        if unknown:
+            raise ValueError(f"No such fields of {kind.name}: {', '.join(sorted(unknown))}")
+        positions = {field.name: position for position, field in enumerate(fields)}
+        # Per field of the record: where it is in a definition unpacked (None if the layout hasn't
+        # it), and whether it's a string
+        self._fields: tuple[tuple[int | None, bool], ...] = tuple(
+            (positions.get(name), name in by_name and by_name[name].string) for name in kind.record._fields
+        )
+
+    def decode(self, response: bytes, count: int) -> list:
+        '''
+        The definitions of (up to) `count` channels in a response: those there are, should it be
+        short; and skipping (with a warning) any whose strings can't be decoded.
+        '''
+        records = []
+        record = self.kind.record
+        fields = self._fields
+        unpack_from = self._struct.unpack_from
+        start = self.layout.start
+        stride = self.layout.stride
+        for index in range(count):
+            try:
+                if stride is None:
+                    offset = UINT16.unpack_from(response, start + 2 * index)[0]
+                else:
+                    offset = start + stride * index
+                values = unpack_from(response, offset)
+            except struct.error:
+                # The response is shorter than expected; take what there is
+                break
+            try:
+                records.append(record(*[
+                    None if position is None
+                    else decode_string(response, values[position]) if string
+                    else values[position]
+                    for position, string in fields
+                ]))
+            except ValueError:
+                # A string that's unterminated, or not ASCII
+                LOGGER.warning("Skipping undecodable definition %d of a %s page", index, self.kind.name)
+        return records
+
+
+# Per kind: the protocol versions layouts were introduced in (in order), and their decoders
+_DECODERS: dict[str, tuple[list[ProtocolVersion], list[PageDecoder | None]]] = {}
+
+
+def register_page_layout(kind: PageKind, since: ProtocolVersion, layout: PageLayout | None) -> None:
+    '''
+    Describe the layout of a kind of page from a protocol version on (until that of the next layout
+    registered); or, given no layout, that devices no longer send that kind of page.
+    '''
+    versions, decoders = _DECODERS.setdefault(kind.name, ([], []))
+    index = bisect.bisect_left(versions, since)
+    decoder = PageDecoder(kind, layout) if layout else None
+    if index < len(versions) and versions[index] == since:
+        decoders[index] = decoder
+    else:
+        versions.insert(index, since)
+        decoders.insert(index, decoder)
+    get_page_decoder.cache_clear()
+
+
+@functools.cache
+def get_page_decoder(kind: PageKind, protocol_version: ProtocolVersion) -> PageDecoder | None:
+    '''The decoder for a kind of page from a device speaking the given protocol version, if any.'''
+    versions, decoders = _DECODERS.get(kind.name, ((), ()))
+    index = bisect.bisect_right(versions, tuple(protocol_version)) - 1
+    return decoders[index] if index >= 0 else None
+
+
+register_page_layout(RX_CHANNELS, (0, 0, 0), PageLayout(
+    start=12,
+    stride=20,
+    fields=(
+        Field('number', 0),
+        Field('common', 4),
+        Field('tx_channel_name', 6, string=True),
+        Field('tx_device_name', 8, string=True),
+        Field('name', 10, string=True),
+        Field('status', 12),
+        Field('subscription_status', 14),
+    ),
+))
+register_page_layout(RX_CHANNELS, (2, 8, 2), PageLayout(
+    start=18,
+    fields=(
+        Field('number', 2),
+        Field('name', 20, string=True),
+        Field('common', 22),
+        Field('tx_channel_name', 44, string=True),
+        Field('tx_device_name', 46, string=True),
+        Field('subscription_status', 48),
+        Field('status', 50),
+    ),
+))
+
+register_page_layout(TX_CHANNELS, (0, 0, 0), PageLayout(
+    start=12,
+    stride=8,
+    fields=(
+        Field('number', 0),
+        Field('common', 4),
+        Field('default_name', 6, string=True),
+    ),
+))
+register_page_layout(TX_CHANNELS, (2, 8, 2), PageLayout(
+    start=18,
+    fields=(
+        Field('number', 2),
+        Field('name', 20, string=True),
+        Field('common', 22),
+        Field('default_name', 30, string=True),
+    ),
+))
+
+register_page_layout(TX_CHANNEL_NAMES, (0, 0, 0), PageLayout(
+    start=12,
+    stride=6,
+    fields=(
+        Field('number', 2),
+        Field('name', 4, string=True),
+    ),
+))
+# Given alongside the default names, in `TX_CHANNELS`
+register_page_layout(TX_CHANNEL_NAMES, (2, 8, 2), None)
@@ -1,14 +1,18 @@
+import asyncio
+from concurrent.futures import Future as ConcurrentFuture
 from enum import Enum
+import functools
 import logging
 import platform
-from queue import Queue
-import select
 import socket
-from threading import Thread
+from threading import Event, Thread, get_ident
+import time
 
 # ~ if TYPE_CHECKING:
 from zeroconf import ServiceInfo as MDNSServiceInfo
 
+from .scheduler import DantePriority
+from .transport import open_endpoint
 from .util import decode_integer
 
 
@@ -16,11 +20,97 @@ _PORT_MAGIC: int = 40000
 
 
 class MessageIndex:
-    _num: int = 0
+    '''
+    Generates message ids.
 
-    def generate(self):
-        self._num = self._num + 1
-        return self._num
+    These are sent as two octets, so wrap around after 0xffff (skipping zero).
+    '''
+    MAX: int = 0xffff
+
+    def __init__(self):
+        self._num: int = 0
+
+    def generate(self, in_use=()) -> int:
+        for _ in range(self.MAX):
+            self._num = self._num % self.MAX + 1
+            if self._num not in in_use:
+                return self._num
+        raise OverflowError("All message ids are in use")
+
+
+class MessageStore:
+    '''
+    The messages sent by a service that are awaiting a response, keyed by message id.
+
+    So memory use stays flat however long we run (and however many responses go missing), the
+    store holds at most `capacity` entries, and entries older than `ttl` seconds are evicted as new
+    ones arrive. `on_evict` is called with each entry evicted.
+    '''
+
+    def __init__(self, capacity: int = 2048, ttl: float = 30.0, on_evict=None):
+        self._capacity: int = capacity
+        self._ttl: float = ttl
+        self._on_evict = on_evict
+
+        # Insertion-ordered, and so also oldest-first
+        self._entries: dict[int, dict] = {}
+        self._index: MessageIndex = MessageIndex()
+
+        self._expired: int = 0
+        self._unmatched: int = 0
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def expired(self) -> int:
+        '''How many entries have been evicted without receiving a response.'''
+        return self._expired
+
+    @property
+    def unmatched(self) -> int:
+        '''How many responses have arrived that didn't match an entry.'''
+        return self._unmatched
+
+    def _evict(self, message_id: int) -> None:
+        entry = self._entries.pop(message_id)
+        self._expired = self._expired + 1
+        if self._on_evict:
+            self._on_evict(message_id, entry)
+
+    def evict_expired(self) -> None:
+        threshold = time.monotonic() - self._ttl
+        while self._entries:
+            message_id, entry = next(iter(self._entries.items()))
+            if entry['created'] > threshold:
+                break
+            self._evict(message_id)
+
+    def get(self, message_id: int) -> dict | None:
+        return self._entries.get(message_id)
+
+    def match(self, message_id: int) -> dict | None:
+        '''Remove and return the entry a response is for.'''
+        entry = self._entries.pop(message_id, None)
+        if entry is None:
+            self._unmatched = self._unmatched + 1
+        return entry
+
+    def next_id(self) -> int:
+        return self._index.generate(self._entries)
+
+    def pop(self, message_id: int) -> dict | None:
+        return self._entries.pop(message_id, None)
+
+    def put(self, message_id: int, entry: dict) -> None:
+        self.evict_expired()
+        while len(self._entries) >= self._capacity:
+            self._evict(next(iter(self._entries)))
+        entry['created'] = time.monotonic()
+        self._entries[message_id] = entry
 
 
 class MessageType(bytes, Enum):
@@ -28,26 +118,121 @@ class MessageType(bytes, Enum):
     RECV = b'\x00\x01'
 
 
-class DanteService:
+class DanteServiceLoop:
+    '''
+    A single asyncio event loop, run in a thread of its own, upon which all of an application's
+    services share their sockets.
+    '''
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: Thread | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        return self._loop
+
+    def call(self, callback, *args) -> None:
+        '''
+        Invoke `callback` on the loop: immediately if we're already there, otherwise as soon as
+        the loop is next free.
+        '''
+        if self.is_current():
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def is_current(self) -> bool:
+        return self._thread is not None and self._thread.ident == get_ident()
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def run_coroutine(self, coroutine) -> ConcurrentFuture:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _run(self, started: Event) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(started.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._loop = asyncio.new_event_loop()
+        started = Event()
+        self._thread = Thread(target=self._run, args=(started,), name='netaudio-dante2', daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        self._loop = None
+
+
+class DanteService(asyncio.DatagramProtocol):
+
+    # How long to wait for a response before resending, and how many times to resend. The wait is
+    # doubled after each attempt.
+    COMMAND_RETRIES: int = 2
+    COMMAND_TIMEOUT: float = 0.5
+
+    # Whether to read and write in batches where possible (see `transport.BatchedDatagramTransport`)
+    BATCHED_IO: bool = True
 
-    RECV_BUFFER_SIZE: int = 1024
     SERVICE_HEADER_LENGTH: int
     SERVICE_MCAST_GRP: str | None = None
     SERVICE_PORT: str
     SERVICE_TYPE: str | None
+    SERVICE_TYPE_SHORT: str
 
     _ignored_addrs: list[str] = ['127.0.0.1']
 
     def __init__(self, application):
         self._app = application
-        self._thread: Thread | None = None
 
-        self._message_index: MessageIndex = MessageIndex()
-        self._message_store: dict = {}
-        self._receive_queue: Queue = Queue()
-        self._send_queue: Queue = Queue()
-        self._shutdown_requested: bool = False
-        self._sock: socket.socket | None = None
+        self._message_store: MessageStore = MessageStore(on_evict=self._cb_message_evicted)
+        self._transport: asyncio.DatagramTransport | None = None
+
+        metrics = application.metrics
+        self._packets_sent = metrics.counter(
+            'netaudio_dante_packets_sent_total', "Datagrams sent", ('service',))
+        self._packets_received = metrics.counter(
+            'netaudio_dante_packets_received_total', "Datagrams received", ('service',))
+        self._bytes_sent = metrics.counter(
+            'netaudio_dante_bytes_sent_total', "Bytes sent", ('service',))
+        self._bytes_received = metrics.counter(
+            'netaudio_dante_bytes_received_total', "Bytes received", ('service',))
+        self._send_errors = metrics.counter(
+            'netaudio_dante_send_errors_total', "Datagrams that could not be sent", ('service',))
+        self._unmatched_responses = metrics.counter(
+            'netaudio_dante_unmatched_responses_total', "Responses to no command awaiting one", ('service',))
+        self._commands_in_flight = metrics.gauge(
+            'netaudio_dante_commands_in_flight', "Commands awaiting a response", ('service',))
+        self._command_retries = metrics.counter(
+            'netaudio_dante_command_retries_total', "Commands resent for want of a response",
+            ('service', 'command', 'device'))
+        self._command_timeouts = metrics.counter(
+            'netaudio_dante_command_timeouts_total', "Commands given up on for want of a response",
+            ('service', 'command', 'device'))
+        self._command_duration = metrics.histogram(
+            'netaudio_dante_command_duration_seconds', "Time from first sending a command to its response",
+            ('service', 'command', 'device'))
+
+    @property
+    def is_running(self) -> bool:
+        return self._transport is not None
 
     @property
     def port(self):
@@ -57,33 +242,182 @@ class DanteService:
     def build_service_descriptor(cls, mdns_service_info: MDNSServiceInfo) -> None:
         raise NotImplementedError
 
+    def _command_labels(self, entry: dict) -> dict:
+        device = entry.get('device')
+        return {
+            'service': self.SERVICE_TYPE_SHORT,
+            'command': entry.get('command_code', b'').hex(),
+            'device': (device.name or str(device.ipv4)) if device else '',
+        }
+
     def _receive(self, address, message):
         message_id = decode_integer(message, 4)
         message_type = message[8:10]
 
         if message_type == MessageType.SEND:
             # Not ready to handle that sort of message yet
-            print("MsgType is SEND")
+            logging.debug("Ignoring a command from %s: %s", address, message.hex())
             return
 
-        if message_id not in self._message_store:
+        entry = self._message_store.match(message_id)
+        if entry is None:
+            self._unmatched_responses.inc(service=self.SERVICE_TYPE_SHORT)
             logging.warning("Received a response from %s to a message not sent: %s", address, message)
             return
 
-        if 'callback' in self._message_store[message_id] and self._message_store[message_id]['callback']:
-            self._message_store[message_id]['callback'](message)
-        else:
-            print(message)
+        if entry.get('timer'):
+            entry['timer'].cancel()
+        self._command_duration.observe(
+            time.monotonic() - entry.get('sent', entry['created']), **self._command_labels(entry))
 
-        del self._message_store[message_id]
+        future = entry.get('future')
+        if future and future.done():
+            # Cancelled by the caller whilst the response was in flight
+            return
+
+        try:
+            if entry.get('callback'):
+                entry['callback'](message)
+            elif not future:
+                # A response to a fire-and-forget command (such as asking for levels)
+                logging.debug("Response from %s: %s", address, message.hex())
+        except Exception as exception:
+            if not future:
+                raise
+            future.set_exception(exception)
+            return
 
-    def bind(self) -> None:
-        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-        self._sock.bind(("", self.port))
+        if future:
+            future.set_result(message)
+
+    def _request(
+        self,
+        message_idx: int,
+        destination: tuple[str, int],
+        command: bytes,
+        entry: dict,
+        timeout: float | None = None,
+        retries: int | None = None,
+        priority: DantePriority = DantePriority.INTERACTIVE,
+    ) -> asyncio.Future:
+        '''
+        Send a command, returning a future that resolves to the response.
+
+        The command is sent once the application's `DanteCommandScheduler` allows, taking a place in
+        the window of commands to its destination until it's answered (or given up on).
+
+        Should the response not arrive within `timeout` seconds, the command is resent (up to
+        `retries` times, backing off exponentially), after which the future fails with a
+        `TimeoutError`. Cancelling the future forgets the command.
+
+        Must be called from the service loop.
+        '''
+        future = self._app.service_loop.loop.create_future()
+        entry = {
+            **entry,
+            'command': command,
+            'destination': destination,
+            'future': future,
+            'attempt': 0,
+            'retries': self.COMMAND_RETRIES if retries is None else retries,
+            'timeout': timeout or self.COMMAND_TIMEOUT,
+            'timer': None,
+            'priority': priority,
+        }
+        self._message_store.put(message_idx, entry)
+        future.add_done_callback(functools.partial(self._cb_request_done, message_idx, entry))
+        self._app.scheduler.submit(destination[0], functools.partial(self._transmit, message_idx), priority)
+        return future
+
+    def _transmit(self, message_idx: int) -> bool:
+        '''Send (or resend) a command, unless it's since been answered, cancelled or given up on.'''
+        entry = self._message_store.get(message_idx)
+        if entry is None or entry['future'].done():
+            return False
+        entry.setdefault('sent', time.monotonic())
+        self._sendto(entry['command'], entry['destination'])
+        entry['timer'] = self._app.service_loop.loop.call_later(
+            entry['timeout'] * 2 ** entry['attempt'],
+            self._cb_request_timeout,
+            message_idx,
+        )
+        return True
+
+    def _cb_request_done(self, message_idx: int, entry: dict, future: asyncio.Future) -> None:
+        if 'sent' in entry:
+            # Frees its place in the window of commands to the device. (Commands never sent had
+            # their place freed by the scheduler.)
+            self._app.scheduler.release(entry['destination'][0])
+
+        if future.cancelled():
+            entry = self._message_store.pop(message_idx)
+            if entry and entry['timer']:
+                entry['timer'].cancel()
+            return
+
+        # Retrieving the exception here stops asyncio complaining about it never being
+        # retrieved, as fire-and-forget commands are common.
+        exception = future.exception()
+        if exception:
+            logging.warning("Command %s failed: %s", message_idx, exception)
+
+    def _cb_message_evicted(self, message_idx: int, entry: dict) -> None:
+        logging.debug("Message %s to %s expired unanswered", message_idx, entry.get('destination'))
+        self._command_timeouts.inc(**self._command_labels(entry))
+        if entry.get('timer'):
+            entry['timer'].cancel()
+        future = entry.get('future')
+        if future and not future.done():
+            future.set_exception(TimeoutError(f"Message {message_idx} expired unanswered"))
+
+    def _cb_request_timeout(self, message_idx: int) -> None:
+        entry = self._message_store.get(message_idx)
+        if entry is None or entry['future'].done():
+            return
+
+        if entry['attempt'] < entry['retries']:
+            entry['attempt'] = entry['attempt'] + 1
+            self._command_retries.inc(**self._command_labels(entry))
+            logging.debug("No response from %s to message %s, resending", entry['destination'], message_idx)
+            # Already has its place in the window
+            self._app.scheduler.submit(None, functools.partial(self._transmit, message_idx), entry['priority'])
+            return
+
+        self._message_store.pop(message_idx)
+        self._command_timeouts.inc(**self._command_labels(entry))
+        entry['future'].set_exception(
+            TimeoutError(f"No response from {entry['destination'][0]} after {entry['attempt'] + 1} attempts")
+        )
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.bind(("", self.port))
+        return sock
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        if exc:
+            # TODO: Write better error handling
+            logging.error("SOCK ERROR: %s\t%s", self, exc)
+        self._transport = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self._packets_received.inc(service=self.SERVICE_TYPE_SHORT)
+        self._bytes_received.inc(len(data), service=self.SERVICE_TYPE_SHORT)
+        self._receive(addr, data)
+
+    def error_received(self, exc: Exception) -> None:
+        # TODO: Write better error handling
+        logging.error("RX ERROR: %s\t%s", self, exc)
 
     def is_ignored_address(self, address):
         return address in self._ignored_addrs
 
+    async def _open(self) -> None:
+        await open_endpoint(self._app.service_loop.loop, self, self.bind(), batched=self.BATCHED_IO)
+
     def register_ignored_address(self, adapter, address, message):
         if address.ip in self._ignored_addrs:
             return
@@ -95,51 +429,41 @@ class DanteService:
             interface = f"'{adapter.nice_name}'"
         logging.debug(message, address.ip, interface)
 
-    def run(self):
-        self.bind()
-        rsocks = [self._sock]
-        while not self._shutdown_requested:
-            wsocks = [self._sock] if not self._send_queue.empty() else []
-            read_socks, write_socks, error_socks = select.select(rsocks, wsocks, rsocks, .2)
-
-            for sock in read_socks:
-                try:
-                    response, address = sock.recvfrom(self.RECV_BUFFER_SIZE)
-                except Exception as error:
-                    # TODO: Write better error handling
-                    logging.error("RX ERROR: %s\t%s", sock, error)
-                    continue
-                else:
-                    self._receive(address, response)
-
-            for sock in write_socks:
-                address, bytestring = self._send_queue.get()
-                if not address:
-                    address = (self.SERVICE_MCAST_GRP, self.SERVICE_PORT)
-                try:
-                    sock.sendto(bytestring, address)
-                except Exception as error:
-                    # TODO: Write better error handling
-                    logging.error("TX ERROR IP: %s String: %s\t%s", address, bytestring, error)
-
-            for sock in error_socks:
-                # TODO: Write better error handling
-                logging.error("SOCK ERROR: %s", sock)
-
-    def send(self, message: bytes, destination: str|None = None) -> None:
-        if not destination and not self.SERVICE_MCAST_GRP:
-            logging.warning("Attempt to send with no destination!")
+    def send(self, message: bytes, destination: tuple[str, int] | None = None) -> None:
+        '''Send a message expecting no response, once the application's scheduler allows.'''
+        if not destination:
+            if not self.SERVICE_MCAST_GRP:
+                logging.warning("Attempt to send with no destination!")
+                return
+            destination = (self.SERVICE_MCAST_GRP, self.SERVICE_PORT)
+        self._app.service_loop.call(
+            self._app.scheduler.submit, None, functools.partial(self._send, message, destination)
+        )
+
+    def _send(self, message: bytes, destination: tuple[str, int]) -> bool:
+        self._sendto(message, destination)
+        return True
+
+    def _sendto(self, message: bytes, destination: tuple[str, int]) -> None:
+        if not self._transport:
+            logging.warning("Attempt to send on a service that isn't running!")
             return
-        self._send_queue.put((destination, message))
+        try:
+            self._transport.sendto(message, destination)
+        except Exception as error:
+            self._send_errors.inc(service=self.SERVICE_TYPE_SHORT)
+            # TODO: Write better error handling
+            logging.error("TX ERROR IP: %s String: %s\t%s", destination, message, error)
+            return
+        self._packets_sent.inc(service=self.SERVICE_TYPE_SHORT)
+        self._bytes_sent.inc(len(message), service=self.SERVICE_TYPE_SHORT)
 
     def start(self):
-        if not self._thread:
-            self._shutdown_requested = False
-            self._thread = Thread(target=self.run)
-            self._thread.start()
+        if not self._transport:
+            self._app.service_loop.run_coroutine(self._open()).result()
+        self._commands_in_flight.track(self._message_store.__len__, service=self.SERVICE_TYPE_SHORT)
 
     def stop(self):
-        if self._thread:
-            self._shutdown_requested = True
-            self._thread.join()
-            self._thread = None
+        self._commands_in_flight.untrack(service=self.SERVICE_TYPE_SHORT)
+        if self._transport:
+            self._app.service_loop.call(self._transport.close)
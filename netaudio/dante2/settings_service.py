@@ -1,7 +1,9 @@
 # ~ from __future__ import annotations
 # ~ from typing import TYPE_CHECKING
+import logging
 
 from .channel import DanteChannelType
+from .codec import build_message
 from .service import DanteService
 from .util import (
     NULL_HEXTET,
@@ -41,12 +43,18 @@ class DanteSettingsService(DanteService):
         mac_address: bytes,
         part1: bytes | None = None,
     ) -> None:
+        '''
+        Send a settings command to `device`. These go unanswered, so there's nothing to await; but
+        raises `RuntimeError` should the service not be running (and so unable to send anything).
+        '''
+        if not self.is_running:
+            raise RuntimeError("The settings service isn't running")
         ipv4 = device.ipv4
-        message_idx = self._message_index.generate()
+        message_idx = self._message_store.next_id()
 
-        command = b''.join((
+        command = build_message((
             b'\xff\xff',
-            NULL_HEXTET,                        # message length, calculated below
+            NULL_HEXTET,                        # message length, filled in by `build_message`
             encode_integer(message_idx),
             part1[0:2] if part1 else NULL_HEXTET,
             mac_address,
@@ -54,14 +62,13 @@ class DanteSettingsService(DanteService):
             b'Audinate',                        # no null terminator
             *payload,
         ))
-        command = command[:2] + encode_integer(len(command)) + command[4:]
 
-        self._message_store[message_idx] = {
+        self._message_store.put(message_idx, {
             'device': device,
             'command': command,
-        }
-        print(command)
-        self._send_queue.put(((str(ipv4), self.SERVICE_PORT), command))
+        })
+        logging.debug("Settings command to %s: %s", device.name, command.hex())
+        self.send(command, (str(ipv4), self.SERVICE_PORT))
 
     def get_dante_model(
         self,
@@ -0,0 +1,235 @@
+'''
+A feed of changes to what an application knows of the network, for pushing to clients (such as
+dashboards) in place of their polling it.
+'''
+from __future__ import annotations
+import asyncio
+import threading
+from typing import TYPE_CHECKING
+
+from .application import DanteEvent
+from .util import LOGGER
+
+if TYPE_CHECKING:
+    from .application import DanteApplication
+    from .device import DanteDevice
+    from .metering import DanteMeterSnapshot
+
+
+class DanteStateFeedClient:
+    '''
+    Changes waiting to be taken by one consumer of a `DanteStateFeed`.
+
+    Changes are coalesced: should something change again before the consumer has taken its last
+    change, only the latest is kept. So a slow consumer sees fewer changes, rather than a growing
+    backlog of them. Should even that exceed `max_pending` changes, the client is closed, and the
+    consumer must reconnect (and so start over from a fresh snapshot).
+    '''
+
+    MAX_PENDING: int = 10000
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_pending: int | None = None):
+        self._loop: asyncio.AbstractEventLoop = loop
+        self._max_pending: int = self.MAX_PENDING if max_pending is None else max_pending
+        self._lock: threading.Lock = threading.Lock()
+        # Insertion ordered, so changes are taken in the order first made
+        self._pending: dict[tuple, dict] = {}
+        self._ready: asyncio.Event = asyncio.Event()
+        self._closed: bool = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def push(self, key: tuple, change: dict) -> None:
+        '''Queue a change, replacing any not yet taken with the same key. May be called from any thread.'''
+        with self._lock:
+            if self._closed:
+                return
+            was_empty = not self._pending
+            self._pending[key] = change
+            if len(self._pending) > self._max_pending:
+                LOGGER.warning("State feed client fell too far behind; closing it")
+                self._pending.clear()
+                self._closed = True
+            elif not was_empty:
+                return
+        self._loop.call_soon_threadsafe(self._ready.set)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        self._loop.call_soon_threadsafe(self._ready.set)
+
+    async def get(self) -> list[dict] | None:
+        '''Wait for, and take, whatever changes are queued; or None once the client is closed.'''
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            with self._lock:
+                if self._closed:
+                    return None
+                changes = list(self._pending.values())
+                self._pending.clear()
+            if changes:
+                return changes
+
+
+class DanteStateFeed:
+    '''
+    Every `interval` seconds (whilst there are clients), compares the state of each device and its
+    channels with what was last sent to clients, and sends them whatever has changed. Devices going
+    offline and coming back are sent straight away; so (when `metering` is set) are levels, at the
+    rate the application's metering publishes them.
+
+    Each change is a dict with an `event` of:
+      * `device`: a device's state (`state`), keyed by its mDNS `server_name`
+      * `device_removed`
+      * `channel`: a channel's state, including (for RX channels) its subscription and its status
+      * `channel_removed`
+      * `metering`: a device's levels and peaks, one per channel
+    '''
+
+    INTERVAL: float = 0.5
+
+    def __init__(self, application: DanteApplication, interval: float | None = None, metering: bool = False):
+        self._app: DanteApplication = application
+        self.interval: float = self.INTERVAL if interval is None else interval
+        self._metering: bool = metering
+
+        self._clients: list[DanteStateFeedClient] = []
+        # What clients were last sent: each device's state, and its channels', by key
+        self._devices: dict[tuple, dict] = {}
+        self._channels: dict[tuple, dict] = {}
+        self._timer: asyncio.TimerHandle | None = None
+
+    def connect(self, max_pending: int | None = None) -> DanteStateFeedClient:
+        '''
+        Add a client, to be consumed from the calling (running) event loop. It's first sent the
+        current state of everything.
+        '''
+        client = DanteStateFeedClient(asyncio.get_running_loop(), max_pending)
+        self._app.service_loop.call(self._add_client, client)
+        return client
+
+    def disconnect(self, client: DanteStateFeedClient) -> None:
+        client.close()
+        self._app.service_loop.call(self._remove_client, client)
+
+    def _add_client(self, client: DanteStateFeedClient) -> None:
+        if self._timer is None:
+            self._start()
+        else:
+            # Bring the others up to date first, so that the snapshot is what they've been sent
+            self.publish()
+        self._clients.append(client)
+        for key, state in self._devices.items():
+            client.push(key, self._device_change(key, state))
+        for key, state in self._channels.items():
+            client.push(key, self._channel_change(key, state))
+
+    def _remove_client(self, client: DanteStateFeedClient) -> None:
+        if client in self._clients:
+            self._clients.remove(client)
+        if not self._clients:
+            self._stop()
+
+    def _start(self) -> None:
+        self._app.add_listener(DanteEvent.DEVICE_OFFLINE, self._cb_device_changed)
+        self._app.add_listener(DanteEvent.DEVICE_ONLINE, self._cb_device_changed)
+        if self._metering:
+            self._app.metering.subscribe(self._cb_metering)
+        self.publish()
+        self._timer = self._app.service_loop.loop.call_later(self.interval, self._cb_publish)
+
+    def _stop(self) -> None:
+        if self._timer is None:
+            return
+        self._timer.cancel()
+        self._timer = None
+        self._app.remove_listener(DanteEvent.DEVICE_OFFLINE, self._cb_device_changed)
+        self._app.remove_listener(DanteEvent.DEVICE_ONLINE, self._cb_device_changed)
+        if self._metering:
+            self._app.metering.unsubscribe(self._cb_metering)
+        # Whoever connects next is sent everything afresh
+        self._devices.clear()
+        self._channels.clear()
+
+    def stop(self) -> None:
+        '''Close every client. Call from the service loop.'''
+        for client in self._clients:
+            client.close()
+        self._clients.clear()
+        self._stop()
+
+    def _send(self, key: tuple, change: dict) -> None:
+        for client in self._clients:
+            client.push(key, change)
+        self._clients = [client for client in self._clients if not client.closed]
+
+    @staticmethod
+    def _device_change(key: tuple, state: dict | None) -> dict:
+        if state is None:
+            return {'event': 'device_removed', 'device': key[1]}
+        return {'event': 'device', 'device': key[1], 'state': state}
+
+    @staticmethod
+    def _channel_change(key: tuple, state: dict | None) -> dict:
+        _, server_name, channel_type, number = key
+        if state is None:
+            return {'event': 'channel_removed', 'device': server_name, 'type': channel_type, 'number': number}
+        return {'event': 'channel', 'device': server_name, 'type': channel_type, 'number': number, 'state': state}
+
+    @staticmethod
+    def _device_state(device: DanteDevice) -> dict:
+        return {**device.json(), 'online': device.is_online}
+
+    def _publish_device(self, device: DanteDevice) -> None:
+        key = ('device', device.server_name)
+        state = self._device_state(device)
+        if self._devices.get(key) != state:
+            self._devices[key] = state
+            self._send(key, self._device_change(key, state))
+
+    def publish(self) -> None:
+        '''Send clients whatever has changed since last sent. Call from the service loop.'''
+        devices = {}
+        channels = {}
+        for device in self._app.devices:
+            if not device.server_name:
+                continue
+            devices[('device', device.server_name)] = self._device_state(device)
+            for channel in (*device.rx_channels, *device.tx_channels):
+                channels[('channel', device.server_name, channel.TYPE.value, channel.number)] = channel.json()
+
+        for known, current, change in (
+            (self._devices, devices, self._device_change),
+            (self._channels, channels, self._channel_change),
+        ):
+            for key in [key for key in known if key not in current]:
+                del known[key]
+                self._send(key, change(key, None))
+            for key, state in current.items():
+                if known.get(key) != state:
+                    known[key] = state
+                    self._send(key, change(key, state))
+
+    def _cb_publish(self) -> None:
+        self.publish()
+        self._timer = self._app.service_loop.loop.call_later(self.interval, self._cb_publish)
+
+    def _cb_device_changed(self, device: DanteDevice) -> None:
+        if device.server_name:
+            self._publish_device(device)
+
+    def _cb_metering(self, snapshots: list[DanteMeterSnapshot]) -> None:
+        for snapshot in snapshots:
+            server_name = snapshot.device.server_name
+            self._send(('metering', server_name), {
+                'event': 'metering',
+                'device': server_name,
+                'tx': list(snapshot.tx_levels),
+                'rx': list(snapshot.rx_levels),
+                'tx_peaks': list(snapshot.tx_peaks),
+                'rx_peaks': list(snapshot.rx_peaks),
+            })
@@ -107,14 +107,10 @@ class DanteSubscriptionStatus(enum.Enum):
 
     @classmethod
     def derive(cls, value):
-        if value not in cls:
+        try:
+            return cls(value)
+        except ValueError:
             return None
-        return next(
-            filter(
-                lambda member: member.value == value,
-                cls.__members__.values()
-            )
-        )
 
 
 DANTE_SUBSCRIPTION_STATUS_LABELS = {
@@ -0,0 +1,155 @@
+'''
+A datagram transport for the service sockets that reads and writes in batches.
+
+asyncio's own datagram transport reads one datagram per wakeup of the loop (allocating a buffer of
+its `max_size`, 256KiB, to read each into); so a burst of responses from a large network takes as
+many iterations of the loop as there are responses. This one reads everything pending (up to
+`BATCH_SIZE` datagrams) each wakeup, with `recvfrom_into()` into a buffer allocated once; and, should
+the socket's send buffer fill, drains the backlog of datagrams in one wakeup too, rather than one
+per iteration.
+
+It needs a loop with `add_reader()` (as selector loops have, and Windows' proactor loop hasn't), so
+is only used on Linux; elsewhere, `open_endpoint()` falls back to asyncio's transport.
+'''
+from __future__ import annotations
+import asyncio
+from collections import deque
+import logging
+import platform
+import socket
+
+# The largest datagram read: the largest a UDP datagram can be
+BUFFER_SIZE: int = 65536
+
+# Datagrams read per wakeup at most, so that a flood on one socket can't starve the others
+BATCH_SIZE: int = 64
+
+_RETRY: tuple[type[OSError], ...] = (BlockingIOError, InterruptedError)
+
+
+class BatchedDatagramTransport(asyncio.DatagramTransport):
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        sock: socket.socket,
+        protocol: asyncio.DatagramProtocol,
+        waiter: asyncio.Future | None = None,
+    ):
+        super().__init__({'socket': sock, 'sockname': sock.getsockname()})
+        self._loop: asyncio.AbstractEventLoop = loop
+        self._sock: socket.socket = sock
+        self._protocol: asyncio.DatagramProtocol = protocol
+
+        self._buffer: bytearray = bytearray(BUFFER_SIZE)
+        self._view: memoryview = memoryview(self._buffer)
+        # Datagrams waiting for room in the socket's send buffer, with their destination
+        self._backlog: deque[tuple[bytes, tuple[str, int]]] = deque()
+        self._backlog_size: int = 0
+        self._closing: bool = False
+
+        sock.setblocking(False)
+        # Fails (with NotImplementedError) on loops that can't watch sockets
+        loop.add_reader(sock.fileno(), self._read_ready)
+        loop.call_soon(protocol.connection_made, self)
+        if waiter is not None:
+            # Only once the protocol has been told of us
+            loop.call_soon(lambda: waiter.done() or waiter.set_result(None))
+
+    def _read_ready(self) -> None:
+        recvfrom_into = self._sock.recvfrom_into
+        for _ in range(BATCH_SIZE):
+            try:
+                length, address = recvfrom_into(self._buffer)
+            except _RETRY:
+                return
+            except OSError as error:
+                self._protocol.error_received(error)
+                return
+            # Copied out, as the protocol may keep the datagram
+            self._protocol.datagram_received(bytes(self._view[:length]), address)
+            if self._closing:
+                return
+
+    def _write_ready(self) -> None:
+        sendto = self._sock.sendto
+        while self._backlog:
+            data, address = self._backlog[0]
+            try:
+                sendto(data, address)
+            except _RETRY:
+                return
+            except OSError as error:
+                self._protocol.error_received(error)
+            self._backlog.popleft()
+            self._backlog_size -= len(data)
+        self._loop.remove_writer(self._sock.fileno())
+        if self._closing:
+            self._close()
+
+    def sendto(self, data, addr=None) -> None:
+        if self._closing:
+            return
+        if not self._backlog:
+            try:
+                self._sock.sendto(data, addr)
+                return
+            except _RETRY:
+                self._loop.add_writer(self._sock.fileno(), self._write_ready)
+            except OSError as error:
+                self._protocol.error_received(error)
+                return
+        self._backlog.append((bytes(data), addr))
+        self._backlog_size += len(data)
+
+    def get_write_buffer_size(self) -> int:
+        return self._backlog_size
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        self._loop.remove_reader(self._sock.fileno())
+        if not self._backlog:
+            self._close()
+
+    def abort(self) -> None:
+        if self._sock.fileno() < 0:
+            # Already closed
+            return
+        self._backlog.clear()
+        self._backlog_size = 0
+        self._closing = True
+        self._loop.remove_reader(self._sock.fileno())
+        self._loop.remove_writer(self._sock.fileno())
+        self._close()
+
+    def _close(self) -> None:
+        self._loop.call_soon(self._protocol.connection_lost, None)
+        self._sock.close()
+
+
+async def open_endpoint(
+    loop: asyncio.AbstractEventLoop,
+    protocol: asyncio.DatagramProtocol,
+    sock: socket.socket,
+    batched: bool = True,
+) -> asyncio.DatagramTransport:
+    '''
+    Serve a protocol on a bound socket: with a `BatchedDatagramTransport` where that's possible (and
+    `batched` is set), otherwise with asyncio's own.
+    '''
+    if batched and platform.system() == 'Linux':
+        waiter = loop.create_future()
+        try:
+            transport = BatchedDatagramTransport(loop, sock, protocol, waiter)
+        except NotImplementedError:
+            logging.debug("Batched datagram I/O isn't supported by %s", type(loop).__name__)
+        else:
+            await waiter
+            return transport
+    transport, _ = await loop.create_datagram_endpoint(lambda: protocol, sock=sock)
+    return transport
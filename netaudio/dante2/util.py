@@ -1,5 +1,6 @@
 import codecs
 from enum import Enum
+import functools
 import ipaddress
 import logging
 import socket
@@ -8,6 +9,14 @@ import uuid
 
 import psutil
 
+# Long imported from here, though now found in `codec`
+from .codec import ( # pylint: disable=unused-import
+    decode_integer,
+    decode_string,
+    encode_integer,
+    encode_string,
+)
+
 ProtocolVersion: TypeAlias = tuple[int, int, int] # Python < 3.12
 # ~ type ProtocolVersion = tuple[int, int, int] # Python 3.12+
 
@@ -15,23 +24,6 @@ LOGGER = logging.getLogger('netaudio.dante2')
 NULL_HEXTET = b'\x00\x00'
 
 
-def decode_integer(source: bytes, ptr: int, length: int = 2) -> int:
-    return int.from_bytes(source[ptr : ptr + length], byteorder='big')
-
-def encode_integer(integer: int, length: int = 2) -> bytes:
-    return integer.to_bytes(length, byteorder='big')
-
-
-def decode_string(source: bytes, ptr: int) -> str:
-    if not ptr:
-        return None
-    substr = source[ptr:]
-    return substr[:substr.index(b'\x00')].decode('ascii')
-
-def encode_string(string: str) -> bytes:
-    return string.encode('ascii') + b'\x00'
-
-
 def decode_protocol_version(source: bytes) -> ProtocolVersion:
     protocol_version = source[0:2].hex()
     return (
@@ -45,6 +37,8 @@ def decode_protocol_version_from_mdns(source: bytes) -> ProtocolVersion:
         int(x) for x in source.split(b".")
     )
 
+# Every command is prefixed with one of the few versions on the network
+@functools.cache
 def encode_protocol_version(protocol_version: ProtocolVersion) -> bytes:
     return codecs.decode(
         f"{protocol_version[0]}{protocol_version[1]}{protocol_version[2]:02x}",
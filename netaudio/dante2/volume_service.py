@@ -4,7 +4,7 @@
 # ~ if TYPE_CHECKING:
 # ~ from zeroconf import ServiceInfo as MDNSServiceInfo
 
-from .service import DanteService, MessageType
+from .service import DanteService
 # ~ from .util import (
     # ~ decode_integer,
 # ~ )
@@ -25,12 +25,7 @@ class DanteVolumeService(DanteService):
     SERVICE_TYPE_SHORT: str = 'vol'
 
     def _receive(self, address, message):
-        # ~ message_id = decode_integer(message, 4)
-        message_type = message[8:10]
-
-        if message_type == MessageType.SEND:
-            # Not ready to handle that sort of message yet
-            print("MsgType is SEND")
+        device = self._app.get_device_by_ipv4(address[0])
+        if device is None:
             return
-
-        print(address, message)
+        self._app.metering.receive(device, message)
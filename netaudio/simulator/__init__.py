@@ -0,0 +1,3 @@
+from .device import SimulatedDevice, SimulatedRxChannel, SimulatedTxChannel
+from .discovery import SimulatedDiscovery
+from .network import SimulatedNetwork
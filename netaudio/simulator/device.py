@@ -0,0 +1,496 @@
+from __future__ import annotations
+import asyncio
+from collections import deque
+import ipaddress
+import logging
+from typing import TYPE_CHECKING
+
+from netaudio.dante2.subscription import DanteSubscriptionStatus
+from netaudio.dante2.util import (
+    ProtocolVersion,
+    decode_integer,
+    decode_string,
+    encode_integer,
+    encode_string,
+)
+
+if TYPE_CHECKING:
+    from .network import SimulatedNetwork
+
+LOGGER = logging.getLogger('netaudio.simulator')
+
+ARC_PORT: int = 4440
+CMC_PORT: int = 8800
+DBC_PORT: int = 4455
+SETTINGS_PORT: int = 8700
+
+# Message type of a response
+RESPONSE = b'\x00\x01'
+
+RX_CHANNELS_PER_PAGE: int = 16
+# Older devices return twice as many TX channels per page as asked for
+TX_CHANNELS_PER_PAGE_LEGACY: int = 32
+
+# CMC command asking for levels to be sent (or, with a NULL first hextet, no longer sent)
+CMC_VOLUME = b'\x30\x10'
+CMC_VOLUME_STOP = b'\x00\x00'
+# What precedes the levels in a level packet (whose content isn't simulated)
+METERING_HEADER_LENGTH: int = 32
+
+
+class SimulatedTxChannel:
+
+    def __init__(self, number: int, name: str):
+        self.number: int = number
+        self.default_name: str = name
+        self.friendly_name: str | None = None
+
+    @property
+    def name(self) -> str:
+        return self.friendly_name or self.default_name
+
+
+class SimulatedRxChannel:
+
+    def __init__(self, number: int, name: str):
+        self.number: int = number
+        self.default_name: str = name
+        self.name: str = name
+        self.tx_channel_name: str | None = None
+        self.tx_device_name: str | None = None
+
+
+class _Response:
+    '''
+    Assembles a response: a fixed-length part, followed by the strings it points to.
+    '''
+
+    def __init__(self, request: bytes, fixed_length: int):
+        self._fixed = bytearray(fixed_length)
+        self._fixed[0:2] = request[0:2]
+        self._fixed[4:8] = request[4:8]
+        self._fixed[8:10] = RESPONSE
+        self._strings = bytearray()
+        self._pointers: dict[str, int] = {}
+
+    def integer(self, ptr: int, integer: int, length: int = 2) -> None:
+        self._fixed[ptr:ptr + length] = encode_integer(integer, length)
+
+    def append(self, string: str) -> int:
+        '''Append a string (if not already present), returning where it is.'''
+        if string not in self._pointers:
+            self._pointers[string] = len(self._fixed) + len(self._strings)
+            self._strings += encode_string(string)
+        return self._pointers[string]
+
+    def string(self, ptr: int, string: str | None) -> None:
+        '''Append a string, and point to it from `ptr`.'''
+        if string is not None:
+            self.integer(ptr, self.append(string))
+
+    def build(self) -> bytes:
+        message = self._fixed + self._strings
+        message[2:4] = encode_integer(len(message))
+        return bytes(message)
+
+
+class _DeviceProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, handler):
+        self._handler = handler
+        self._transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        try:
+            response = self._handler(data)
+        except Exception: # pylint: disable=broad-exception-caught
+            LOGGER.exception("Simulated device failed to handle %s", data.hex())
+            return
+        if response:
+            self._transport.sendto(response, addr)
+
+
+class SimulatedDevice:
+    '''
+    A Dante device, answering ARC, CMC and settings commands on loopback UDP sockets of its own.
+
+    Both channel page layouts are spoken, according to `arc_version`: that of devices with ARC
+    protocol 2.8.2 or later, and that of older devices (which the legacy `netaudio.dante` package
+    also speaks).
+    '''
+
+    # How many messages received to remember, per service
+    RECEIVED_HISTORY: int = 256
+
+    # How often levels are sent, once asked for; and for how long, unless asked again
+    METERING_INTERVAL: float = 0.1
+    METERING_TIMEOUT: float = 10.0
+
+    def __init__(
+        self,
+        network: SimulatedNetwork,
+        name: str,
+        ipv4: ipaddress.IPv4Address,
+        rx_count: int = 16,
+        tx_count: int = 16,
+        arc_version: ProtocolVersion = (2, 8, 2),
+        cmc_version: ProtocolVersion = (1, 2, 0),
+        sample_rate: int = 48000,
+    ):
+        self._network: SimulatedNetwork = network
+        self._transports: list[asyncio.DatagramTransport] = []
+        self._cmc_transport: asyncio.DatagramTransport | None = None
+        # Where levels are being sent, until when (if asked with a timeout)
+        self._metering_address: tuple[str, int] | None = None
+        self._metering_until: float | None = None
+        self._metering_timer: asyncio.TimerHandle | None = None
+
+        self.default_name: str = name
+        self.name: str = name
+        self.ipv4: ipaddress.IPv4Address = ipv4
+        self.arc_version: ProtocolVersion = arc_version
+        self.cmc_version: ProtocolVersion = cmc_version
+        self.sample_rate: int = sample_rate
+        self.encoding: int = 24
+        self.aes67: bool = False
+        self.latency: int = 1000000
+
+        self.rx_channels: list[SimulatedRxChannel] = [
+            SimulatedRxChannel(number, f"{number:02d}") for number in range(1, rx_count + 1)
+        ]
+        self.tx_channels: list[SimulatedTxChannel] = [
+            SimulatedTxChannel(number, f"{number:02d}") for number in range(1, tx_count + 1)
+        ]
+        # The level of each channel (TX channels first), as sent when asked for
+        self.levels: bytearray = bytearray(tx_count + rx_count)
+
+        # The latest messages received, by service name ('arc', 'cmc', 'settings')
+        self.received: dict[str, deque[bytes]] = {
+            service: deque(maxlen=self.RECEIVED_HISTORY) for service in ('arc', 'cmc', 'settings')
+        }
+
+    @property
+    def is_metering(self) -> bool:
+        '''Whether levels are being sent.'''
+        return self._metering_address is not None
+
+    @property
+    def server_name(self) -> str:
+        return f"{self.default_name}.local."
+
+    def get_rx_channel(self, number: int) -> SimulatedRxChannel | None:
+        if 0 < number <= len(self.rx_channels):
+            return self.rx_channels[number - 1]
+        return None
+
+    def get_tx_channel(self, number: int) -> SimulatedTxChannel | None:
+        if 0 < number <= len(self.tx_channels):
+            return self.tx_channels[number - 1]
+        return None
+
+    def get_tx_channel_by_name(self, name: str) -> SimulatedTxChannel | None:
+        for channel in self.tx_channels:
+            if name in (channel.name, channel.default_name):
+                return channel
+        return None
+
+    def subscribe(self, rx_channel_number: int, tx_channel_name: str | None, tx_device_name: str | None) -> None:
+        channel = self.get_rx_channel(rx_channel_number)
+        if channel:
+            channel.tx_channel_name = tx_channel_name
+            channel.tx_device_name = tx_device_name
+
+    def subscription_status(self, channel: SimulatedRxChannel) -> DanteSubscriptionStatus:
+        if not channel.tx_device_name:
+            return DanteSubscriptionStatus.NONE
+        tx_device = self._network.get_device_by_name(channel.tx_device_name)
+        if not tx_device or not tx_device.get_tx_channel_by_name(channel.tx_channel_name):
+            return DanteSubscriptionStatus.UNRESOLVED
+        if tx_device is self:
+            return DanteSubscriptionStatus.SUBSCRIBE_SELF
+        return DanteSubscriptionStatus.DYNAMIC
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        for port, handler in (
+            (ARC_PORT, self._receive_arc),
+            (CMC_PORT, self._receive_cmc),
+            (SETTINGS_PORT, self._receive_settings),
+        ):
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda handler=handler: _DeviceProtocol(handler),
+                local_addr=(str(self.ipv4), port),
+            )
+            self._transports.append(transport)
+            if port == CMC_PORT:
+                self._cmc_transport = transport
+
+    def stop(self) -> None:
+        self._stop_metering()
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+
+    ############################## ARC ##############################
+
+    def _receive_arc(self, request: bytes) -> bytes | None:
+        self.received['arc'].append(request)
+        command_code = request[6:8]
+        handler = self._arc_handlers.get(command_code)
+        if handler:
+            return handler(self, request)
+        # Acknowledge anything not understood
+        return _Response(request, 10).build()
+
+    def _arc_channel_counts(self, request: bytes) -> bytes:
+        response = _Response(request, 20)
+        response.integer(12, len(self.tx_channels))
+        response.integer(14, len(self.rx_channels))
+        return response.build()
+
+    def _arc_set_name(self, request: bytes) -> bytes:
+        self.name = decode_string(request, 10) or self.default_name
+        return _Response(request, 10).build()
+
+    def _arc_name(self, request: bytes) -> bytes:
+        # The name directly follows the header
+        response = _Response(request, 10)
+        response.append(self.name)
+        return response.build()
+
+    def _arc_device_info(self, request: bytes) -> bytes:
+        response = _Response(request, 28)
+        response.string(22, self.name)
+        response.string(26, self.name)
+        return response.build()
+
+    def _arc_rx_channels(self, request: bytes) -> bytes:
+        if self.arc_version >= (2, 8, 2):
+            return self._arc_rx_channels_paged(request)
+
+        first = decode_integer(request, 12)
+        channels = self.rx_channels[first - 1:first - 1 + RX_CHANNELS_PER_PAGE]
+        definitions_start = 12
+        definition_length = 20
+        common_ptr = definitions_start + definition_length * len(channels)
+
+        response = _Response(request, common_ptr + 16)
+        response.integer(10, len(channels))
+        response.integer(common_ptr, self.sample_rate, 4)
+        for index, channel in enumerate(channels):
+            definition = definitions_start + definition_length * index
+            response.integer(definition, channel.number)
+            response.integer(definition + 4, common_ptr)
+            response.string(definition + 6, channel.tx_channel_name)
+            response.string(definition + 8, self._tx_device_label(channel))
+            response.string(definition + 10, channel.name)
+            response.integer(definition + 12, self.subscription_status(channel).value)
+            response.integer(definition + 14, self.subscription_status(channel).value)
+        return response.build()
+
+    def _arc_rx_channels_paged(self, request: bytes) -> bytes:
+        # Which of the request's hextets holds the page hasn't been determined, so this follows the
+        # layout of other commands, which have the channel number there.
+        first = decode_integer(request, 20) or 1
+        channels = self.rx_channels[first - 1:first - 1 + RX_CHANNELS_PER_PAGE]
+        pointers_start = 18
+        definition_length = 56
+        definitions_start = pointers_start + 2 * len(channels)
+        common_ptr = definitions_start + definition_length * len(channels)
+
+        response = _Response(request, common_ptr + 16)
+        response.integer(10, len(channels))
+        response.integer(common_ptr, self.sample_rate, 4)
+        for index, channel in enumerate(channels):
+            definition = definitions_start + definition_length * index
+            response.integer(pointers_start + 2 * index, definition)
+            response.integer(definition + 2, channel.number)
+            response.string(definition + 20, channel.name)
+            response.integer(definition + 22, common_ptr)
+            response.string(definition + 44, channel.tx_channel_name)
+            response.string(definition + 46, self._tx_device_label(channel))
+            response.integer(definition + 48, self.subscription_status(channel).value)
+            response.integer(definition + 50, self.subscription_status(channel).value)
+        return response.build()
+
+    def _tx_device_label(self, channel: SimulatedRxChannel) -> str | None:
+        if channel.tx_device_name and channel.tx_device_name.lower() == self.name.lower():
+            return '.'
+        return channel.tx_device_name
+
+    def _arc_tx_channels(self, request: bytes) -> bytes:
+        if self.arc_version >= (2, 8, 2):
+            return self._arc_tx_channels_paged(request)
+
+        first = decode_integer(request, 12)
+        channels = self.tx_channels[first - 1:first - 1 + TX_CHANNELS_PER_PAGE_LEGACY]
+        friendly = request[6:8] == b'\x20\x10'
+        definitions_start = 12
+        definition_length = 6 if friendly else 8
+        common_ptr = definitions_start + definition_length * len(channels)
+
+        response = _Response(request, common_ptr + 16)
+        response.integer(10, len(channels))
+        response.integer(common_ptr, self.sample_rate, 4)
+        for index, channel in enumerate(channels):
+            definition = definitions_start + definition_length * index
+            if friendly:
+                response.integer(definition, index + 1)
+                response.integer(definition + 2, channel.number)
+                response.string(definition + 4, channel.name)
+            else:
+                response.integer(definition, channel.number)
+                response.integer(definition + 4, common_ptr)
+                response.string(definition + 6, channel.default_name)
+        return response.build()
+
+    def _arc_tx_channels_paged(self, request: bytes) -> bytes:
+        first = decode_integer(request, 20) or 1
+        channels = self.tx_channels[first - 1:first - 1 + RX_CHANNELS_PER_PAGE]
+        pointers_start = 18
+        definition_length = 40
+        definitions_start = pointers_start + 2 * len(channels)
+        common_ptr = definitions_start + definition_length * len(channels)
+
+        response = _Response(request, common_ptr + 16)
+        response.integer(10, len(channels))
+        response.integer(common_ptr, self.sample_rate, 4)
+        for index, channel in enumerate(channels):
+            definition = definitions_start + definition_length * index
+            response.integer(pointers_start + 2 * index, definition)
+            response.integer(definition + 2, channel.number)
+            response.string(definition + 20, channel.friendly_name)
+            response.integer(definition + 22, common_ptr)
+            response.string(definition + 30, channel.default_name)
+        return response.build()
+
+    def _arc_subscribe(self, request: bytes) -> bytes:
+        if request[6:8] == b'\x34\x10':
+            number = decode_integer(request, 20)
+            subscribing = request[18:20] == b'\x02\x01'
+            pointers = 24
+        elif request[6:8] == b'\x30\x14':
+            number = decode_integer(request, 14)
+            subscribing = False
+        else:
+            number = decode_integer(request, 12)
+            subscribing = len(request) > 16 and decode_integer(request, 14) != 0
+            pointers = 14
+
+        if subscribing:
+            self.subscribe(
+                number,
+                decode_string(request, decode_integer(request, pointers)),
+                decode_string(request, decode_integer(request, pointers + 2)),
+            )
+        else:
+            self.subscribe(number, None, None)
+        return _Response(request, 10).build()
+
+    def _arc_set_channel_name(self, request: bytes) -> bytes:
+        command_code = request[6:8]
+        if command_code in (b'\x34\x01', b'\x24\x38'):
+            number_ptr, name_ptr = 20, 24
+        elif command_code == b'\x30\x01':
+            number_ptr, name_ptr = 12, 14
+        else:
+            number_ptr, name_ptr = 14, 16
+
+        number = decode_integer(request, number_ptr)
+        name = decode_string(request, decode_integer(request, name_ptr))
+        if command_code in (b'\x34\x01', b'\x30\x01'):
+            channel = self.get_rx_channel(number)
+            if channel:
+                channel.name = name or channel.default_name
+        else:
+            channel = self.get_tx_channel(number)
+            if channel:
+                channel.friendly_name = name or None
+
+        response = _Response(request, 26)
+        if channel:
+            response.integer(20, number)
+            # Reset names aren't returned
+            response.string(24, name or None)
+        return response.build()
+
+    def _arc_set_latency(self, request: bytes) -> bytes:
+        self.latency = decode_integer(request, 32, 4)
+        return _Response(request, 10).build()
+
+    _arc_handlers = {
+        b'\x10\x00': _arc_channel_counts,
+        b'\x10\x01': _arc_set_name,
+        b'\x10\x02': _arc_name,
+        b'\x10\x03': _arc_device_info,
+        b'\x11\x01': _arc_set_latency,
+        b'\x20\x00': _arc_tx_channels,
+        b'\x20\x10': _arc_tx_channels,
+        b'\x20\x13': _arc_set_channel_name,
+        b'\x24\x00': _arc_tx_channels,
+        b'\x24\x38': _arc_set_channel_name,
+        b'\x30\x00': _arc_rx_channels,
+        b'\x30\x01': _arc_set_channel_name,
+        b'\x30\x10': _arc_subscribe,
+        b'\x30\x14': _arc_subscribe,
+        b'\x34\x00': _arc_rx_channels,
+        b'\x34\x01': _arc_set_channel_name,
+        b'\x34\x10': _arc_subscribe,
+    }
+
+    ############################## CMC ##############################
+
+    def _receive_cmc(self, request: bytes) -> bytes:
+        self.received['cmc'].append(request)
+        if request[6:8] == CMC_VOLUME:
+            if request[10:12] == CMC_VOLUME_STOP:
+                self._stop_metering()
+            else:
+                self._start_metering(request)
+        return _Response(request, 10).build()
+
+    def _start_metering(self, request: bytes) -> None:
+        # The request ends with whether to time out, NULL, IPv4 address, port, NULL * 3, port, NULL
+        end = len(request)
+        timeout = decode_integer(request, end - 20)
+        self._metering_address = (str(ipaddress.IPv4Address(request[end - 16:end - 12])), decode_integer(request, end - 12))
+        loop = asyncio.get_running_loop()
+        self._metering_until = loop.time() + self.METERING_TIMEOUT if timeout else None
+        if self._metering_timer is None:
+            self._cb_send_levels()
+
+    def _stop_metering(self) -> None:
+        if self._metering_timer:
+            self._metering_timer.cancel()
+        self._metering_timer = None
+        self._metering_address = None
+
+    def _cb_send_levels(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._metering_until is not None and loop.time() > self._metering_until:
+            self._stop_metering()
+            return
+        self._cmc_transport.sendto(
+            bytes(METERING_HEADER_LENGTH) + self.levels + b'\x00', self._metering_address
+        )
+        self._metering_timer = loop.call_later(self.METERING_INTERVAL, self._cb_send_levels)
+
+    ############################## Settings ##############################
+
+    def _receive_settings(self, request: bytes) -> None:
+        # Settings commands go unanswered
+        self.received['settings'].append(request)
+
+        # Header is `ffff`, length, message id, (2 octets), MAC address, NULL_HEXTET, "Audinate"
+        payload = request[24:]
+        if payload[0:4] == b'\x07\x34\x10\x06':
+            self.aes67 = bool(decode_integer(payload, 10))
+        elif payload[0:4] == b'\x07\x27\x00\x81':
+            self.sample_rate = decode_integer(payload, 12, 4)
+        elif payload[0:4] == b'\x07\x27\x00\x83':
+            self.encoding = decode_integer(payload, 14)
+        return None
+
@@ -0,0 +1,49 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from netaudio.dante2.arc_service import DanteARCServiceDescriptor
+from netaudio.dante2.cmc_service import DanteCMCServiceDescriptor
+from netaudio.dante2.dbc_service import DanteDBCServiceDescriptor
+from netaudio.dante2.discovery import DanteDiscoveryState
+
+from .device import ARC_PORT, CMC_PORT, DBC_PORT
+
+if TYPE_CHECKING:
+    from netaudio.dante2.application import DanteApplication
+    from .device import SimulatedDevice
+    from .network import SimulatedNetwork
+
+
+class SimulatedDiscovery:
+    '''
+    Stands in for `DanteDiscovery`, announcing a simulated network's devices to an application as
+    though they had been found via mDNS.
+    '''
+
+    def __init__(self, application: DanteApplication, network: SimulatedNetwork):
+        self._app: DanteApplication = application
+        self._network: SimulatedNetwork = network
+
+    @staticmethod
+    def build_device_spec(device: SimulatedDevice) -> dict:
+        return {
+            'arc': DanteARCServiceDescriptor(ARC_PORT, device.arc_version),
+            'cmc': DanteCMCServiceDescriptor(CMC_PORT, device.cmc_version),
+            'dbc': DanteDBCServiceDescriptor(DBC_PORT),
+            'ipv4': device.ipv4,
+            'server_name': device.server_name,
+            'status': DanteDiscoveryState.COMPLETE,
+        }
+
+    def is_in_progress(self) -> bool:
+        return False
+
+    def set_connected(self, server_name: str, connected: bool) -> None:
+        pass
+
+    def start(self) -> None:
+        for device in self._network.devices:
+            self._app.service_loop.call(self._app.register_device, self.build_device_spec(device))
+
+    def stop(self) -> None:
+        pass
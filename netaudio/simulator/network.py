@@ -0,0 +1,98 @@
+from __future__ import annotations
+import functools
+import ipaddress
+
+from netaudio.dante2.service import DanteServiceLoop
+from netaudio.dante2.util import ProtocolVersion
+
+from .device import SimulatedDevice
+from .discovery import SimulatedDiscovery
+
+
+class SimulatedNetwork:
+    '''
+    A set of simulated Dante devices, each with a loopback address of its own (127.0.1.1 onwards),
+    run on an event loop in a thread of their own.
+
+    Linux answers on the whole of 127.0.0.0/8 without further ado; other platforms may need the
+    addresses aliased onto their loopback interface first.
+    '''
+
+    FIRST_ADDRESS: ipaddress.IPv4Address = ipaddress.IPv4Address('127.0.1.1')
+
+    def __init__(self):
+        self._loop: DanteServiceLoop = DanteServiceLoop()
+        self._devices: list[SimulatedDevice] = []
+        self._devices_by_name: dict[str, SimulatedDevice] = {}
+
+    @classmethod
+    def build(
+        cls,
+        device_count: int,
+        rx_count: int = 16,
+        tx_count: int = 16,
+        arc_version: ProtocolVersion = (2, 8, 2),
+        name_prefix: str = 'sim',
+    ) -> SimulatedNetwork:
+        '''Create a network of `device_count` identical devices.'''
+        network = cls()
+        for index in range(device_count):
+            network.add_device(
+                f"{name_prefix}-{index + 1:03d}",
+                rx_count=rx_count,
+                tx_count=tx_count,
+                arc_version=arc_version,
+            )
+        return network
+
+    @property
+    def devices(self) -> list[SimulatedDevice]:
+        return self._devices
+
+    def add_device(self, name: str, **kwargs) -> SimulatedDevice:
+        '''Add a device (see `SimulatedDevice` for the options). Must be done before `start()`.'''
+        device = SimulatedDevice(self, name, self.FIRST_ADDRESS + len(self._devices), **kwargs)
+        self._devices.append(device)
+        self._devices_by_name[name.lower()] = device
+        return device
+
+    def discovery_factory(self):
+        '''For `DanteApplication(discovery_factory=...)`, so that it discovers these devices.'''
+        return functools.partial(SimulatedDiscovery, network=self)
+
+    def get_device_by_name(self, name: str) -> SimulatedDevice | None:
+        device = self._devices_by_name.get(name.lower())
+        if device:
+            return device
+        # Renamed since being added
+        for device in self._devices:
+            if device.name.lower() == name.lower():
+                return device
+        return None
+
+    def start(self) -> None:
+        self._loop.start()
+
+        async def _start():
+            for device in self._devices:
+                await device.start()
+
+        try:
+            self._loop.run_coroutine(_start()).result()
+        except Exception:
+            self.stop()
+            raise
+
+    def stop(self) -> None:
+        if not self._loop.is_running():
+            return
+        for device in self._devices:
+            self._loop.call(device.stop)
+        self._loop.stop()
+
+    def __enter__(self) -> SimulatedNetwork:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
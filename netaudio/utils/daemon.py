@@ -0,0 +1,120 @@
+"""
+Support for running CLI commands within a long-lived `netaudio server daemon`.
+
+Commands decorated with `daemon_command` are forwarded to the daemon (over a Unix-domain socket)
+whenever one is listening, and otherwise run as usual (as they always are on platforms without
+Unix-domain sockets, such as Windows). Within the daemon, `dante_application()` hands commands the
+daemon's already-running application, rather than starting one afresh.
+"""
+import contextlib
+import functools
+import inspect
+import json
+import os
+import socket
+import tempfile
+
+from termcolor import cprint
+
+from netaudio.dante2.application import DanteApplication
+from netaudio.dante2.cache import DanteDeviceCache
+
+# Commands that may be run by the daemon, by name
+COMMANDS: dict = {}
+
+# The application kept running by the daemon, when running within one
+_daemon_application: DanteApplication | None = None
+
+
+def is_supported() -> bool:
+    """Whether the platform has what the daemon needs: Unix-domain sockets, and user IDs to name them by."""
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def default_socket_path() -> str | None:
+    """The daemon's socket, or None where the daemon isn't supported."""
+    if not is_supported():
+        return None
+    if "NETAUDIO_DAEMON_SOCKET" in os.environ:
+        return os.environ["NETAUDIO_DAEMON_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"netaudio-{os.getuid()}.sock")
+
+
+def set_daemon_application(application: DanteApplication | None) -> None:
+    global _daemon_application
+    _daemon_application = application
+
+
+@contextlib.contextmanager
+def dante_application(timeout: float = 10.0, cache: bool = False):
+    """
+    Provide a `DanteApplication` that has had `timeout` seconds to settle.
+
+    Within the daemon this is the daemon's own (long-running) application; otherwise one is started
+    for the duration of the `with` block.
+    """
+    if _daemon_application:
+        _daemon_application.wait_until_settled(timeout)
+        yield _daemon_application
+        return
+
+    app = DanteApplication(cache=DanteDeviceCache() if cache else None)
+    app.startup()
+    try:
+        app.wait_until_settled(timeout)
+        yield app
+    finally:
+        app.shutdown()
+
+
+def request(command: str, kwargs: dict, socket_path: str | None = None) -> dict | None:
+    """
+    Ask the daemon to run a command. Returns its reply, or None if no daemon is listening (or it
+    couldn't be talked to), in which case the command should be run locally.
+    """
+    if not is_supported():
+        return None
+    socket_path = socket_path or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(json.dumps({"command": command, "kwargs": kwargs}).encode() + b"\n")
+            with sock.makefile("rb") as reply:
+                return json.loads(reply.readline())
+    except OSError:
+        # Such as a stale socket, left behind by a daemon that is no longer running
+        return None
+    except json.JSONDecodeError:
+        # The daemon went away mid-reply, or isn't one of ours
+        return None
+
+
+def daemon_command(name: str):
+    """
+    Register a CLI command with the daemon, and have it forwarded there when a daemon is running.
+    """
+    def decorator(func):
+        COMMANDS[name] = func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _daemon_application:
+                return func(*args, **kwargs)
+
+            arguments = inspect.signature(func).bind(*args, **kwargs).arguments
+            reply = request(name, arguments)
+            if reply is None:
+                return func(*args, **kwargs)
+
+            print(reply["output"], end="")
+            if reply["error"]:
+                cprint(reply["error"], "red")
+            return None
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,184 @@
+"""
+An in-process store of what the monitoring server knows of devices, hosts and services.
+
+Modelled on the subset of Redis the server once used: keys hold either a hash (a dict of fields)
+or a set, and any key may be given a time to live, after which it's forgotten. Unlike Redis, values
+are kept as they are given (no encoding to bytes), and nothing leaves the process unless a
+persistence backend is given.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+
+
+class StatePersistence:
+    """Somewhere to keep the contents of a `StateStore` between runs."""
+
+    def load(self) -> dict:
+        """Return what was last saved: as per `StateStore.snapshot()`."""
+        raise NotImplementedError
+
+    def save(self, snapshot: dict) -> None:
+        raise NotImplementedError
+
+
+class JSONFileStatePersistence(StatePersistence):
+    """Keeps the store in a JSON file. Values must be representable in JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, snapshot: dict) -> None:
+        # Written beside the original then moved into place, so a crash can't leave it truncated
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file)
+        os.replace(temporary_path, self.path)
+
+
+class StateStore:
+    """
+    Thread-safe hashes and sets, keyed by string, that may expire.
+
+    Expired keys are forgotten lazily: reads never see them, and they're purged as the store is
+    written to.
+    """
+
+    def __init__(self, persistence: StatePersistence | None = None, clock=time.monotonic):
+        self._persistence = persistence
+        self._clock = clock
+        self._lock = threading.RLock()
+
+        self._hashes: dict[str, dict] = {}
+        self._sets: dict[str, set] = {}
+        # When each key expires, by the clock, and the same as a heap so the soonest is to hand.
+        # Heap entries are left behind when a key's expiry changes, and skipped once reached.
+        self._expiry: dict[str, float] = {}
+        self._expiry_heap: list[tuple[float, str]] = []
+
+    def _is_expired(self, key: str, now: float) -> bool:
+        deadline = self._expiry.get(key)
+        return deadline is not None and deadline <= now
+
+    def _forget(self, key: str) -> None:
+        self._hashes.pop(key, None)
+        self._sets.pop(key, None)
+        self._expiry.pop(key, None)
+
+    def purge_expired(self) -> None:
+        with self._lock:
+            now = self._clock()
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                deadline, key = heapq.heappop(self._expiry_heap)
+                if self._expiry.get(key) == deadline:
+                    self._forget(key)
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            if self._is_expired(key, self._clock()):
+                return False
+            return key in self._hashes or key in self._sets
+
+    def get(self, key: str) -> dict:
+        """Every field of a hash (as a copy), or an empty dict if there's no such hash."""
+        with self._lock:
+            if self._is_expired(key, self._clock()):
+                return {}
+            return dict(self._hashes.get(key, ()))
+
+    def get_field(self, key: str, field: str, default=None):
+        with self._lock:
+            if self._is_expired(key, self._clock()):
+                return default
+            return self._hashes.get(key, {}).get(field, default)
+
+    def update(self, key: str, mapping: dict) -> None:
+        """Set fields of a hash, creating it if need be. Any expiry the key has is kept."""
+        with self._lock:
+            self.purge_expired()
+            self._hashes.setdefault(key, {}).update(mapping)
+
+    def members(self, key: str) -> set:
+        with self._lock:
+            if self._is_expired(key, self._clock()):
+                return set()
+            return set(self._sets.get(key, ()))
+
+    def add_members(self, key: str, *members) -> None:
+        with self._lock:
+            self.purge_expired()
+            self._sets.setdefault(key, set()).update(members)
+
+    def remove_members(self, key: str, *members) -> None:
+        with self._lock:
+            self._sets.get(key, set()).difference_update(members)
+
+    def expire(self, key: str, seconds: float) -> bool:
+        """Forget a key `seconds` from now. Returns whether there was such a key."""
+        with self._lock:
+            self.purge_expired()
+            if key not in self._hashes and key not in self._sets:
+                return False
+            deadline = self._clock() + seconds
+            self._expiry[key] = deadline
+            heapq.heappush(self._expiry_heap, (deadline, key))
+            return True
+
+    def persist(self, key: str) -> None:
+        """Stop a key expiring."""
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._forget(key)
+
+    def keys(self, prefix: str = "") -> list[str]:
+        with self._lock:
+            self.purge_expired()
+            return [key for key in (*self._hashes, *self._sets) if key.startswith(prefix)]
+
+    def clear(self, prefix: str = "") -> None:
+        with self._lock:
+            self.delete(*self.keys(prefix))
+
+    def snapshot(self) -> dict:
+        """
+        The contents of the store, such as can be saved and later restored. Expiry is recorded as
+        wall-clock time, as the store's clock needn't survive a restart.
+        """
+        with self._lock:
+            self.purge_expired()
+            offset = time.time() - self._clock()
+            return {
+                "hashes": {key: dict(value) for key, value in self._hashes.items()},
+                "sets": {key: sorted(value) for key, value in self._sets.items()},
+                "expiry": {key: deadline + offset for key, deadline in self._expiry.items()},
+            }
+
+    def restore(self, snapshot: dict) -> None:
+        with self._lock:
+            self.clear()
+            self._hashes.update((key, dict(value)) for key, value in snapshot.get("hashes", {}).items())
+            self._sets.update((key, set(value)) for key, value in snapshot.get("sets", {}).items())
+            now = time.time()
+            for key, expires_at in snapshot.get("expiry", {}).items():
+                self.expire(key, expires_at - now)
+
+    def load(self) -> None:
+        if self._persistence:
+            self.restore(self._persistence.load())
+
+    def save(self) -> None:
+        if self._persistence:
+            self._persistence.save(self.snapshot())
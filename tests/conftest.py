@@ -0,0 +1,47 @@
+import ipaddress
+
+import pytest
+
+from netaudio.dante2.arc_service import DanteARCServiceDescriptor
+from netaudio.dante2.channel import DanteChannelType
+from netaudio.dante2.cmc_service import DanteCMCServiceDescriptor
+from netaudio.dante2.device import DanteDevice
+
+
+class Clock:
+    '''Stands in for `time.monotonic()` (or any other clock), only moving when `now` is set.'''
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _make_device(app, name, ipv4=None, services=False, tx_count=None, rx_count=None):
+    '''
+    A device added to an application without asking it anything, named `name`. Given `services`,
+    it has ARC and CMC services; given channel counts, it knows them (as if it had asked).
+    '''
+    service_descriptors = {'server_name': f'{name}.local.'}
+    if ipv4:
+        service_descriptors['ipv4'] = ipaddress.IPv4Address(ipv4)
+    if services:
+        service_descriptors['arc'] = DanteARCServiceDescriptor(4440, (2, 8, 2))
+        service_descriptors['cmc'] = DanteCMCServiceDescriptor(8800, (1, 0, 0))
+    device = DanteDevice(app, service_descriptors, request_info=False)
+    app._add_device(device)
+    device._set_name(name)
+    if tx_count is not None or rx_count is not None:
+        device._channel_counts = {DanteChannelType.TX: tx_count or 0, DanteChannelType.RX: rx_count or 0}
+    return device
+
+
+@pytest.fixture
+def make_device():
+    return _make_device
@@ -1,4 +1,8 @@
+import asyncio
+import time
+
 import netaudio.dante.device
+from netaudio.simulator import SimulatedNetwork
 
 
 def func(x):
@@ -9,20 +13,33 @@ def test_answer():
     assert func(4) == 5
 
 
+def _last_settings_command(simulated_device, count):
+    deadline = time.monotonic() + 1
+    while len(simulated_device.received['settings']) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return simulated_device.received['settings'][-1].hex()
+
+
 def test_command_aes67():
-    some_dev = netaudio.dante.device.DanteDevice()
-    got = some_dev.command_enable_aes67(is_enabled=True)
-    want = (
-        "ffff002400ff22dc525400385eba0000417564696e617465073410060000006400010001",
-        None,
-        8700,
-    )
-    assert got == want
-
-    got = some_dev.command_enable_aes67(is_enabled=False)
-    want = (
-        "ffff002400ff22dc525400385eba0000417564696e617465073410060000006400010000",
-        None,
-        8700,
-    )
-    assert got == want
+    network = SimulatedNetwork()
+    simulated_device = network.add_device('aes67')
+
+    some_dev = netaudio.dante.device.DanteDevice(ipv4=simulated_device.ipv4, hostname=simulated_device.server_name)
+
+    async def _enable_aes67(is_enabled):
+        await some_dev._ssc.begin(some_dev.ipv4)
+        await some_dev.enable_aes67(is_enabled=is_enabled)
+        some_dev._ssc.sock.close()
+
+    with network:
+        asyncio.run(_enable_aes67(True))
+        got = _last_settings_command(simulated_device, 1)
+        want = "ffff002400ff22dc525400385eba0000417564696e617465073410060000006400010001"
+        assert got == want
+        assert simulated_device.aes67
+
+        asyncio.run(_enable_aes67(False))
+        got = _last_settings_command(simulated_device, 2)
+        want = "ffff002400ff22dc525400385eba0000417564696e617465073410060000006400010000"
+        assert got == want
+        assert not simulated_device.aes67
@@ -0,0 +1,143 @@
+import asyncio
+import ipaddress
+import socket
+import threading
+
+import pytest
+
+from netaudio.dante2.arc_service import DanteARCService, DanteARCServiceDescriptor
+from netaudio.dante2.metrics import MetricsRegistry
+from netaudio.dante2.scheduler import DanteCommandScheduler
+from netaudio.dante2.service import DanteServiceLoop
+
+
+class LoopbackARCService(DanteARCService):
+    COMMAND_TIMEOUT = 0.05
+
+    @property
+    def port(self):
+        return 0
+
+
+class FakeApplication:
+    def __init__(self):
+        self.service_loop = DanteServiceLoop()
+        self.metrics = MetricsRegistry()
+        self.scheduler = DanteCommandScheduler(self)
+
+
+class FakeDevice:
+    def __init__(self, port):
+        self.arc = DanteARCServiceDescriptor(port, (2, 8, 2))
+        self.ipv4 = ipaddress.IPv4Address('127.0.0.1')
+        self.name = 'fake'
+
+
+class Responder:
+    '''Counts the commands it receives, answering only those after the first `ignore`.'''
+
+    def __init__(self, ignore=0):
+        self.ignore = ignore
+        self.received = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.sock.getsockname()[1]
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except TimeoutError:
+                continue
+            self.received = self.received + 1
+            if self.received > self.ignore:
+                self.sock.sendto(data[:8] + b'\x00\x01' + b'reply\x00', address)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+
+@pytest.fixture
+def service():
+    app = FakeApplication()
+    app.service_loop.start()
+    arc = LoopbackARCService(app)
+    arc.start()
+    yield app, arc
+    arc.stop()
+    app.service_loop.stop()
+
+
+def run(app, func, *args, **kwargs):
+    async def _invoke():
+        return await func(*args, **kwargs)
+    return app.service_loop.run_coroutine(_invoke()).result(5)
+
+
+def test_command_resolves_with_response(service):
+    app, arc = service
+    responder = Responder()
+    received = []
+    try:
+        response = run(app, arc.command, FakeDevice(responder.port), b'\x10\x02', (), callback=received.append)
+    finally:
+        responder.close()
+    assert response.endswith(b'reply\x00')
+    assert received == [response]
+    assert not arc._message_store
+    labels = {'service': 'arc', 'command': '1002', 'device': 'fake'}
+    assert app.metrics.histogram('netaudio_dante_command_duration_seconds', '').count(**labels) == 1
+    assert app.metrics.counter('netaudio_dante_packets_sent_total', '').value(service='arc') == 1
+    assert app.metrics.counter('netaudio_dante_packets_received_total', '').value(service='arc') == 1
+
+
+def test_command_is_resent_until_answered(service):
+    app, arc = service
+    responder = Responder(ignore=2)
+    try:
+        response = run(app, arc.command, FakeDevice(responder.port), b'\x10\x02', ())
+    finally:
+        responder.close()
+    assert response.endswith(b'reply\x00')
+    assert responder.received == 3
+    labels = {'service': 'arc', 'command': '1002', 'device': 'fake'}
+    assert app.metrics.counter('netaudio_dante_command_retries_total', '').value(**labels) == 2
+
+
+def test_command_times_out(service):
+    app, arc = service
+    responder = Responder(ignore=10)
+    try:
+        with pytest.raises(TimeoutError):
+            run(app, arc.command, FakeDevice(responder.port), b'\x10\x02', (), retries=1)
+    finally:
+        responder.close()
+    assert responder.received == 2
+    assert not arc._message_store
+    labels = {'service': 'arc', 'command': '1002', 'device': 'fake'}
+    assert app.metrics.counter('netaudio_dante_command_timeouts_total', '').value(**labels) == 1
+
+
+def test_cancelled_command_is_forgotten(service):
+    app, arc = service
+    responder = Responder(ignore=10)
+
+    async def _cancel():
+        future = arc.command(FakeDevice(responder.port), b'\x10\x02', ())
+        future.cancel()
+        await asyncio.sleep(0)
+
+    try:
+        app.service_loop.run_coroutine(_cancel()).result(5)
+    finally:
+        responder.close()
+    assert not arc._message_store
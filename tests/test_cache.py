@@ -0,0 +1,85 @@
+import json
+import time
+
+from netaudio.dante2.application import DanteApplication
+from netaudio.dante2.cache import DanteDeviceCache
+from netaudio.dante2.channel import DanteChannelType
+from netaudio.dante2.service import DanteService
+from netaudio.simulator import SimulatedNetwork
+
+
+def _entry(server_name, name, tx_channels, rx_channels):
+    return {
+        'server_name': server_name,
+        'ipv4': '192.0.2.1',
+        'arc': {'port': 4440, 'protocol_version': [2, 8, 2]},
+        'cmc': {'port': 8800, 'protocol_version': [1, 2, 0]},
+        'dbc': {'port': 4455},
+        'name': name,
+        'sample_rate': 48000,
+        'channel_counts': {'rx': len(rx_channels), 'tx': len(tx_channels)},
+        'tx_channels': tx_channels,
+        'rx_channels': rx_channels,
+    }
+
+
+def test_cache_round_trip(tmp_path):
+    path = tmp_path / 'devices.json'
+    entries = {
+        'rx.local.@2.8.2': _entry('rx.local.', 'rx', [], [{
+            'number': 1,
+            'name': 'In 1',
+            'status': 9,
+            'tx_device': 'tx',
+            'tx_channel': 'Out 1',
+            'subscription_status': 9,
+        }]),
+        'tx.local.@2.8.2': _entry('tx.local.', 'tx', [{'number': 1, 'name': 'Out 1'}], []),
+    }
+    path.write_text(json.dumps({'version': DanteDeviceCache.FORMAT_VERSION, 'devices': entries}))
+
+    app = DanteApplication()
+    cache = DanteDeviceCache(path)
+    restored = cache.load(app)
+    for device, _ in restored:
+        app._add_device(device)
+    cache.restore_channels(restored)
+
+    rx_channel = app.get_device_by_name('rx').get_channel_by_number(DanteChannelType.RX, 1)
+    tx_channel = app.get_device_by_name('tx').get_channel_by_number(DanteChannelType.TX, 1)
+    assert rx_channel.subscription.tx_channel is tx_channel
+    assert app.get_device_by_server_name('tx.local.').name == 'tx'
+
+    cache.save(app.devices)
+    assert json.loads(path.read_text())['devices'] == entries
+
+
+def test_missing_cache_is_empty(tmp_path):
+    assert DanteDeviceCache(tmp_path / 'absent.json').load(DanteApplication()) == []
+
+
+def test_cached_device_found_at_a_new_address_is_kept(tmp_path, monkeypatch):
+    # Commands to the cached address go unanswered, and quickly
+    monkeypatch.setattr(DanteService, 'COMMAND_TIMEOUT', 0.1)
+    monkeypatch.setattr(DanteService, 'COMMAND_RETRIES', 0)
+
+    network = SimulatedNetwork()
+    simulated = network.add_device('alpha', rx_count=2, tx_count=2)
+    entry = _entry(simulated.server_name, 'alpha', [{'number': 1, 'name': '01'}, {'number': 2, 'name': '02'}], [])
+    entry['ipv4'] = '192.0.2.1'
+    path = tmp_path / 'devices.json'
+    path.write_text(json.dumps({'version': DanteDeviceCache.FORMAT_VERSION, 'devices': {'alpha': entry}}))
+
+    with network:
+        app = DanteApplication(cache=DanteDeviceCache(path), discovery_factory=network.discovery_factory())
+        app.startup()
+        try:
+            assert app.wait_until_settled(5)
+            # Long enough for what was asked of it at the cached address to have gone unanswered
+            time.sleep(0.5)
+            device = app.get_device_by_name('alpha')
+            assert device is not None
+            assert device.ipv4 == simulated.ipv4
+            assert app.devices == [device]
+        finally:
+            app.shutdown()
@@ -0,0 +1,43 @@
+import pytest
+
+from netaudio.dante2 import codec
+
+
+def test_integers_are_decoded_in_place():
+    message = bytes(range(16))
+    assert codec.decode_integer(message, 2) == 0x0203
+    assert codec.decode_integer(memoryview(message)[4:], 0, 4) == 0x04050607
+    assert codec.decode_integer(message, 15, 1) == 15
+    assert codec.decode_integer(message, 3, 3) == 0x030405
+    # Running off the end decodes what there is, as slicing would
+    assert codec.decode_integer(message, 15) == 15
+    assert codec.decode_integer(message, 20) == 0
+
+
+def test_integers_are_encoded():
+    assert codec.encode_integer(0x1234) == b'\x12\x34'
+    assert codec.encode_integer(True) == b'\x00\x01'
+    assert codec.encode_integer(7, 3) == b'\x00\x00\x07'
+    with pytest.raises(OverflowError):
+        codec.encode_integer(0x10000)
+
+
+def test_strings_are_decoded_up_to_their_terminator():
+    message = b'\x00\x00\x00\x00name\x00other\x00'
+    assert codec.decode_string(message, 4) == 'name'
+    assert codec.decode_string(bytearray(message), 9) == 'other'
+    assert codec.decode_string(memoryview(message), 4) == 'name'
+    assert codec.decode_string(message, 0) is None
+    with pytest.raises(ValueError):
+        codec.decode_string(b'\x00\x00unterminated', 2)
+
+
+def test_commands_are_built_with_their_length():
+    body = (b'\x00\x01', b'\xaa\xbb\xcc', codec.encode_string('alpha'))
+    command = codec.build_command(b'\x28\x02', 0x0102, b'\x10\x00', b'\x00\x00', body)
+    expected = b''.join((b'\x28\x02', b'\x00\x15', b'\x01\x02', b'\x10\x00', b'\x00\x00', *body))
+    assert command == expected
+    assert codec.decode_integer(command, 2) == len(command)
+
+    message = codec.build_message((b'\xff\xff', b'\x00\x00', b'\x00\x07', b'Audinate'))
+    assert message == b'\xff\xff\x00\x0e\x00\x07Audinate'
@@ -0,0 +1,75 @@
+import os
+import socketserver
+import stat
+import threading
+
+from netaudio.commands.server import daemon as daemon_server
+from netaudio.commands.server.daemon import DaemonRequestHandler
+from netaudio.utils import daemon
+
+
+@daemon.daemon_command("test echo")
+def echo(text: str = "", fail: bool = False):
+    print(text)
+    if fail:
+        raise ValueError("failed")
+
+
+def test_commands_are_run_by_the_daemon(tmp_path, monkeypatch):
+    socket_path = str(tmp_path / "netaudio.sock")
+    monkeypatch.setenv("NETAUDIO_DAEMON_SOCKET", socket_path)
+
+    with socketserver.UnixStreamServer(socket_path, DaemonRequestHandler) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            assert daemon.request("test echo", {"text": "hello"}) == {"output": "hello\n", "error": None}
+            assert daemon.request("test echo", {"fail": True})["error"] == "ValueError: failed"
+            assert "Invalid request" in daemon.request("absent", {})["error"]
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_only_this_user_may_connect_to_the_daemon(tmp_path):
+    socket_path = str(tmp_path / "netaudio.sock")
+    umask = os.umask(0)
+    try:
+        with daemon_server._listen(socket_path):
+            assert stat.S_IMODE(os.stat(socket_path).st_mode) & 0o077 == 0
+        assert os.umask(0) == 0
+    finally:
+        os.umask(umask)
+
+
+def test_commands_run_locally_without_a_daemon(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("NETAUDIO_DAEMON_SOCKET", str(tmp_path / "absent.sock"))
+    echo("local")
+    assert capsys.readouterr().out == "local\n"
+
+
+def test_commands_run_locally_where_the_daemon_is_unsupported(monkeypatch, capsys):
+    monkeypatch.delattr(daemon.os, "getuid", raising=False)
+    assert daemon.default_socket_path() is None
+    echo("local")
+    assert capsys.readouterr().out == "local\n"
+
+
+def test_commands_run_locally_when_the_daemon_replies_nonsense(tmp_path, monkeypatch, capsys):
+    socket_path = str(tmp_path / "netaudio.sock")
+    monkeypatch.setenv("NETAUDIO_DAEMON_SOCKET", socket_path)
+
+    class GarbledHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            self.rfile.readline()
+            self.wfile.write(b"{not json\n")
+
+    with socketserver.UnixStreamServer(socket_path, GarbledHandler) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            echo("local")
+        finally:
+            server.shutdown()
+            thread.join()
+    assert capsys.readouterr().out == "local\n"
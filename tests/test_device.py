@@ -0,0 +1,38 @@
+import asyncio
+import ipaddress
+
+from netaudio.dante.device import DanteDevice, begin_devices
+from netaudio.simulator import SimulatedNetwork
+
+
+def test_devices_are_begun_concurrently_despite_failures(monkeypatch):
+    network = SimulatedNetwork()
+    for name in ('alpha', 'bravo', 'charlie'):
+        network.add_device(name, rx_count=4, tx_count=4, arc_version=(2, 7, 2))
+    devices = [DanteDevice(ipv4=device.ipv4, hostname=device.server_name) for device in network.devices]
+    # Nothing listens here, so its commands are refused (or, should that go unreported, time out)
+    absent = DanteDevice(ipv4=ipaddress.IPv4Address('127.0.1.250'), hostname='absent.local.')
+    absent._arc.timeout = 0.1
+
+    begun = DanteDevice.begin
+    active = []
+    most_active = 0
+
+    async def begin(self):
+        nonlocal most_active
+        active.append(self)
+        most_active = max(most_active, len(active))
+        try:
+            await begun(self)
+        finally:
+            active.remove(self)
+
+    monkeypatch.setattr(DanteDevice, 'begin', begin)
+    with network:
+        asyncio.run(begin_devices([devices[0], absent, devices[1], devices[2]], concurrency=2))
+
+    assert [device.name for device in devices] == ['alpha', 'bravo', 'charlie']
+    assert [device.error for device in devices] == [None, None, None]
+    assert all(len(device.rx_channels) == 4 for device in devices)
+    assert absent.error is not None
+    assert most_active == 2
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+import pytest
+
+from netaudio.commands.server import http
+from netaudio.dante2.application import DanteApplication
+from netaudio.simulator import SimulatedNetwork
+
+
+@pytest.fixture
+def network():
+    network = SimulatedNetwork()
+    network.add_device('alpha', rx_count=2, tx_count=2)
+    with network:
+        yield network
+
+
+@pytest.fixture
+def app(network, monkeypatch):
+    app = DanteApplication(discovery_factory=network.discovery_factory())
+    app.startup()
+    monkeypatch.setattr(http, 'dante_application', app)
+    assert app.wait_until_settled(5)
+    yield app
+    app.shutdown()
+
+
+def test_identify_is_sent_to_the_device(app, network):
+    simulated = network.devices[0]
+    device_json = asyncio.run(http.configure_device('alpha', {'identify': True}))
+    assert device_json['name'] == 'alpha'
+
+    deadline = time.monotonic() + 1
+    while not simulated.received['settings'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [request[24:28] for request in simulated.received['settings']] == [b'\x07\x31\x00\x63']
+
+
+def test_settings_fail_whilst_the_settings_service_is_stopped(app):
+    app.settings_service.stop()
+    deadline = time.monotonic() + 1
+    while app.settings_service.is_running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    with pytest.raises(http.HTTPException) as error:
+        asyncio.run(http.configure_device('alpha', {'identify': True}))
+    assert error.value.status_code == 503
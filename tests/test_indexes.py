@@ -0,0 +1,47 @@
+from netaudio.dante2.application import DanteApplication
+from netaudio.dante2.channel import DanteChannelType
+
+
+def test_devices_are_found_after_rename(make_device):
+    app = DanteApplication()
+    device = make_device(app, 'Stage-Box')
+    assert app.get_device_by_name('stage-box') is device
+
+    device._set_name('FOH')
+    assert app.get_device_by_name('stage-box') is None
+    assert app.get_device_by_name('foh') is device
+    assert app.get_device_by_server_name('Stage-Box.local.') is device
+
+
+def test_channels_are_found_after_rename_and_renumber(make_device):
+    app = DanteApplication()
+    device = make_device(app, 'tx')
+
+    # Known only by name, from another device's subscription to it
+    rx = make_device(app, 'rx')
+    rx._update_rx_channel(1, 'In 1', None, 'tx', 'Out 1', None)
+    channel = device.get_channel_by_name(DanteChannelType.TX, 'OUT 1')
+    assert device.get_channel_by_number(DanteChannelType.TX, 1) is None
+
+    assert device._update_tx_channel(1, 'Out 1') is channel
+    assert device.get_channel_by_number(DanteChannelType.TX, 1) is channel
+
+    device._update_tx_channel(1, 'Vocals')
+    assert device.get_channel_by_name(DanteChannelType.TX, 'out 1') is None
+    assert device.get_channel_by_name(DanteChannelType.TX, 'vocals') is channel
+    assert rx.get_channel_by_number(DanteChannelType.RX, 1).subscription.tx_channel is channel
+    assert device.tx_channels == [channel]
+
+
+def test_orphaned_channels_are_adopted_when_their_device_is_named(make_device):
+    app = DanteApplication()
+    rx = make_device(app, 'rx')
+    rx._update_rx_channel(1, 'In 1', None, 'Late', 'Out 1', None)
+    rx._update_rx_channel(2, 'In 2', None, 'late', 'OUT 1', None)
+    orphan = app.retrieve_orphaned_tx_channel('LATE', 'out 1')
+    assert len(orphan.subscriptions) == 2
+
+    late = make_device(app, 'Late')
+    assert late.get_channel_by_name(DanteChannelType.TX, 'out 1') is orphan
+    assert orphan.device is late
+    assert app.retrieve_orphaned_tx_channel('late', 'out 1') is None
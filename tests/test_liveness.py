@@ -0,0 +1,64 @@
+import asyncio
+
+from netaudio.dante2.application import DanteApplication, DanteEvent
+from netaudio.dante2.discovery import DanteDiscoveryState
+
+
+def test_devices_missing_heartbeats_go_offline_and_return(monkeypatch, make_device):
+    app = DanteApplication(heartbeat_miss_count=3)
+    events = []
+    app.add_listener(DanteEvent.DEVICE_OFFLINE, lambda device: events.append(('offline', device.name)))
+    app.add_listener(DanteEvent.DEVICE_ONLINE, lambda device: events.append(('online', device.name)))
+    # Commands are sent nowhere, but otherwise as usual
+    loop = asyncio.new_event_loop()
+    monkeypatch.setattr(app.service_loop, '_loop', loop)
+    sent = []
+    monkeypatch.setattr(app.arc_service, '_sendto', lambda message, destination: sent.append((message[6:8], destination[0])))
+
+    alpha = make_device(app, 'alpha', '192.0.2.1', services=True)
+    bravo = make_device(app, 'bravo', '192.0.2.2', services=True)
+    # Never heard from, so never declared offline
+    charlie = make_device(app, 'charlie', '192.0.2.3', services=True)
+    app._discovery._found['bravo.local.'] = {'server_name': 'bravo.local.', 'status': DanteDiscoveryState.COMPLETE}
+
+    liveness = app.liveness
+    liveness.advance(0.0)
+    for second in range(4):
+        liveness.heartbeat('192.0.2.1', second)
+        liveness.heartbeat('192.0.2.2', second)
+    # Unknown addresses are ignored
+    liveness.heartbeat('192.0.2.99', 3.0)
+
+    # Bravo falls silent after its heartbeat at 3s
+    for tick in range(16, 30):
+        now = tick / 4
+        if now.is_integer():
+            liveness.heartbeat('192.0.2.1', now)
+        liveness.advance(now)
+        if now < 6:
+            assert bravo.is_online
+
+    assert events == [('offline', 'bravo')]
+    assert alpha.is_online and not bravo.is_online and charlie.is_online
+    assert app._discovery._found['bravo.local.']['status'] == DanteDiscoveryState.DISCONNECTED
+
+    liveness.heartbeat('192.0.2.2', 7.5)
+    assert events == [('offline', 'bravo'), ('online', 'bravo')]
+    assert bravo.is_online
+    assert app._discovery._found['bravo.local.']['status'] == DanteDiscoveryState.COMPLETE
+    # Revalidated: asked for its name and channel counts
+    assert sorted(sent) == [(b'\x10\x00', '192.0.2.2'), (b'\x10\x02', '192.0.2.2')]
+    loop.close()
+
+
+def test_offline_devices_do_not_hold_up_settling(make_device):
+    app = DanteApplication()
+    device = make_device(app, 'alpha', '192.0.2.1')
+    device._outstanding = 1
+    assert not app.is_settled()
+
+    app.liveness.advance(0.0)
+    app.liveness.heartbeat('192.0.2.1', 0.0)
+    app.liveness.advance(10.0)
+    assert not device.is_online
+    assert app.is_settled()
@@ -0,0 +1,60 @@
+import pytest
+
+from netaudio.commands.server import mdns
+from netaudio.dante.const import (
+    DEFAULT_MULTICAST_METERING_PORT,
+    DEVICE_INFO_PORT,
+    MESSAGE_TYPE_LOCK_STATUS,
+    MULTICAST_GROUP_CONTROL_MONITORING,
+)
+from netaudio.utils.state_store import StateStore
+
+HOST = "192.0.2.10"
+SERVER_NAME = "device-1.local."
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = StateStore()
+    state.update(f"netaudio:dante:host:{HOST}", {"server_name": SERVER_NAME})
+    state.update(f"netaudio:dante:device:{SERVER_NAME}", {"rx_channel_count": 4, "tx_channel_count": 4})
+    monkeypatch.setattr(mdns, "state", state)
+    monkeypatch.setattr(mdns, "unhandled_messages", mdns.Counter())
+    monkeypatch.setattr(mdns, "messages_from_unknown_hosts", mdns.Counter())
+    return state
+
+
+def message(message_type, payload=b""):
+    data = bytearray(32) + payload
+    data[26:28] = message_type.to_bytes(2, "big")
+    return memoryview(data)
+
+
+def test_status_is_cached(state):
+    parsed = mdns.parse_dante_message(
+        message(MESSAGE_TYPE_LOCK_STATUS), HOST, 1029, MULTICAST_GROUP_CONTROL_MONITORING, DEVICE_INFO_PORT
+    )
+    assert parsed == {"lock_status": None}
+    assert "lock_status" in state.get(f"netaudio:dante:device:{SERVER_NAME}")
+
+
+def test_metering_is_dispatched_by_port(state):
+    levels = bytes([10, 11, 12, 13, 20, 21, 22, 23, 0])
+    mdns.parse_dante_message(
+        message(0x1234, levels), HOST, 1029, MULTICAST_GROUP_CONTROL_MONITORING, DEFAULT_MULTICAST_METERING_PORT
+    )
+    device = state.get(f"netaudio:dante:device:{SERVER_NAME}")
+    assert device["tx_volume_levels"] == {1: 10, 2: 11, 3: 12}
+    assert device["rx_volume_levels"] == {1: 20, 2: 21, 3: 22}
+
+
+def test_unhandled_messages_are_counted(state):
+    for _ in range(3):
+        assert mdns.parse_dante_message(
+            message(0xfff0), HOST, 1029, MULTICAST_GROUP_CONTROL_MONITORING, DEVICE_INFO_PORT
+        ) is None
+    mdns.parse_dante_message(
+        message(MESSAGE_TYPE_LOCK_STATUS), "192.0.2.99", 1029, MULTICAST_GROUP_CONTROL_MONITORING, DEVICE_INFO_PORT
+    )
+    assert mdns.unhandled_messages[(MULTICAST_GROUP_CONTROL_MONITORING, DEVICE_INFO_PORT, 0xfff0)] == 3
+    assert mdns.messages_from_unknown_hosts["192.0.2.99"] == 1
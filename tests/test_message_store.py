@@ -0,0 +1,49 @@
+from netaudio.dante2 import service
+from netaudio.dante2.service import MessageIndex, MessageStore
+
+
+def test_message_index_wraps_around():
+    index = MessageIndex()
+    index._num = MessageIndex.MAX - 1
+    assert index.generate() == MessageIndex.MAX
+    assert index.generate() == 1
+
+
+def test_message_index_skips_ids_in_use():
+    index = MessageIndex()
+    assert index.generate(in_use={1, 2}) == 3
+
+
+def test_store_evicts_oldest_when_full():
+    evicted = []
+    store = MessageStore(capacity=2, on_evict=lambda message_id, entry: evicted.append(message_id))
+    for _ in range(3):
+        store.put(store.next_id(), {})
+    assert evicted == [1]
+    assert len(store) == 2
+    assert store.expired == 1
+
+
+def test_store_evicts_expired(monkeypatch, clock):
+    clock.now = 100.0
+    monkeypatch.setattr(service.time, 'monotonic', clock)
+
+    store = MessageStore(ttl=5)
+    store.put(store.next_id(), {})
+    clock.now = 103.0
+    store.put(store.next_id(), {})
+    clock.now = 106.0
+    store.put(store.next_id(), {})
+
+    assert 1 not in store
+    assert 2 in store
+    assert store.expired == 1
+
+
+def test_store_counts_unmatched_responses():
+    store = MessageStore()
+    message_id = store.next_id()
+    store.put(message_id, {'key': 'value'})
+    assert store.match(message_id)['key'] == 'value'
+    assert store.match(message_id) is None
+    assert store.unmatched == 1
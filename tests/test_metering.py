@@ -0,0 +1,122 @@
+from netaudio.dante2 import metering
+from netaudio.dante2.application import DanteApplication
+
+
+class FakeLoop:
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback, *args):
+        timer = FakeTimer(delay, callback, args)
+        self.timers.append(timer)
+        return timer
+
+    def fire(self, delay):
+        timers = [timer for timer in self.timers if timer.delay == delay and not timer.cancelled]
+        self.timers = [timer for timer in self.timers if timer not in timers]
+        for timer in timers:
+            timer.callback(*timer.args)
+
+
+class FakeTimer:
+    def __init__(self, delay, callback, args):
+        self.delay = delay
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def _packet(tx_levels, rx_levels):
+    return b'\xff' * 12 + bytes(tx_levels) + bytes(rx_levels) + b'\x00'
+
+
+def test_levels_are_decoded_and_published(monkeypatch, clock, make_device):
+    clock.now = 100.0
+    monkeypatch.setattr(metering.time, 'monotonic', clock)
+    app = DanteApplication()
+    alpha = make_device(app, 'alpha', '192.0.2.1', tx_count=2, rx_count=3)
+    make_device(app, 'bravo', '192.0.2.2', tx_count=0, rx_count=0)
+    published = []
+    app.metering._subscribers.append(published.append)
+
+    app.volume_service._receive(('192.0.2.1', 8751), _packet([10, 20], [30, 40, 50]))
+    # Unknown addresses are ignored, as are devices whose channels aren't yet known
+    app.volume_service._receive(('192.0.2.99', 8751), _packet([1], [1]))
+    app.volume_service._receive(('192.0.2.2', 8751), _packet([1], [1]))
+    assert app.metering.dropped == 1
+
+    app.metering.publish()
+    [snapshot] = published[0]
+    assert snapshot.device is alpha
+    assert snapshot.tx_levels == bytes([10, 20])
+    assert snapshot.rx_levels == bytes([30, 40, 50])
+    assert snapshot.rx_peaks == bytes([30, 40, 50])
+
+    # Nothing new, nothing published
+    app.metering.publish()
+    assert len(published) == 1
+
+
+def test_peaks_are_held_then_decay(monkeypatch, clock, make_device):
+    clock.now = 100.0
+    monkeypatch.setattr(metering.time, 'monotonic', clock)
+    app = DanteApplication()
+    make_device(app, 'alpha', '192.0.2.1', tx_count=1, rx_count=1)
+    app.metering.peak_hold = 1.0
+    app.metering.peak_decay = 10.0
+    published = []
+    app.metering._subscribers.append(published.append)
+
+    app.volume_service._receive(('192.0.2.1', 8751), _packet([100], [50]))
+    clock.now = 100.5
+    app.volume_service._receive(('192.0.2.1', 8751), _packet([20], [60]))
+    app.metering.publish()
+    snapshot = published[-1][0]
+    assert snapshot.tx_levels == bytes([20])
+    # Held, as within the hold time
+    assert snapshot.tx_peaks == bytes([100])
+    assert snapshot.rx_peaks == bytes([60])
+
+    clock.now = 102.5
+    app.volume_service._receive(('192.0.2.1', 8751), _packet([20], [60]))
+    app.metering.publish()
+    snapshot = published[-1][0]
+    # Fallen by 10 a second since last published, though not below the level
+    assert snapshot.tx_peaks == bytes([80])
+    assert snapshot.rx_peaks == bytes([60])
+
+
+def test_devices_are_watched_whilst_anyone_is_subscribed(monkeypatch, make_device):
+    app = DanteApplication()
+    loop = FakeLoop()
+    monkeypatch.setattr(app.service_loop, '_loop', loop)
+    started, stopped = [], []
+    monkeypatch.setattr(app.cmc_service, '_command_volume_start', lambda device: started.append(device.name))
+    monkeypatch.setattr(app.cmc_service, '_command_volume_stop', lambda device: stopped.append(device.name))
+    alpha = make_device(app, 'alpha', '192.0.2.1', services=True, tx_count=1, rx_count=1)
+    # Without a CMC service, there's no asking
+    make_device(app, 'bravo', '192.0.2.2', tx_count=1, rx_count=1)
+
+    app.metering.subscribe(lambda snapshots: None)
+    assert started == ['alpha']
+    assert app.metering.is_watched(alpha)
+    app.metering.subscribe(lambda snapshots: None)
+    assert started == ['alpha']
+
+    # Asked again before devices stop sending, along with those discovered meanwhile
+    make_device(app, 'charlie', '192.0.2.3', services=True, tx_count=1, rx_count=1)
+    loop.fire(app.metering.WATCH_RENEW_INTERVAL)
+    assert sorted(started) == ['alpha', 'alpha', 'charlie']
+
+    for callback in list(app.metering._subscribers):
+        app.metering.unsubscribe(callback)
+    assert sorted(stopped) == ['alpha', 'charlie']
+    assert not app.metering.is_watched(alpha)
+    assert all(timer.cancelled for timer in loop.timers)
+
+
+def test_publish_interval_is_passed_on():
+    assert DanteApplication(metering_interval=0.5).metering.publish_interval == 0.5
@@ -0,0 +1,45 @@
+import pytest
+
+from netaudio.dante2.metrics import MetricsRegistry
+
+
+def test_render_counter_and_gauge():
+    registry = MetricsRegistry()
+    counter = registry.counter('packets_total', "Packets", ('service',))
+    counter.inc(service='arc')
+    counter.inc(2, service='arc')
+    registry.gauge('in_flight', "In flight", ('service',)).track(lambda: 7, service='arc')
+
+    assert registry.render() == (
+        '# HELP packets_total Packets\n'
+        '# TYPE packets_total counter\n'
+        'packets_total{service="arc"} 3\n'
+        '# HELP in_flight In flight\n'
+        '# TYPE in_flight gauge\n'
+        'in_flight{service="arc"} 7\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('duration_seconds', "Duration", ('device',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, device='a"b')
+
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'duration_seconds_bucket{device="a\\"b",le="0.1"} 1',
+        'duration_seconds_bucket{device="a\\"b",le="1"} 3',
+        'duration_seconds_bucket{device="a\\"b",le="+Inf"} 4',
+        'duration_seconds_sum{device="a\\"b"} 6.05',
+        'duration_seconds_count{device="a\\"b"} 4',
+    ]
+
+
+def test_metrics_are_shared_by_name():
+    registry = MetricsRegistry()
+    assert registry.counter('x_total', "X") is registry.counter('x_total', "X")
+    with pytest.raises(ValueError):
+        registry.gauge('x_total', "X")
+    with pytest.raises(ValueError):
+        registry.counter('x_total', "X").inc(service='arc')
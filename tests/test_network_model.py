@@ -0,0 +1,107 @@
+import asyncio
+import ipaddress
+
+from netaudio.dante import model
+from netaudio.dante.device import DanteDevice
+from netaudio.dante.model import DanteNetworkModel
+from netaudio.dante2.metrics import MetricsRegistry
+
+
+class FakeBrowser:
+    browses = 0
+
+    async def get_devices(self):
+        FakeBrowser.browses = FakeBrowser.browses + 1
+        await asyncio.sleep(0)
+        return {
+            'bravo.local.': DanteDevice(hostname='bravo.local.', ipv4=ipaddress.IPv4Address('192.0.2.2')),
+            'alpha.local.': DanteDevice(hostname='alpha.local.', ipv4=ipaddress.IPv4Address('192.0.2.1')),
+        }
+
+
+def test_reads_are_served_from_the_model_until_stale(monkeypatch, clock):
+    begun = []
+
+    async def begin_devices(devices, concurrency):
+        for device in devices:
+            device.name = device.hostname.split('.')[0]
+            begun.append(device.name)
+
+    monkeypatch.setattr(model, 'begin_devices', begin_devices)
+    FakeBrowser.browses = 0
+    network = DanteNetworkModel(browser_factory=FakeBrowser, max_age=5.0, clock=clock)
+
+    async def run():
+        # Concurrent reads share one refresh
+        first, second = await asyncio.gather(network.get_devices(), network.get_devices())
+        assert first is second
+        assert [device.name for device in first.values()] == ['alpha', 'bravo']
+        assert FakeBrowser.browses == 1
+
+        clock.now = 4.0
+        assert (await network.get_device('bravo')).ipv4 == ipaddress.IPv4Address('192.0.2.2')
+        assert FakeBrowser.browses == 1
+
+        # Only the device written to is refreshed
+        begun.clear()
+        fresh = await network.refresh_device(await network.get_device('alpha'))
+        assert begun == ['alpha']
+        assert await network.get_device('alpha') is fresh
+
+        clock.now = 6.0
+        await network.get_devices()
+        assert FakeBrowser.browses == 2
+
+    asyncio.run(run())
+
+
+def test_polling_stops_whilst_nobody_reads(monkeypatch, clock):
+    async def begin_devices(devices, concurrency):
+        for device in devices:
+            device.name = device.hostname.split('.')[0]
+
+    monkeypatch.setattr(model, 'begin_devices', begin_devices)
+    FakeBrowser.browses = 0
+    network = DanteNetworkModel(
+        browser_factory=FakeBrowser, refresh_interval=0, idle_after=5.0, clock=clock
+    )
+
+    async def run():
+        network.start()
+        try:
+            await asyncio.sleep(0.01)
+            assert FakeBrowser.browses == 0
+
+            await network.get_devices()
+            await asyncio.sleep(0.01)
+            assert FakeBrowser.browses > 1
+
+            clock.now = 10.0
+            await asyncio.sleep(0.01)
+            browses = FakeBrowser.browses
+            await asyncio.sleep(0.01)
+            assert FakeBrowser.browses == browses
+        finally:
+            await network.stop()
+
+    asyncio.run(run())
+
+
+def test_refreshes_are_recorded_in_the_metrics(monkeypatch, clock):
+    async def begin_devices(devices, concurrency):
+        for device in devices:
+            device.name = device.hostname.split('.')[0]
+            if device.name == 'bravo':
+                device.error = TimeoutError()
+            clock.now += 0.5
+
+    monkeypatch.setattr(model, 'begin_devices', begin_devices)
+    metrics = MetricsRegistry()
+    network = DanteNetworkModel(browser_factory=FakeBrowser, clock=clock, metrics=metrics)
+    asyncio.run(network.refresh())
+
+    lines = metrics.render().splitlines()
+    assert 'netaudio_network_model_refreshes_total{result="ok"} 1' in lines
+    assert 'netaudio_network_model_refresh_duration_seconds_sum 1' in lines
+    assert 'netaudio_network_model_devices 2' in lines
+    assert 'netaudio_network_model_device_errors 1' in lines
@@ -0,0 +1,143 @@
+import asyncio
+import ipaddress
+import socket
+import threading
+
+from netaudio.dante.protocols import ServiceARC
+
+
+class ReversingResponder:
+    '''Collects `batch` commands, then answers them in reverse order.'''
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(2)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.sock.getsockname()[1]
+
+    def _run(self):
+        received = []
+        try:
+            while len(received) < self.batch:
+                received.append(self.sock.recvfrom(2048))
+        except TimeoutError:
+            pass
+        for data, address in reversed(received):
+            self.sock.sendto(data[:10] + b'reply', address)
+
+    def close(self):
+        self._thread.join()
+        self.sock.close()
+
+
+class EchoResponder:
+    '''Answers each command as it arrives, with the command's code.'''
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.sock.getsockname()[1]
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except TimeoutError:
+                continue
+            self.sock.sendto(data[:10] + data[6:8], address)
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+        self.sock.close()
+
+
+def test_pipelined_responses_are_matched_to_commands():
+    responder = ReversingResponder(batch=3)
+    service = ServiceARC()
+    service.port = responder.port
+
+    async def _send():
+        await service.begin(ipaddress.IPv4Address('127.0.0.1'))
+        commands = [service._command("1002") for _ in range(3)]
+        return commands, await service._send_pipelined(commands, 2048)
+
+    try:
+        commands, responses = asyncio.run(_send())
+    finally:
+        service.sock.close()
+        responder.close()
+
+    assert [response[4:6].hex() for response in responses] == [command[8:12] for command in commands]
+
+
+def test_pipelined_commands_sharing_a_sequence_id_are_each_answered():
+    responder = EchoResponder()
+    service = ServiceARC()
+    service.port = responder.port
+
+    async def _send():
+        await service.begin(ipaddress.IPv4Address('127.0.0.1'))
+        # As though the random sequence ids had collided
+        commands = [service._command(code) for code in ("1000", "1002", "3000")]
+        commands = [command[:8] + "abcd" + command[12:] for command in commands]
+        return await service._send_pipelined(commands, 2048)
+
+    try:
+        responses = asyncio.run(_send())
+    finally:
+        service.sock.close()
+        responder.close()
+
+    assert [response[10:12].hex() for response in responses] == ["1000", "1002", "3000"]
+
+
+def test_unanswered_commands_time_out_without_blocking_the_loop():
+    # Bound, but never answers
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(('127.0.0.1', 0))
+    service = ServiceARC()
+    service.port = silent.getsockname()[1]
+    service.timeout = 0.2
+
+    async def _send():
+        await service.begin(ipaddress.IPv4Address('127.0.0.1'))
+        assert not service.sock.getblocking()
+        ticks = 0
+
+        async def _tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(_tick())
+        started = asyncio.get_running_loop().time()
+        response = await service._send(service._command("1002"), 2048)
+        elapsed = asyncio.get_running_loop().time() - started
+        ticker.cancel()
+        return response, elapsed, ticks
+
+    try:
+        response, elapsed, ticks = asyncio.run(_send())
+    finally:
+        service.sock.close()
+        silent.close()
+
+    assert response is None
+    assert 0.2 <= elapsed < 1
+    # The loop carried on meanwhile
+    assert ticks >= 10
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from netaudio.commands.subscription.apply import _apply_routes
+from netaudio.dante2.application import DanteApplication
+from netaudio.dante2.channel import DanteChannelType
+from netaudio.dante2.routing import DanteRoute, apply_routes, restore_snapshot, take_snapshot
+from netaudio.simulator import SimulatedNetwork
+
+
+@pytest.fixture
+def network():
+    network = SimulatedNetwork()
+    network.add_device('alpha', rx_count=8, tx_count=8)
+    network.add_device('bravo', rx_count=20, tx_count=40, arc_version=(2, 7, 2))
+    network.devices[0].subscribe(3, '05', 'bravo')
+    with network:
+        yield network
+
+
+@pytest.fixture
+def app(network):
+    app = DanteApplication(discovery_factory=network.discovery_factory())
+    app.startup()
+    assert app.wait_until_settled(5)
+    yield app
+    app.shutdown()
+
+
+def test_routes_are_applied_with_one_refresh_per_device(app, network):
+    alpha, bravo = network.devices
+    alpha.received['arc'].clear()
+    routes = [
+        DanteRoute('alpha', 1, 'bravo', '33'),
+        DanteRoute('alpha', '2', 'bravo', 34),
+        DanteRoute('alpha', 3),
+        DanteRoute('bravo', 1, 'alpha', '03'),
+        # Already so
+        DanteRoute('alpha', 4),
+        DanteRoute('charlie', 1, 'alpha', 1),
+        DanteRoute('alpha', 99, 'bravo', 1),
+    ]
+
+    results = app.call(apply_routes, app, routes)
+
+    assert [result.route for result in results] == routes
+    assert [result.changed for result in results] == [True, True, True, True, False, False, False]
+    assert results[5].error == "No RX device named charlie"
+    assert results[6].error == "No RX channel 99 on alpha"
+
+    assert [channel.tx_channel_name for channel in alpha.rx_channels[:3]] == ['33', '34', None]
+    assert bravo.rx_channels[0].tx_channel_name == '03'
+    rx_channel_requests = [request for request in alpha.received['arc'] if request[6:8] == b'\x34\x00']
+    assert len(rx_channel_requests) == 1
+
+    assert app.wait_until_settled(5)
+    assert str(app.get_device_by_name('alpha').rx_channels[1].subscription.tx_channel) == '34@bravo'
+
+
+def test_snapshots_restore_only_what_differs(app, network):
+    alpha, bravo = network.devices
+    snapshot = app.call(take_snapshot, app)
+    assert snapshot['devices']['alpha']['rx_channels'][2] == {
+        'number': 3, 'name': '03', 'tx_channel': '05', 'tx_device': 'bravo',
+    }
+
+    app.call(apply_routes, app, [DanteRoute('alpha', 1, 'bravo', '33'), DanteRoute('alpha', 3)])
+    bravo_tx = app.get_device_by_name('bravo').get_channel_by_number(DanteChannelType.TX, 5)
+    app.call(bravo_tx.set_name, 'Vox', False)
+    app.call(bravo_tx.device.request_tx_channels, True)
+    assert bravo.tx_channels[4].name == 'Vox'
+    assert bravo_tx.device.get_channel_by_number(DanteChannelType.TX, 5).name == 'Vox'
+
+    alpha.received['arc'].clear()
+    renames, routes = app.call(restore_snapshot, app, snapshot)
+
+    assert [(rename.device, rename.number, rename.name, rename.ok) for rename in renames] == [('bravo', 5, '05', True)]
+    assert [(result.route, result.changed) for result in routes] == [
+        (DanteRoute('alpha', 1), True),
+        (DanteRoute('alpha', 3, 'bravo', '05'), True),
+    ]
+    assert bravo.tx_channels[4].name == '05'
+    assert [channel.tx_channel_name for channel in alpha.rx_channels[:3]] == [None, None, '05']
+    # Only the two differing RX channels were sent anything
+    subscription_requests = [request for request in alpha.received['arc'] if request[6:8] == b'\x34\x10']
+    assert len(subscription_requests) == 2
+
+    # Now as it was, nothing more is done
+    assert app.wait_until_settled(5)
+    assert app.call(restore_snapshot, app, snapshot) == ([], [])
+
+
+def test_snapshots_restore_rx_channels_by_number(app, network):
+    alpha = network.devices[0]
+    snapshot = app.call(take_snapshot, app)
+    # Named as another channel is numbered
+    app.call(app.get_device_by_name('alpha').get_channel_by_number(DanteChannelType.RX, 1).set_name, '3')
+    app.call(apply_routes, app, [DanteRoute('alpha', 3)])
+    assert alpha.rx_channels[0].name == '3'
+
+    _, routes = app.call(restore_snapshot, app, snapshot, False)
+
+    assert [(result.route, result.changed) for result in routes] == [(DanteRoute('alpha', 3, 'bravo', '05'), True)]
+    assert [channel.tx_channel_name for channel in alpha.rx_channels[:3]] == [None, None, '05']
+
+
+def test_routes_missing_a_field_are_reported(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("NETAUDIO_DAEMON_SOCKET", str(tmp_path / "absent.sock"))
+    _apply_routes([{'rx_device': 'alpha', 'tx_device': 'bravo', 'tx_channel': '01'}])
+    assert "Route missing 'rx_channel'" in capsys.readouterr().out
+
+
+def test_snapshots_missing_a_field_are_refused_before_anything_changes():
+    snapshot = {'version': 1, 'devices': {'alpha': {'rx_channels': [{'name': '01'}]}}}
+    with pytest.raises(ValueError, match="missing 'number' of one of alpha's RX channels"):
+        # Refused before the application is so much as looked at
+        asyncio.run(restore_snapshot(None, snapshot))
@@ -0,0 +1,104 @@
+from netaudio.dante2.scheduler import DanteCommandScheduler, DantePriority
+
+
+class FakeLoop:
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback, *args):
+        self.timers.append((delay, callback, args))
+        return self
+
+    def cancel(self):
+        pass
+
+    def fire(self):
+        timers, self.timers = self.timers, []
+        for _, callback, args in timers:
+            callback(*args)
+
+
+class FakeServiceLoop:
+    def __init__(self):
+        self.loop = FakeLoop()
+
+
+class FakeApplication:
+    def __init__(self):
+        self.service_loop = FakeServiceLoop()
+
+
+def _scheduler(clock, **kwargs):
+    return DanteCommandScheduler(FakeApplication(), clock=clock, **kwargs)
+
+
+def _command(sent, name, result=True):
+    def _transmit():
+        sent.append(name)
+        return result
+    return _transmit
+
+
+def test_devices_have_a_window_of_commands_in_flight(clock):
+    scheduler = _scheduler(clock, window=2)
+    sent = []
+    for index in range(3):
+        scheduler.submit('alpha', _command(sent, index))
+    scheduler.submit('bravo', _command(sent, 'other'))
+    assert sent == [0, 1, 'other']
+    assert scheduler.in_flight('alpha') == 2
+    assert scheduler.waiting == 1
+
+    scheduler.release('alpha')
+    assert sent == [0, 1, 'other', 2]
+    for _ in range(2):
+        scheduler.release('alpha')
+    scheduler.release('bravo')
+    assert scheduler.in_flight('alpha') == 0
+    assert scheduler.in_flight('bravo') == 0
+
+    # Commands cancelled before being sent give their place straight back
+    scheduler.submit('bravo', _command(sent, 'cancelled', False))
+    assert scheduler.in_flight('bravo') == 0
+
+
+def test_commands_are_sent_at_the_rate_allowed(clock):
+    scheduler = _scheduler(clock, rate=10, burst=2)
+    loop = scheduler._app.service_loop.loop
+    sent = []
+    for index in range(5):
+        scheduler.submit(None, _command(sent, index))
+    assert sent == [0, 1]
+    assert [delay for delay, _, _ in loop.timers] == [0.1]
+
+    clock.now = 0.1
+    loop.fire()
+    assert sent == [0, 1, 2]
+    clock.now = 0.5
+    loop.fire()
+    # Only as many as the bucket holds, however long it's been
+    assert sent == [0, 1, 2, 3, 4]
+    assert not loop.timers
+
+
+def test_interactive_commands_go_first_and_devices_take_turns(clock):
+    scheduler = _scheduler(clock, rate=1, burst=4)
+    loop = scheduler._app.service_loop.loop
+    sent = []
+    for index in range(4):
+        scheduler.submit(None, _command(sent, index))
+    sent.clear()
+
+    for index in range(3):
+        scheduler.submit('alpha', _command(sent, f'alpha-{index}'), DantePriority.BULK)
+    scheduler.submit('bravo', _command(sent, 'bravo-0'), DantePriority.BULK)
+    scheduler.submit('charlie', _command(sent, 'rename'), DantePriority.INTERACTIVE)
+    assert sent == []
+
+    clock.now = 4.0
+    loop.fire()
+    assert sent == ['rename', 'alpha-0', 'bravo-0', 'alpha-1']
+    clock.now = 5.0
+    loop.fire()
+    assert sent[-1] == 'alpha-2'
+    assert scheduler.waiting == 0
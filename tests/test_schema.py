@@ -0,0 +1,101 @@
+import pytest
+
+from netaudio.dante2 import schema
+from netaudio.dante2.codec import build_command, decode_integer
+from netaudio.simulator import SimulatedNetwork
+from netaudio.simulator.device import SimulatedDevice
+
+
+def _device(arc_version) -> SimulatedDevice:
+    device = SimulatedNetwork().add_device('alpha', rx_count=4, tx_count=4, arc_version=arc_version)
+    device.rx_channels[1].name = 'vocal'
+    device.tx_channels[2].friendly_name = 'mix'
+    return device
+
+
+def _request(code: bytes, body: bytes) -> bytes:
+    return bytes(build_command(b'\x28\x02', 1, code, b'\x00\x00', (body,)))
+
+
+def test_layouts_are_chosen_by_protocol_version():
+    assert schema.get_page_decoder(schema.RX_CHANNELS, (2, 7, 1)).layout.stride == 20
+    assert schema.get_page_decoder(schema.RX_CHANNELS, (2, 8, 2)).layout.stride is None
+    assert schema.get_page_decoder(schema.RX_CHANNELS, (3, 0, 0)).layout.stride is None
+    assert schema.get_page_decoder(schema.TX_CHANNEL_NAMES, (2, 8, 1)) is not None
+    assert schema.get_page_decoder(schema.TX_CHANNEL_NAMES, (2, 8, 2)) is None
+
+
+def test_later_layouts_can_be_registered(monkeypatch):
+    monkeypatch.setattr(schema, '_DECODERS', {})
+    schema.get_page_decoder.cache_clear()
+    try:
+        schema.register_page_layout(schema.TX_CHANNEL_NAMES, (1, 0, 0), schema.PageLayout(
+            start=0, stride=4, fields=(schema.Field('number', 0), schema.Field('name', 2, string=True)),
+        ))
+        assert schema.get_page_decoder(schema.TX_CHANNEL_NAMES, (0, 9, 0)) is None
+        decoder = schema.get_page_decoder(schema.TX_CHANNEL_NAMES, (1, 2, 0))
+        assert decoder.decode(b'\x00\x07\x00\x08\x00\x00\x00\x00one\x00', 1) == [(7, 'one')]
+
+        with pytest.raises(ValueError):
+            schema.PageDecoder(schema.TX_CHANNEL_NAMES, schema.PageLayout(
+                start=0, fields=(schema.Field('number', 0), schema.Field('name', 1)),
+            ))
+    finally:
+        schema.get_page_decoder.cache_clear()
+
+
+@pytest.mark.parametrize('arc_version,request_body', [
+    ((2, 8, 2), bytes(8) + b'\x00\x01' * 2),
+    ((2, 7, 1), b'\x00\x01\x00\x01\x00\x00'),
+])
+def test_rx_pages_are_decoded(arc_version, request_body):
+    device = _device(arc_version)
+    device.subscribe(1, '03', 'alpha')
+    device.subscribe(2, 'left', 'bravo')
+    code = b'\x34\x00' if arc_version >= (2, 8, 2) else b'\x30\x00'
+    response = device._arc_rx_channels(_request(code, request_body))
+
+    channels = schema.get_page_decoder(schema.RX_CHANNELS, arc_version).decode(response, 4)
+    assert [channel.number for channel in channels] == [1, 2, 3, 4]
+    assert [channel.name for channel in channels] == ['01', 'vocal', '03', '04']
+    assert (channels[0].tx_channel_name, channels[0].tx_device_name) == ('03', '.')
+    assert (channels[1].tx_channel_name, channels[1].tx_device_name) == ('left', 'bravo')
+    assert channels[2].tx_device_name is None
+    assert decode_integer(response, channels[0].common, 4) == 48000
+
+
+def test_tx_pages_are_decoded():
+    device = _device((2, 8, 2))
+    response = device._arc_tx_channels(_request(b'\x24\x00', bytes(8) + b'\x00\x01' * 2))
+    channels = schema.get_page_decoder(schema.TX_CHANNELS, (2, 8, 2)).decode(response, 4)
+    assert [channel.name or channel.default_name for channel in channels] == ['01', '02', 'mix', '04']
+
+    device = _device((2, 7, 1))
+    response = device._arc_tx_channels(_request(b'\x20\x00', b'\x00\x01\x00\x01\x00\x00'))
+    channels = schema.get_page_decoder(schema.TX_CHANNELS, (2, 7, 1)).decode(response, 4)
+    assert [(channel.number, channel.name, channel.default_name) for channel in channels][2] == (3, None, '03')
+
+    response = device._arc_tx_channels(_request(b'\x20\x10', b'\x00\x01\x00\x01\x00\x00'))
+    names = schema.get_page_decoder(schema.TX_CHANNEL_NAMES, (2, 7, 1)).decode(response, 4)
+    assert names[2] == (3, 'mix')
+
+
+def test_short_responses_decode_what_there_is():
+    decoder = schema.get_page_decoder(schema.TX_CHANNEL_NAMES, (2, 7, 1))
+    # Two definitions (without names), where three were expected
+    response = bytes(12) + b'\x00\x01\x00\x01\x00\x00' + b'\x00\x02\x00\x02\x00\x00'
+    assert decoder.decode(response, 3) == [(1, None), (2, None)]
+    assert decoder.decode(response[:20], 3) == [(1, None)]
+
+
+def test_undecodable_definitions_are_skipped(caplog):
+    decoder = schema.get_page_decoder(schema.TX_CHANNEL_NAMES, (2, 7, 1))
+    # The second definition's name isn't ASCII; the third's is unterminated
+    response = (
+        bytes(12)
+        + b'\x00\x01\x00\x01\x00\x1e' + b'\x00\x02\x00\x02\x00\x22' + b'\x00\x03\x00\x03\x00\x25'
+        + b'one\x00' + b'\xfft\x00' + b'thr'
+    )
+    assert decoder.decode(response, 3) == [(1, 'one')]
+    assert decoder.decode(response[:-3] + b'three\x00', 3) == [(1, 'one'), (3, 'three')]
+    assert 'Skipping undecodable definition 1' in caplog.text
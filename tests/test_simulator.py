@@ -0,0 +1,65 @@
+import pytest
+
+from netaudio.dante2.application import DanteApplication
+from netaudio.dante2.channel import DanteChannelType
+from netaudio.simulator import SimulatedNetwork
+
+
+@pytest.fixture
+def network():
+    network = SimulatedNetwork()
+    network.add_device('alpha', rx_count=8, tx_count=8)
+    network.add_device('bravo', rx_count=20, tx_count=40, arc_version=(2, 7, 2))
+    # More than a page of channels, with the newer page layout
+    network.add_device('charlie', rx_count=40, tx_count=24)
+    network.devices[0].subscribe(3, '05', 'bravo')
+    network.devices[1].subscribe(1, '02', 'alpha')
+    with network:
+        yield network
+
+
+@pytest.fixture
+def app(network):
+    app = DanteApplication(discovery_factory=network.discovery_factory())
+    app.startup()
+    assert app.wait_until_settled(5)
+    yield app
+    app.shutdown()
+
+
+def _subscriptions(device):
+    return {
+        channel.number: str(channel.subscription.tx_channel)
+        for channel in device.rx_channels
+        if channel.subscription.tx_channel
+    }
+
+
+def test_devices_are_discovered(app):
+    alpha = app.get_device_by_name('alpha')
+    bravo = app.get_device_by_name('bravo')
+    assert (len(alpha.rx_channels), len(alpha.tx_channels)) == (8, 8)
+    assert (len(bravo.rx_channels), len(bravo.tx_channels)) == (20, 40)
+    assert _subscriptions(alpha) == {3: '05@bravo'}
+    assert _subscriptions(bravo) == {1: '02@alpha'}
+
+
+def test_every_page_of_channels_is_requested(app):
+    charlie = app.get_device_by_name('charlie')
+    assert [channel.number for channel in charlie.rx_channels] == list(range(1, 41))
+    assert [channel.name for channel in charlie.tx_channels] == [f"{number:02d}" for number in range(1, 25)]
+
+
+def test_subscription_changes_reach_the_device(app, network):
+    rx_channel = app.get_device_by_name('alpha').get_channel_by_number(DanteChannelType.RX, 1)
+    tx_channel = app.get_device_by_name('bravo').get_channel_by_number(DanteChannelType.TX, 33)
+
+    app.call(rx_channel.subscribe, tx_channel)
+    assert app.wait_until_settled(5)
+    assert network.devices[0].rx_channels[0].tx_channel_name == '33'
+    assert str(rx_channel.subscription.tx_channel) == '33@bravo'
+
+    app.call(rx_channel.unsubscribe)
+    assert app.wait_until_settled(5)
+    assert network.devices[0].rx_channels[0].tx_device_name is None
+    assert rx_channel.subscription.tx_channel is None
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+from netaudio.dante2.application import DanteApplication
+from netaudio.dante2.channel import DanteTxChannel
+from netaudio.dante2.state_feed import DanteStateFeed, DanteStateFeedClient
+from netaudio.simulator import SimulatedNetwork
+
+
+def test_clients_coalesce_changes_and_close_when_overwhelmed():
+    async def run():
+        client = DanteStateFeedClient(asyncio.get_running_loop(), max_pending=2)
+        client.push(('a',), {'value': 1})
+        client.push(('b',), {'value': 2})
+        # Replaces the first, keeping its place
+        client.push(('a',), {'value': 3})
+        assert await client.get() == [{'value': 3}, {'value': 2}]
+
+        for key in 'xyz':
+            client.push((key,), {})
+        assert client.closed
+        assert await client.get() is None
+
+    asyncio.run(run())
+
+
+def test_only_changes_are_sent(make_device):
+    async def run():
+        app = DanteApplication()
+        alpha = make_device(app, 'alpha', '192.0.2.1', services=True)
+        feed = DanteStateFeed(app)
+        client = DanteStateFeedClient(asyncio.get_running_loop())
+        feed._clients.append(client)
+
+        feed.publish()
+        [change] = await client.get()
+        assert change['event'] == 'device'
+        assert change['device'] == 'alpha.local.'
+        assert change['state']['name'] == 'alpha'
+        assert change['state']['online']
+
+        feed.publish()
+        alpha._add_channel(DanteTxChannel(app, alpha, 1, 'one'))
+        feed.publish()
+        [change] = await client.get()
+        assert change == {
+            'event': 'channel',
+            'device': 'alpha.local.',
+            'type': 'tx',
+            'number': 1,
+            'state': {'type': 'tx', 'number': 1, 'name': 'one', 'subscribing': []},
+        }
+
+        app._remove_device(alpha)
+        feed.publish()
+        assert await client.get() == [
+            {'event': 'device_removed', 'device': 'alpha.local.'},
+            {'event': 'channel_removed', 'device': 'alpha.local.', 'type': 'tx', 'number': 1},
+        ]
+
+    asyncio.run(run())
+
+
+def test_levels_reach_clients_and_stop_once_they_leave():
+    network = SimulatedNetwork()
+    simulated = network.add_device('alpha', rx_count=2, tx_count=3)
+    simulated.levels[:] = bytes([10, 20, 30, 40, 50])
+
+    async def run(feed):
+        client = feed.connect()
+        while True:
+            changes = await asyncio.wait_for(client.get(), 5)
+            metering = [change for change in changes if change['event'] == 'metering']
+            if metering:
+                break
+        feed.disconnect(client)
+        return metering[0]
+
+    with network:
+        app = DanteApplication(discovery_factory=network.discovery_factory(), metering_interval=0.05)
+        app.startup()
+        try:
+            assert app.wait_until_settled(5)
+            change = asyncio.run(run(DanteStateFeed(app, metering=True)))
+            assert change['device'] == 'alpha.local.'
+            assert change['tx'] == [10, 20, 30]
+            assert change['rx'] == [40, 50]
+
+            # Told to stop sending, once nobody's left to see them
+            deadline = time.monotonic() + 5
+            while simulated.is_metering and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert not simulated.is_metering
+        finally:
+            app.shutdown()
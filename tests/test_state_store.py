@@ -0,0 +1,72 @@
+import threading
+
+from netaudio.utils.state_store import JSONFileStatePersistence, StateStore
+
+
+def test_hash_fields_are_merged():
+    store = StateStore()
+    store.update("device:a", {"name": "a", "rx_channel_count": 2})
+    store.update("device:a", {"rx_channel_count": 4})
+    assert store.get("device:a") == {"name": "a", "rx_channel_count": 4}
+    assert store.get_field("device:a", "name") == "a"
+    assert store.get("device:b") == {}
+
+
+def test_keys_expire(clock):
+    store = StateStore(clock=clock)
+    store.update("host:1", {"server_name": "a"})
+    store.add_members("hosts", "1")
+    assert store.expire("host:1", 5)
+    assert not store.expire("host:2", 5)
+
+    clock.now = 4
+    # Heartbeats push the expiry back
+    store.expire("host:1", 5)
+    clock.now = 8
+    assert store.get("host:1") == {"server_name": "a"}
+
+    clock.now = 9
+    assert store.get("host:1") == {}
+    assert store.keys() == ["hosts"]
+    assert store.members("hosts") == {"1"}
+
+
+def test_clear_by_prefix():
+    store = StateStore()
+    store.update("netaudio:dante:device:a", {"name": "a"})
+    store.update("other", {"x": 1})
+    store.clear("netaudio:dante:")
+    assert store.keys() == ["other"]
+
+
+def test_concurrent_updates():
+    store = StateStore()
+
+    def _update(index):
+        for count in range(1000):
+            store.update("device:a", {index: count})
+            store.expire("device:a", 5)
+
+    threads = [threading.Thread(target=_update, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get("device:a") == {index: 999 for index in range(4)}
+
+
+def test_persistence(tmp_path):
+    persistence = JSONFileStatePersistence(str(tmp_path / "state.json"))
+    store = StateStore(persistence)
+    store.update("host:1", {"server_name": "a"})
+    store.update("host:2", {"server_name": "b"})
+    store.expire("host:2", -1)
+    store.add_members("hosts", "1", "2")
+    store.expire("hosts", 60)
+    store.save()
+
+    restored = StateStore(persistence)
+    restored.load()
+    assert restored.get("host:1") == {"server_name": "a"}
+    assert restored.get("host:2") == {}
+    assert restored.members("hosts") == {"1", "2"}
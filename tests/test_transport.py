@@ -0,0 +1,115 @@
+import asyncio
+import platform
+import socket
+
+import pytest
+
+from netaudio.dante2 import transport
+
+pytestmark = pytest.mark.skipif(platform.system() != 'Linux', reason="Batched I/O is only used on Linux")
+
+
+class _Protocol(asyncio.DatagramProtocol):
+
+    def __init__(self):
+        self.transport = None
+        self.received = []
+        self.lost = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.received.append((data, addr))
+
+    def connection_lost(self, exc):
+        self.lost.set_result(exc)
+
+
+class _FullSocket:
+    '''A socket whose send buffer is full for its first few sends.'''
+
+    def __init__(self, sock, full_for):
+        self._sock = sock
+        self.full_for = full_for
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+    def sendto(self, data, address):
+        if self.full_for:
+            self.full_for -= 1
+            raise BlockingIOError()
+        return self._sock.sendto(data, address)
+
+
+def _bound():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    return sock
+
+
+def test_pending_datagrams_are_all_read():
+    async def _run():
+        loop = asyncio.get_running_loop()
+        protocol = _Protocol()
+        sock = _bound()
+        endpoint = await transport.open_endpoint(loop, protocol, sock)
+        assert isinstance(endpoint, transport.BatchedDatagramTransport)
+        assert protocol.transport is endpoint
+
+        sender = _bound()
+        # Queued before the loop next looks at the socket
+        for index in range(10):
+            sender.sendto(bytes([index]) * (index + 1), sock.getsockname())
+        await asyncio.sleep(0.05)
+        assert [data for data, _ in protocol.received] == [bytes([index]) * (index + 1) for index in range(10)]
+        assert protocol.received[0][1] == sender.getsockname()
+
+        endpoint.sendto(b'reply', sender.getsockname())
+        assert sender.recvfrom(16) == (b'reply', sock.getsockname())
+
+        endpoint.close()
+        assert await protocol.lost is None
+        assert sock.fileno() == -1
+        sender.close()
+
+    asyncio.run(_run())
+
+
+def test_sends_wait_for_room_in_order():
+    async def _run():
+        loop = asyncio.get_running_loop()
+        protocol = _Protocol()
+        sock = _FullSocket(_bound(), full_for=2)
+        receiver = _bound()
+        endpoint = transport.BatchedDatagramTransport(loop, sock, protocol)
+
+        for index in range(5):
+            endpoint.sendto(bytes([index]), receiver.getsockname())
+        assert endpoint.get_write_buffer_size() == 5
+        # Closing waits for the backlog to be sent
+        endpoint.close()
+        await protocol.lost
+        assert endpoint.get_write_buffer_size() == 0
+        assert [receiver.recvfrom(16)[0] for _ in range(5)] == [bytes([index]) for index in range(5)]
+        receiver.close()
+
+    asyncio.run(_run())
+
+
+def test_loops_without_readers_fall_back():
+    async def _run():
+        loop = asyncio.get_running_loop()
+
+        def _unsupported(*args):
+            raise NotImplementedError
+
+        loop.add_reader = _unsupported
+        protocol = _Protocol()
+        endpoint = await transport.open_endpoint(loop, protocol, _bound())
+        assert not isinstance(endpoint, transport.BatchedDatagramTransport)
+        assert protocol.transport is endpoint
+        endpoint.close()
+
+    asyncio.run(_run())